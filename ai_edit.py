@@ -21,6 +21,9 @@ import json
 import base64
 import threading
 import shutil
+import collections
+import hashlib
+import queue
 import gc
 import uuid
 import traceback
@@ -33,6 +36,8 @@ _get_clean_env = None
 _assets_dir = None
 _venv_python = None  # Path to venv Python for subprocess tasks
 _get_current_file_path = None  # Callable returning the currently open file's path (or None)
+_get_agent_settings = None  # Callable returning the 'agent' settings dict
+_narrate_stub = None  # app's _inject_narrate_stub(code), applied before dry runs
 
 
 def _current_file_path():
@@ -43,6 +48,12 @@ def _current_file_path():
     except Exception:
         return None
 
+def _agent_settings():
+    try:
+        return (_get_agent_settings() if _get_agent_settings else None) or {}
+    except Exception:
+        return {}
+
 # ── Streaming robustness constants (inspired by Claude Code internals) ──
 STALL_TIMEOUT_S = 90       # Kill hung CLI after 90s of no output (non-agent mode only)
 STALL_WARNING_S = 45       # Log warning after 45s of silence (non-agent mode only)
@@ -57,6 +68,64 @@ CONTEXT_CRITICAL_RATIO = 0.90
 # Rough estimation: ~4 chars per token for code/English mixed content
 CHARS_PER_TOKEN = 4
 
+# ── Speculative fixes ──
+FIX_CANDIDATES_MAX = 4     # Upper bound on parallel fix candidates
+DRY_RUN_TIMEOUT_S = 180    # Per-candidate ``manim --dry_run`` validation
+
+# ── Agent review ──
+REVIEW_FRAME_MIN_BITS = 3  # Hash bits a frame must differ by from the last kept one
+REVIEW_CACHE_MAX = 64      # Review verdicts remembered per app session
+
+# ── Stream buffering ──
+RAW_RING_LIMIT = 1 << 20   # Max undrained raw output kept for xterm.js (chars)
+WRITE_PREVIEW_LINES = 20   # Write/Edit content lines shown in the panel
+
+
+class _ChunkRing:
+    """Raw output chunks waiting for the next poll, capped at ``limit``
+    characters. When a hidden or slow client lets output pile up, the
+    oldest chunks are dropped and a one-line notice takes their place."""
+
+    def __init__(self, limit=RAW_RING_LIMIT):
+        self.limit = limit
+        self._chunks = collections.deque()
+        self._size = 0
+        self._dropped = 0
+        self._lock = threading.Lock()
+
+    def append(self, chunk):
+        with self._lock:
+            self._chunks.append(chunk)
+            self._size += len(chunk)
+            while self._size > self.limit and len(self._chunks) > 1:
+                old = self._chunks.popleft()
+                self._size -= len(old)
+                self._dropped += len(old)
+            if self._size > self.limit:
+                # One chunk bigger than the cap: keep its newest lines.
+                big = self._chunks.pop()
+                keep = big[-self.limit:]
+                nl = keep.find('\n')
+                if 0 <= nl < len(keep) - 1:
+                    keep = keep[nl + 1:]    # no half line / escape sequence
+                self._chunks.append(keep)
+                self._size = len(keep)
+                self._dropped += len(big) - len(keep)
+
+    def drain(self):
+        with self._lock:
+            out = ''.join(self._chunks)
+            if self._dropped:
+                out = (f"\x1b[90m... {self._dropped} chars of earlier output "
+                       f"dropped\x1b[0m\r\n") + out
+            self._chunks.clear()
+            self._size = 0
+            self._dropped = 0
+        return out
+
+    def __len__(self):
+        return len(self._chunks)
+
 
 _PROMPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'prompts')
 
@@ -628,18 +697,23 @@ def _append_assets_list(md_content):
 
 
 def init_ai_edit(preview_dir, get_clean_env_func, assets_dir=None,
-                 venv_dir=None, current_file_path_getter=None):
+                 venv_dir=None, current_file_path_getter=None,
+                 agent_settings_getter=None, narrate_stub=None):
     """Initialise module-level dependencies (called once from app.py).
 
     ``current_file_path_getter`` is an optional callable returning the
     path of the currently open file (used by AgentMemory to resolve the
-    per-project .manim_studio directory)."""
+    per-project .manim_studio directory). ``agent_settings_getter``
+    returns the ``agent`` settings dict (e.g. ``fix_candidates``);
+    ``narrate_stub`` prepares code for a render the way the app does."""
     global _preview_dir, _get_clean_env, _assets_dir, _venv_python
-    global _get_current_file_path
+    global _get_current_file_path, _get_agent_settings, _narrate_stub
     _preview_dir = preview_dir
     _get_clean_env = get_clean_env_func
     _assets_dir = assets_dir
     _get_current_file_path = current_file_path_getter
+    _get_agent_settings = agent_settings_getter
+    _narrate_stub = narrate_stub
     if venv_dir:
         if os.name == 'nt':
             _venv_python = os.path.join(venv_dir, 'Scripts', 'python.exe')
@@ -988,6 +1062,83 @@ def _downscale_image(img_path, max_width=960):
         print(f"[AI EDIT] Image downscale error: {e}")
 
 
+def _capture_review_frames(video_path, out_dir, max_frames=30, max_width=960):
+    """Extract about one frame per second (at most ``max_frames``) from a
+    rendered video with a single ffmpeg pass, already scaled to
+    ``max_width`` and JPEG-encoded for review. Frames are spaced like the
+    preview scrubber did, skipping the (usually blank) first frame.
+    Returns ``[{'time', 'path'}]``; empty when ffmpeg/ffprobe fail."""
+    if (not video_path or not os.path.isfile(video_path)
+            or not shutil.which('ffmpeg') or not shutil.which('ffprobe')):
+        return []
+    no_window = subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
+    try:
+        probe = subprocess.run(
+            ['ffprobe', '-v', 'error', '-show_entries', 'format=duration',
+             '-of', 'default=noprint_wrappers=1:nokey=1', video_path],
+            capture_output=True, text=True, timeout=10,
+            creationflags=no_window)
+        duration = float(probe.stdout.strip() or 0)
+    except (OSError, ValueError, subprocess.TimeoutExpired):
+        return []
+    if duration <= 0:
+        return []
+    count = min(max(int(duration), 1), max_frames)
+    step = duration / (count + 1)
+
+    os.makedirs(out_dir, exist_ok=True)
+    for name in os.listdir(out_dir):
+        if name.startswith('frame_'):
+            try:
+                os.remove(os.path.join(out_dir, name))
+            except OSError:
+                pass
+    # Input seek to the first sample, then the fps filter picks one frame
+    # per step while decoding forward once.
+    cmd = ['ffmpeg', '-y', '-loglevel', 'error',
+           '-ss', f'{step:.3f}', '-i', video_path,
+           '-vf', f"fps=1/{step:.6f},scale='min({max_width},iw)':-2",
+           '-frames:v', str(count), '-q:v', '4',
+           os.path.join(out_dir, 'frame_%d.jpg')]
+    try:
+        proc = subprocess.run(cmd, capture_output=True, text=True,
+                              encoding='utf-8', errors='replace', timeout=120,
+                              creationflags=no_window)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        print(f"[AI AGENT] Frame capture failed: {e}")
+        return []
+    if proc.returncode != 0:
+        print(f"[AI AGENT] Frame capture failed: {(proc.stderr or '').strip()[-300:]}")
+        return []
+    shots = []
+    for i in range(count):
+        fpath = os.path.join(out_dir, f'frame_{i + 1}.jpg')
+        if os.path.isfile(fpath):
+            shots.append({'time': f'{step * (i + 1):.2f}', 'path': fpath})
+    return shots
+
+
+def _dedup_review_frames(files, min_bits=REVIEW_FRAME_MIN_BITS):
+    """Drop frames that look like the previous kept frame (holds, waits)
+    using visual_diff's perceptual hash. The first and last frames are
+    always kept; if any frame can't be hashed nothing is dropped. The
+    8x8 hash is too coarse to tell a recolour or a typo fix apart, so it
+    is only used here, never to decide that a render is unchanged."""
+    try:
+        import visual_diff
+    except ImportError:
+        return list(files)
+    hashes = [visual_diff.hash_image(f) for f in files]
+    if not hashes or None in hashes:
+        return list(files)
+    kept = [0]
+    for i in range(1, len(files)):
+        last = i == len(files) - 1
+        if last or visual_diff.hash_distance(hashes[kept[-1]], hashes[i]) >= min_bits:
+            kept.append(i)
+    return [files[i] for i in kept]
+
+
 def _cleanup_old_workspaces(max_age=3600):
     """Remove ai_workspace_* and ai_images dirs older than max_age seconds."""
     if not _preview_dir or not os.path.isdir(_preview_dir):
@@ -1138,7 +1289,10 @@ class AIEditMixin:
     # ── Claude Code stream-json state ──
     _ai_claude_proc = None          # subprocess.Popen
     _ai_claude_events = []          # parsed stream-json events for panel display
-    _ai_claude_raw_chunks = []      # raw output chunks for xterm.js window mode
+    _ai_claude_raw_chunks = _ChunkRing()  # raw output chunks for xterm.js window mode
+    _ai_claude_panel_lines = []     # formatted panel lines, appended as events arrive
+    _ai_claude_panel_pos = 0        # number of events already formatted
+    _ai_claude_panel_lock = threading.Lock()
     _ai_claude_workspace = None
     _ai_claude_code_file = None
     _ai_claude_original_code = ''
@@ -1497,8 +1651,7 @@ class AIEditMixin:
                 AIEditMixin._ai_resume_context = ''  # Only inject once
 
             # Reset streaming state (not session state)
-            AIEditMixin._ai_claude_events = []
-            AIEditMixin._ai_claude_raw_chunks = []
+            AIEditMixin._reset_claude_stream()
             AIEditMixin._ai_claude_done = False
             AIEditMixin._ai_claude_workspace = workspace
             AIEditMixin._ai_claude_code_file = code_file
@@ -1951,44 +2104,77 @@ class AIEditMixin:
         """
         lines = []
         for ev in events:
-            kind = ev.get('_kind', '')
-            if kind == 'tool_use':
-                lines.append(f"{ev['_tool']}({ev.get('_arg', '')})")
-                # Show Write/Edit content
-                inp = ev.get('_input', {})
-                content = inp.get('content', '') if isinstance(inp, dict) else ''
-                if content and ev['_tool'] in ('Write', 'Edit'):
-                    for i, cl in enumerate(content.split('\n'), 1):
-                        lines.append(f"  {i} {cl}")
-            elif kind == 'text':
-                lines.append(ev.get('_text', ''))
-            elif kind == 'result_line':
-                lines.append(ev.get('_text', ''))
-            elif kind == 'code_line':
-                lines.append(f"  {ev.get('_num', '')} {ev.get('_text', '')}")
-            elif kind == 'collapsed':
-                lines.append(ev.get('_text', ''))
-            elif kind == 'raw':
-                lines.append(ev.get('_text', ''))
+            lines.extend(AIEditMixin._format_event_lines(ev))
         return '\n'.join(lines)
 
-    def ai_edit_claude_poll(self):
+    @staticmethod
+    def _format_event_lines(ev):
+        """Panel lines for one parsed event. Write/Edit content is cut to
+        ``WRITE_PREVIEW_LINES`` like Read results are."""
+        kind = ev.get('_kind', '')
+        if kind == 'tool_use':
+            lines = [f"{ev['_tool']}({ev.get('_arg', '')})"]
+            # Show Write/Edit content
+            inp = ev.get('_input', {})
+            content = inp.get('content', '') if isinstance(inp, dict) else ''
+            if content and ev['_tool'] in ('Write', 'Edit'):
+                content_lines = content.split('\n')
+                for i, cl in enumerate(content_lines[:WRITE_PREVIEW_LINES], 1):
+                    lines.append(f"  {i} {cl}")
+                if len(content_lines) > WRITE_PREVIEW_LINES:
+                    lines.append(f'+{len(content_lines) - WRITE_PREVIEW_LINES} lines')
+            return lines
+        if kind == 'code_line':
+            return [f"  {ev.get('_num', '')} {ev.get('_text', '')}"]
+        if kind in ('text', 'result_line', 'collapsed', 'raw'):
+            return [ev.get('_text', '')]
+        return []
+
+    @staticmethod
+    def _reset_claude_stream():
+        with AIEditMixin._ai_claude_panel_lock:
+            AIEditMixin._ai_claude_events = []
+            AIEditMixin._ai_claude_raw_chunks = _ChunkRing()
+            AIEditMixin._ai_claude_panel_lines = []
+            AIEditMixin._ai_claude_panel_pos = 0
+
+    @staticmethod
+    def _claude_panel_since(cursor):
+        """Format events that arrived since the last call, then return
+        ``(text, cursor, reset)`` for panel lines after the client's
+        ``cursor``. A cursor past the end (a new turn started) restarts at
+        0 and sets ``reset`` so the client drops its old text."""
+        with AIEditMixin._ai_claude_panel_lock:
+            events = AIEditMixin._ai_claude_events
+            lines = AIEditMixin._ai_claude_panel_lines
+            pos = AIEditMixin._ai_claude_panel_pos
+            for ev in events[pos:]:
+                lines.extend(AIEditMixin._format_event_lines(ev))
+            AIEditMixin._ai_claude_panel_pos = max(pos, len(events))
+            reset = cursor is not None and cursor > len(lines)
+            if cursor is None or reset:
+                cursor = 0
+            return '\n'.join(lines[cursor:]), len(lines), reset
+
+    def ai_edit_claude_poll(self, cursor=None):
         """Poll Claude Code stream-json output.
 
-        Returns ``output`` (raw stream-json for xterm.js window mode)
-        and ``filtered_output`` (formatted text for panel mode).
+        Returns ``output`` (raw stream-json for xterm.js window mode,
+        drained on every call) and ``filtered_output`` (formatted text for
+        panel mode). With ``cursor`` — the ``cursor`` value from the
+        previous poll, 0 to start — ``filtered_output`` holds only the
+        panel lines added since then (``reset`` is true when the server
+        started over at 0); without it, the whole panel text. Pollers
+        that only want ``output`` should still pass a cursor so a quiet
+        stream costs nothing.
         """
         # Drain raw chunks for xterm.js
-        raw_chunks = AIEditMixin._ai_claude_raw_chunks
-        AIEditMixin._ai_claude_raw_chunks = []
-        raw_output = ''.join(raw_chunks)
+        raw_output = AIEditMixin._ai_claude_raw_chunks.drain()
+        filtered, next_cursor, reset = self._claude_panel_since(cursor)
 
-        if not raw_output and not AIEditMixin._ai_claude_done:
+        if not raw_output and not filtered and not AIEditMixin._ai_claude_done:
             return {'status': 'streaming', 'output': '', 'filtered_output': '',
-                    'done': False, 'chars': 0}
-
-        # Format ALL events so far for panel display (full replace, not incremental)
-        filtered = self._format_stream_events(AIEditMixin._ai_claude_events)
+                    'cursor': next_cursor, 'reset': reset, 'done': False, 'chars': 0}
 
         if AIEditMixin._ai_claude_done:
             # Try to read the edited file
@@ -2018,13 +2204,13 @@ class AIEditMixin:
             if edited_code:
                 return {
                     'status': 'success', 'output': raw_output,
-                    'filtered_output': filtered,
+                    'filtered_output': filtered, 'cursor': next_cursor, 'reset': reset,
                     'edited_code': edited_code, 'done': True, 'message': 'Done!'
                 }
             else:
                 return {
                     'status': 'error', 'output': raw_output,
-                    'filtered_output': filtered,
+                    'filtered_output': filtered, 'cursor': next_cursor, 'reset': reset,
                     'done': True, 'message': 'Claude finished but no code changes detected'
                 }
 
@@ -2053,7 +2239,7 @@ class AIEditMixin:
             }
 
         return {'status': 'streaming', 'output': raw_output,
-                'filtered_output': filtered,
+                'filtered_output': filtered, 'cursor': next_cursor, 'reset': reset,
                 'done': False, 'chars': len(raw_output),
                 'session': session_info,
                 'early_preview': early_info}
@@ -2082,8 +2268,7 @@ class AIEditMixin:
             except Exception:
                 pass
 
-        AIEditMixin._ai_claude_events = []
-        AIEditMixin._ai_claude_raw_chunks = []
+        AIEditMixin._reset_claude_stream()
         AIEditMixin._ai_claude_done = False
         AIEditMixin._ai_claude_workspace = None
         AIEditMixin._ai_claude_code_file = None
@@ -2691,10 +2876,16 @@ class AIEditMixin:
     _ai_agent_stream_events = []  # live stream-json events from edit subprocess
 
     _ai_agent_provider = 'claude'  # 'claude' or 'codex'
+    _ai_agent_fix_candidates = 1  # >1: race that many fixes per render error
+    _ai_agent_stats_lock = threading.Lock()  # guards _ai_session_tokens merges
+    _ai_agent_review_cache = collections.OrderedDict()  # sha1(goal + scene code) -> verdict
     _ai_agent_image_paths = []    # user-uploaded reference images
 
-    def ai_agent_start(self, description, max_iterations=5, model='', provider='claude', image_paths=None, code=''):
-        """Start the autonomous AI agent workflow."""
+    def ai_agent_start(self, description, max_iterations=5, model='', provider='claude', image_paths=None, code='',
+                       fix_candidates=None):
+        """Start the autonomous AI agent workflow. ``fix_candidates``
+        (default: the ``agent.fix_candidates`` setting) > 1 makes each
+        render error race that many fixes in parallel."""
         if AIEditMixin._ai_agent_active:
             return {'status': 'error', 'message': 'Agent already running'}
         AIEditMixin._ai_agent_model = (model or '').strip()
@@ -2726,6 +2917,13 @@ class AIEditMixin:
         AIEditMixin._ai_agent_feedback_event = threading.Event()
         AIEditMixin._ai_agent_cancel_flag = False
         AIEditMixin._ai_agent_image_paths = image_paths or []
+        if fix_candidates is None:
+            fix_candidates = _agent_settings().get('fix_candidates', 1)
+        try:
+            fix_candidates = int(fix_candidates or 1)
+        except (TypeError, ValueError):
+            fix_candidates = 1
+        AIEditMixin._ai_agent_fix_candidates = max(1, min(fix_candidates, FIX_CANDIDATES_MAX))
         # Reset session memory for fresh agent run
         AIEditMixin._ai_agent_session_id = None
         AIEditMixin._ai_agent_workspace = None
@@ -2765,11 +2963,16 @@ class AIEditMixin:
         ev.wait(timeout=timeout)
         return AIEditMixin._ai_agent_feedback
 
-    def _ai_agent_edit(self, code, instruction):
+    def _ai_agent_edit(self, code, instruction, candidate=None):
         """Run AI CLI in a workspace to edit scene.py. Returns the edited code or None.
         Supports both Claude and Codex providers.
         Reuses workspace and session across iterations for memory.
-        Streams output to _ai_agent_stream_events for live UI display."""
+        Streams output to _ai_agent_stream_events for live UI display.
+
+        ``candidate`` (Claude only, see ``_ai_agent_speculative_fix``)
+        runs in its own workspace with a fresh session instead, streams
+        into ``candidate['events']`` and exposes the process as
+        ``candidate['proc']`` so a losing candidate can be killed."""
         # Ensure code/instruction are strings (guard against dict from JS)
         if not isinstance(code, str):
             code = str(code) if code else ''
@@ -2787,7 +2990,9 @@ class AIEditMixin:
             return self._ai_agent_edit_codex(code, instruction)
         try:
             # Reuse or create workspace
-            if AIEditMixin._ai_agent_workspace and os.path.isdir(AIEditMixin._ai_agent_workspace):
+            if candidate:
+                workspace = candidate['workspace']
+            elif AIEditMixin._ai_agent_workspace and os.path.isdir(AIEditMixin._ai_agent_workspace):
                 workspace = AIEditMixin._ai_agent_workspace
             else:
                 _cleanup_old_workspaces()
@@ -2854,13 +3059,15 @@ class AIEditMixin:
             # Build command with session support for token efficiency.
             # First edit: --session-id to create session.
             # Subsequent edits: --resume to reuse cached context (70-80% token savings).
-            session_id = AIEditMixin._ai_agent_session_id
+            session_id = (candidate['session_id'] if candidate
+                          else AIEditMixin._ai_agent_session_id)
+            first_edit = bool(candidate) or AIEditMixin._ai_agent_first_edit
             cmd = [
                 'claude', '-p', '--output-format', 'stream-json',
                 '--verbose',
                 '--allowedTools', 'Read,Write,Edit,Bash,Glob,Grep',
             ]
-            if AIEditMixin._ai_agent_first_edit:
+            if first_edit:
                 cmd.extend(['--session-id', session_id])
             else:
                 cmd.extend(['--resume', session_id])
@@ -2871,13 +3078,16 @@ class AIEditMixin:
             for key in ('CLAUDECODE', 'CLAUDE_CODE'):
                 env.pop(key, None)
 
-            session_flag = '--session-id' if AIEditMixin._ai_agent_first_edit else '--resume'
+            session_flag = '--session-id' if first_edit else '--resume'
             print(f"[AI AGENT] Edit: claude -p (stdin, {len(instruction)} chars) "
                   f"{session_flag} {session_id[:8]}... --cwd {workspace}"
                   + (f" --model {AIEditMixin._ai_agent_model}" if AIEditMixin._ai_agent_model else ""))
 
             # Reset stream chunks for live display
-            AIEditMixin._ai_agent_stream_events = []
+            if candidate:
+                events = candidate['events']
+            else:
+                events = AIEditMixin._ai_agent_stream_events = []
 
             proc = subprocess.Popen(
                 cmd,
@@ -2888,6 +3098,8 @@ class AIEditMixin:
                 bufsize=1,
                 cwd=workspace, env=env,
             )
+            if candidate:
+                candidate['proc'] = proc
 
             # Write instruction via stdin to avoid arg length limits
             try:
@@ -2910,7 +3122,8 @@ class AIEditMixin:
             threading.Thread(target=_read_stderr, daemon=True).start()
 
             # Mark first edit done so subsequent calls use --resume
-            AIEditMixin._ai_agent_first_edit = False
+            if not candidate:
+                AIEditMixin._ai_agent_first_edit = False
 
             # Stream output — parse stream-json for live display
             # Includes stall watchdog to detect hung processes.
@@ -2928,7 +3141,8 @@ class AIEditMixin:
                         _raw_line_count += 1
                         if _raw_line_count <= 3:
                             print(f"[AI AGENT] raw[{_raw_line_count}]: {line.strip()[:150]}")
-                        if AIEditMixin._ai_agent_cancel_flag:
+                        if (AIEditMixin._ai_agent_cancel_flag
+                                or (candidate and candidate['cancel'].is_set())):
                             proc.kill()
                             break
                         line = line.strip()
@@ -2937,7 +3151,7 @@ class AIEditMixin:
                         try:
                             event = json.loads(line)
                         except json.JSONDecodeError:
-                            AIEditMixin._ai_agent_stream_events.append(
+                            events.append(
                                 {'_kind': 'raw', '_text': line})
                             continue
 
@@ -2955,6 +3169,16 @@ class AIEditMixin:
                             inp_tok = usage.get('input_tokens', 0)
                             out_tok = usage.get('output_tokens', 0)
                             cache_read = usage.get('cache_read_input_tokens', 0)
+                            if candidate:
+                                # Billed to the session when the candidate
+                                # finishes (see _ai_agent_speculative_fix).
+                                cs = candidate['stats']
+                                cs['input'] += inp_tok
+                                cs['output'] += out_tok
+                                cs['cache_read'] += cache_read
+                                cs['cache_creation'] += usage.get(
+                                    'cache_creation_input_tokens', 0)
+                                cs['total_cost_usd'] += cost or 0.0
                             cost_parts = []
                             if cost is not None:
                                 cost_parts.append(f"${cost:.4f}")
@@ -2966,7 +3190,7 @@ class AIEditMixin:
                                 cost_parts.append(
                                     f"cache:{cache_read/max(inp_tok,1)*100:.0f}%")
                             if cost_parts:
-                                AIEditMixin._ai_agent_stream_events.append({
+                                events.append({
                                     '_kind': 'text',
                                     '_text': '  '.join(cost_parts)})
                             continue
@@ -2991,7 +3215,7 @@ class AIEditMixin:
                                                or inp.get('query') or '')
                                         if isinstance(arg, str) and len(arg) > 60:
                                             arg = '...' + arg[-50:]
-                                    AIEditMixin._ai_agent_stream_events.append({
+                                    events.append({
                                         '_kind': 'tool_use', '_tool': tool,
                                         '_arg': arg, '_input': inp})
                                     content = (inp.get('content', '')
@@ -2999,13 +3223,13 @@ class AIEditMixin:
                                     if content and tool in ('Write', 'Edit'):
                                         for i, cl in enumerate(
                                                 content.split('\n'), 1):
-                                            AIEditMixin._ai_agent_stream_events.append(
+                                            events.append(
                                                 {'_kind': 'code_line',
                                                  '_num': i, '_text': cl})
                                 elif btype == 'text':
                                     text = block.get('text', '').strip()
                                     if text:
-                                        AIEditMixin._ai_agent_stream_events.append(
+                                        events.append(
                                             {'_kind': 'text', '_text': text})
                             continue
 
@@ -3017,15 +3241,15 @@ class AIEditMixin:
                                 if stdout_out:
                                     out_lines = stdout_out.strip().split('\n')
                                     for ol in out_lines[:15]:
-                                        AIEditMixin._ai_agent_stream_events.append(
+                                        events.append(
                                             {'_kind': 'result_line', '_text': ol})
                                     if len(out_lines) > 15:
-                                        AIEditMixin._ai_agent_stream_events.append({
+                                        events.append({
                                             '_kind': 'collapsed',
                                             '_text': f'+{len(out_lines)-15} lines'})
                                 elif isinstance(content, str) and content.strip():
                                     short = content.strip()[:200]
-                                    AIEditMixin._ai_agent_stream_events.append(
+                                    events.append(
                                         {'_kind': 'result_line', '_text': short})
                             continue
 
@@ -3360,6 +3584,199 @@ class AIEditMixin:
             traceback.print_exc()
             return None
 
+    def _ai_agent_speculative_fix(self, code, instruction, k):
+        """Race ``k`` fixes for a render error. Each candidate edits its own
+        copy of the agent workspace in a fresh Claude session and is then
+        validated with ``manim --dry_run``; the first one that runs cleanly
+        wins and the rest are killed. If none does, the first changed
+        candidate is returned so the regular render reports its error.
+        Returns the code or None."""
+        base = AIEditMixin._ai_agent_workspace
+        if not base or not os.path.isdir(base) or not _venv_python:
+            return self._ai_agent_edit(code, instruction)
+
+        AIEditMixin._ai_agent_stream_events = []
+        stamp = int(time.time() * 1000)
+        results = queue.Queue()
+        candidates = []
+        for i in range(k):
+            ws = f'{base}_fix{i + 1}_{stamp}'
+            try:
+                shutil.copytree(base, ws, symlinks=True, ignore=shutil.ignore_patterns(
+                    '.git', 'assets', 'screenshots', 'media', '__pycache__'))
+            except OSError as e:
+                print(f"[AI AGENT] Candidate workspace failed: {e}")
+                continue
+            _init_workspace_git(ws)
+            _link_assets(ws)
+            hint = ('' if i == 0 else
+                    f"\n\n(Candidate {i + 1} of {k}: if more than one fix is "
+                    f"plausible, try a different one from the most obvious.)")
+            # Events stay per candidate and only the kept candidate's are
+            # shown; every candidate's token stats are billed to the session.
+            candidates.append({
+                'index': i, 'workspace': ws, 'session_id': str(uuid.uuid4()),
+                'instruction': instruction + hint, 'proc': None,
+                'cancel': threading.Event(), 'events': [],
+                'stats': {'input': 0, 'output': 0, 'cache_read': 0,
+                          'cache_creation': 0, 'total_cost_usd': 0.0},
+            })
+        if not candidates:
+            return self._ai_agent_edit(code, instruction)
+
+        def _work(c):
+            fixed, err = None, None
+            try:
+                try:
+                    fixed = self._ai_agent_edit(code, c['instruction'], candidate=c)
+                finally:
+                    # Losing candidates were billed too.
+                    with AIEditMixin._ai_agent_stats_lock:
+                        st = AIEditMixin._ai_session_tokens
+                        for key, value in c['stats'].items():
+                            st[key] = st.get(key, 0) + value
+                        if any(c['stats'].values()):
+                            st['turn_count'] = st.get('turn_count', 0) + 1
+                if not fixed or fixed.strip() == code.strip():
+                    fixed, err = None, 'no change'
+                elif not c['cancel'].is_set():
+                    with open(os.path.join(c['workspace'], 'scene.py'), 'w',
+                              encoding='utf-8') as f:
+                        f.write(fixed)
+                    err = self._ai_agent_dry_run(c, fixed)
+            except Exception as e:
+                err = str(e)
+            results.put((c, fixed, err))
+
+        print(f"[AI AGENT] Racing {len(candidates)} fix candidates")
+        workers = [threading.Thread(target=_work, args=(c,), daemon=True)
+                   for c in candidates]
+        for t in workers:
+            t.start()
+
+        AIEditMixin._ai_agent_stream_events.append({
+            '_kind': 'text', '_text': f'Racing {len(candidates)} fix candidates...'})
+        winner, fallback, pending = None, None, len(candidates)
+        while pending and not winner and not AIEditMixin._ai_agent_cancel_flag:
+            try:
+                c, fixed, err = results.get(timeout=1)
+            except queue.Empty:
+                continue
+            pending -= 1
+            if fixed and err is None:
+                winner = (c, fixed)
+                note = f"Candidate {c['index'] + 1}: runs cleanly — accepted"
+            else:
+                if fixed and fallback is None:
+                    fallback = (c, fixed)
+                note = f"Candidate {c['index'] + 1}: {(err or 'failed').splitlines()[-1][:150]}"
+            print(f"[AI AGENT] {note}")
+            AIEditMixin._ai_agent_stream_events.append({'_kind': 'text', '_text': note})
+
+        killed = []
+        for c in candidates:
+            c['cancel'].set()
+            proc = c['proc']
+            if proc and proc.poll() is None:
+                try:
+                    proc.kill()
+                    killed.append(proc)
+                except Exception:
+                    pass
+
+        def _cleanup():
+            # Workspaces go only once killed candidates have exited and
+            # released their files (and no worker is about to start one).
+            for proc in killed:
+                try:
+                    proc.wait(timeout=10)
+                except Exception:
+                    pass
+            for t in workers:
+                t.join(timeout=10)
+            for c in candidates:
+                if c['proc'] and c['proc'] not in killed:
+                    try:
+                        c['proc'].wait(timeout=10)
+                    except Exception:
+                        pass
+                shutil.rmtree(c['workspace'], ignore_errors=True)
+        threading.Thread(target=_cleanup, daemon=True).start()
+
+        kept = winner or fallback
+        if not kept:
+            return None
+        c, fixed = kept
+        AIEditMixin._ai_agent_stream_events.extend(c['events'])
+        return fixed
+
+    def _ai_agent_dry_run(self, candidate, code):
+        """Run every scene of ``code`` with ``manim --dry_run``
+        (construct() only, nothing written), after the same narrate()
+        stub the real render applies. Returns None when it runs cleanly,
+        else the tail of its output."""
+        if _narrate_stub:
+            code = _narrate_stub(code)
+        with open(os.path.join(candidate['workspace'], '_dry_run.py'), 'w',
+                  encoding='utf-8') as f:
+            f.write(code)
+        cmd = [_venv_python, '-m', 'manim', 'render', '--dry_run', '-ql', '-a', '_dry_run.py']
+        proc = subprocess.Popen(
+            cmd, cwd=candidate['workspace'], env=_get_clean_env(),
+            stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT, text=True, encoding='utf-8',
+            errors='replace',
+            creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0)
+        candidate['proc'] = proc
+        if candidate['cancel'].is_set():
+            proc.kill()
+        try:
+            out, _ = proc.communicate(timeout=DRY_RUN_TIMEOUT_S)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.communicate()
+            return f'dry run timed out after {DRY_RUN_TIMEOUT_S}s'
+        if proc.returncode == 0:
+            return None
+        return (out or '').strip()[-1500:] or f'dry run exited with {proc.returncode}'
+
+    def _ai_agent_capture_in_ui(self, shots_dir):
+        """Fallback capture: ask the frontend to scrub the preview video
+        and send back data URLs. Returns (shots, screenshot_files)."""
+        self._ai_agent_set(
+            'capturing', 'Capturing 1 frame per second...',
+            action={'type': 'capture_screenshots'},
+            ui_action={'type': 'scrub_video'},
+        )
+        sfb = self._ai_agent_wait(timeout=60)
+        if AIEditMixin._ai_agent_cancel_flag:
+            return [], []
+        shots = (sfb or {}).get('screenshots', [])
+        os.makedirs(shots_dir, exist_ok=True)
+
+        def _save_shot(idx_shot):
+            idx, s = idx_shot
+            data_url = s.get('dataUrl', '')
+            if not data_url or ',' not in data_url:
+                return None
+            try:
+                b64 = data_url.split(',', 1)[1]
+                img_bytes = base64.b64decode(b64)
+                fpath = os.path.join(shots_dir, f'frame_{idx+1}.jpg')
+                with open(fpath, 'wb') as f:
+                    f.write(img_bytes)
+                _downscale_image(fpath, max_width=960)
+                return fpath
+            except Exception as e:
+                print(f"[AI AGENT] Screenshot save error: {e}")
+                return None
+
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=min(8, len(shots) or 1)) as pool:
+            results = list(pool.map(_save_shot, enumerate(shots)))
+        return ([{'time': s.get('time')} for s in shots],
+                [r for r in results if r])
+
     def _ai_agent_run(self, description, max_iterations, code=''):
         """Main agent loop (runs in thread). Never times out — loops until
         cancelled or the animation is correct."""
@@ -3507,9 +3924,13 @@ class AIEditMixin:
                         scene_name='AgentScene',
                         goal=description,
                         error=err[:400])
+                    k = AIEditMixin._ai_agent_fix_candidates
+                    if AIEditMixin._ai_agent_provider == 'codex':
+                        k = 1
                     self._ai_agent_set(
                         'fixing',
-                        f'Auto-fixing error (attempt {consecutive_errors}): {err[:100]}')
+                        (f'Trying {k} fixes in parallel' if k > 1 else 'Auto-fixing error')
+                        + f' (attempt {consecutive_errors}): {err[:100]}')
                     err_truncated = err[:1500] if len(err) > 1500 else err
                     tpl_fix = _load_prompt_section(agent_prompt_file, 'Fix')
                     if tpl_fix:
@@ -3520,7 +3941,10 @@ class AIEditMixin:
                             f"{err_truncated}\n\n"
                             f"Fix the bug and write the corrected code back to scene.py."
                         )
-                    fixed = self._ai_agent_edit(code, fix_instruction)
+                    if k > 1:
+                        fixed = self._ai_agent_speculative_fix(code, fix_instruction, k)
+                    else:
+                        fixed = self._ai_agent_edit(code, fix_instruction)
                     if fixed and fixed.strip() != code.strip():
                         code = fixed
                         AIEditMixin._ai_agent_code = code
@@ -3536,46 +3960,34 @@ class AIEditMixin:
                     consecutive_errors = 0
 
                     # ── Capture screenshots ──
-                    self._ai_agent_set(
-                        'capturing', 'Capturing 1 frame per second...',
-                        action={'type': 'capture_screenshots'},
-                        ui_action={'type': 'scrub_video'},
-                    )
-                    sfb = self._ai_agent_wait(timeout=60)
+                    # Frames come straight from the rendered file; the
+                    # preview scrubber is only a fallback when ffmpeg is
+                    # unavailable or the path is unknown.
+                    workspace = AIEditMixin._ai_agent_workspace or _preview_dir
+                    shots_dir = os.path.join(workspace, 'screenshots')
+                    self._ai_agent_set('capturing', 'Capturing 1 frame per second...')
+                    t0 = time.time()
+                    shots = _capture_review_frames(fb.get('path') or '', shots_dir)
+                    if shots:
+                        print(f"[AI AGENT] Captured {len(shots)} frames in "
+                              f"{(time.time() - t0) * 1000:.0f} ms")
+                        screenshot_files = [s['path'] for s in shots]
+                    else:
+                        shots, screenshot_files = self._ai_agent_capture_in_ui(shots_dir)
                     if AIEditMixin._ai_agent_cancel_flag:
                         break
-                    shots = (sfb or {}).get('screenshots', [])
                     AIEditMixin._ai_agent_screenshots = shots
 
-                    # ── Save ALL screenshots as files for review ──
-                    # Parallelized: decode + write + downscale runs in a
-                    # thread pool (inspired by Claude Code's concurrent
-                    # read-only tool execution).
-                    workspace = AIEditMixin._ai_agent_workspace or _preview_dir
-                    shots_dir = os.path.join(workspace, 'screenshots')
-                    os.makedirs(shots_dir, exist_ok=True)
-
-                    def _save_shot(idx_shot):
-                        idx, s = idx_shot
-                        data_url = s.get('dataUrl', '')
-                        if not data_url or ',' not in data_url:
-                            return None
-                        try:
-                            b64 = data_url.split(',', 1)[1]
-                            img_bytes = base64.b64decode(b64)
-                            fpath = os.path.join(shots_dir, f'frame_{idx+1}.jpg')
-                            with open(fpath, 'wb') as f:
-                                f.write(img_bytes)
-                            _downscale_image(fpath, max_width=960)
-                            return fpath
-                        except Exception as e:
-                            print(f"[AI AGENT] Screenshot save error: {e}")
-                            return None
-
-                    from concurrent.futures import ThreadPoolExecutor
-                    with ThreadPoolExecutor(max_workers=min(8, len(shots) or 1)) as pool:
-                        results = list(pool.map(_save_shot, enumerate(shots)))
-                    screenshot_files = [r for r in results if r]
+                    # ── Drop near-identical frames; reuse verdicts ──
+                    all_frames = len(screenshot_files)
+                    screenshot_files = _dedup_review_frames(screenshot_files)
+                    if len(screenshot_files) < all_frames:
+                        print(f"[AI AGENT] Reviewing {len(screenshot_files)} of "
+                              f"{all_frames} frames (rest unchanged)")
+                    # Verdicts are keyed on the exact scene code that was
+                    # rendered, so any real fix gets a fresh review.
+                    review_key = hashlib.sha1(json.dumps(
+                        [description, code]).encode('utf-8')).hexdigest()
 
                     # ── Review ──
                     self._ai_agent_set('analyzing',
@@ -3593,7 +4005,18 @@ class AIEditMixin:
                             f"Examine all {len(screenshot_files)} frames.\n"
                             f"Reply SATISFIED or IMPROVE: <what is wrong>"
                         )
-                    review = self._ai_agent_review(review_prompt, screenshot_files)
+                    review = AIEditMixin._ai_agent_review_cache.get(review_key)
+                    if review:
+                        AIEditMixin._ai_agent_review_cache.move_to_end(review_key)
+                        print("[AI AGENT] Same scene code as an earlier review "
+                              "— reusing its verdict")
+                    else:
+                        review = self._ai_agent_review(review_prompt, screenshot_files)
+                        if review and review_key:
+                            cache = AIEditMixin._ai_agent_review_cache
+                            cache[review_key] = review
+                            while len(cache) > REVIEW_CACHE_MAX:
+                                cache.popitem(last=False)
 
                     # ── Review failed → skip review, continue loop ──
                     if not review:
@@ -3711,7 +4134,11 @@ class AIEditMixin:
             'action': AIEditMixin._ai_agent_action,
             'ui_action': AIEditMixin._ai_agent_ui_action,
             'history': AIEditMixin._ai_agent_history[-20:],
-            'screenshots': [{'time': s.get('time')} for s in AIEditMixin._ai_agent_screenshots],
+            'screenshots': [
+                {'time': s.get('time'),
+                 'url': ('file:///' + s['path'].replace('\\', '/').lstrip('/')
+                         + f"?it={AIEditMixin._ai_agent_iteration}") if s.get('path') else None}
+                for s in AIEditMixin._ai_agent_screenshots],
             'stream_output': stream_output,
             'session': session_info,
         }
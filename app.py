@@ -159,6 +159,8 @@ init_ai_edit(
     assets_dir=ASSETS_DIR,
     venv_dir=VENV_DIR,
     current_file_path_getter=lambda: app_state.get('current_file_path'),
+    agent_settings_getter=lambda: app_state['settings'].get('agent'),
+    narrate_stub=lambda code: _inject_narrate_stub(code),
 )
 init_narration(PREVIEW_DIR, get_clean_environment, VENV_DIR, USER_DATA_DIR)
 
@@ -1166,10 +1168,18 @@ app_state = {
         'diff': {
             'threshold': 0.01,
             'autopromote_below_threshold': True,
+            'sample_every': 1,   # >1: hash keyframes >=N apart, refine on drift
         },
         'farm': {
             'workers_local': 4,
         },
+        'inspector': {
+            'live_preview': True,          # single-frame render while dragging
+            'live_resolution': [480, 270],
+        },
+        'agent': {
+            'fix_candidates': 1,   # >1: race that many fixes per render error
+        },
     },
     'lsp_process': None,    # basedpyright-langserver subprocess
     'lsp_running': False,   # LSP stdout reader thread active flag
@@ -2595,6 +2605,17 @@ class MyScene(Scene):
                     # Store temp file path for cleanup after render
                     render_temp_file = temp_file
 
+                    # F-03: hash manim's partial movie files while the render
+                    # runs, so the visual diff is ready when it finishes.
+                    segment_watcher = None
+                    if feature_enabled('visual_diff') and (not format or format.lower() == 'mp4'):
+                        try:
+                            import visual_diff
+                            segment_watcher = visual_diff.SegmentWatcher(
+                                os.path.join(RENDER_DIR, 'videos')).start()
+                        except Exception as seg_err:
+                            print(f"[RENDER] Segment hashing unavailable: {seg_err}")
+
                     # Start a background thread to watch for render file and handle it
                     def watch_render():
                         import time
@@ -2721,6 +2742,17 @@ class MyScene(Scene):
                                                     shutil.move(render_file, final_render_path)
                                                     print(f"[RENDER WATCHER] Moved to: {final_render_path}")
 
+                                                    # Collect streamed segment hashes before the
+                                                    # partial movie files are deleted below.
+                                                    if segment_watcher is not None:
+                                                        try:
+                                                            import visual_diff
+                                                            visual_diff.attach_stream(
+                                                                final_render_path,
+                                                                segment_watcher.finish(scene_name))
+                                                        except Exception as seg_err:
+                                                            print(f"[RENDER WATCHER] Segment hashes unavailable: {seg_err}")
+
                                                     # Remove the videos folder structure created by manim
                                                     print(f"[RENDER WATCHER] Removing manim folder structure...")
                                                     try:
@@ -2830,8 +2862,15 @@ class MyScene(Scene):
                         except Exception as cleanup_err:
                             print(f"[RENDER WATCHER] Error cleaning temp file: {cleanup_err}")
 
+                    def watch_render_and_release():
+                        try:
+                            watch_render()
+                        finally:
+                            if segment_watcher is not None:
+                                segment_watcher.cancel()
+
                     import threading
-                    watcher_thread = threading.Thread(target=watch_render, daemon=True)
+                    watcher_thread = threading.Thread(target=watch_render_and_release, daemon=True)
                     watcher_thread.start()
 
                     return {'status': 'started', 'message': 'Render command sent to terminal'}
@@ -4265,10 +4304,11 @@ class MyScene(Scene):
     # ══════════════════════════════════════════════════════════════════
 
     def visual_diff_record(self, video_path, scene_file='', baseline_id=None):
-        """Hash frames of a completed render, persist metadata, and diff
-        against the current baseline. The frontend calls this right after
-        renderCompleted so the Diff Review tab can open if drift was found.
-        Returns {status, record, diff}."""
+        """Queue a completed render for hashing and diffing against the
+        current baseline. Returns {status: 'queued', job_id} immediately;
+        the frontend calls this right after renderCompleted, and the result
+        is pushed to window._visualDiffResult once the background worker
+        has it, so the Diff Review tab can open if drift was found."""
         if not feature_enabled('visual_diff'):
             return {'status': 'skipped', 'reason': 'feature disabled'}
         try:
@@ -4276,22 +4316,41 @@ class MyScene(Scene):
             thr = app_state['settings'].get('diff', {}).get('threshold', 0.01)
             auto = app_state['settings'].get('diff', {}).get(
                 'autopromote_below_threshold', True)
-            rec = visual_diff.record_render(
-                uuid.uuid4().hex[:12], video_path, scene_file)
-            if not rec.get('ok'):
-                return {'status': 'error', 'message': rec.get('error')}
-            render_id = rec['render_id']
-            diff = visual_diff.diff_against_baseline(
-                render_id, baseline_id=baseline_id, threshold=thr)
-            if diff.get('ok') and diff.get('auto_accepted') and auto:
-                visual_diff.accept(render_id)
-                diff['promoted'] = True
-            return {'status': 'ok', 'render_id': render_id, 'diff': diff}
+            sample_every = app_state['settings'].get('diff', {}).get(
+                'sample_every', 1)
+            # Hashing holds off while an interactive preview is running.
+            visual_diff.set_busy_probe(lambda: bool(app_state.get('is_previewing')))
+
+            def _on_done(res):
+                if res.get('ok'):
+                    payload = {'status': 'ok', 'job_id': res['job_id'],
+                               'render_id': res['render_id'], 'diff': res['diff']}
+                else:
+                    payload = {'status': 'error', 'job_id': res.get('job_id'),
+                               'message': res.get('error')}
+                if app_state.get('window'):
+                    safe_evaluate_js(
+                        app_state['window'],
+                        f'if(window._visualDiffResult){{window._visualDiffResult({json.dumps(payload)})}}'
+                    )
+
+            job_id = visual_diff.submit(
+                video_path, scene_file, baseline_id=baseline_id,
+                sample_every=sample_every, threshold=thr,
+                autopromote=auto, on_done=_on_done)
+            return {'status': 'queued', 'job_id': job_id}
         except Exception as e:
             import traceback
             traceback.print_exc()
             return {'status': 'error', 'message': str(e)}
 
+    def visual_diff_queue_status(self):
+        try:
+            import visual_diff
+            return {'status': 'ok', **visual_diff.queue_status()}
+        except Exception as e:
+            return {'status': 'error', 'message': str(e)}
+
     def visual_diff_list(self, limit=40):
         try:
             import visual_diff
@@ -4333,13 +4392,53 @@ class MyScene(Scene):
             return {'status': 'error', 'message': str(e)}
 
     def visual_diff_thumb(self, render_id, frame_idx):
-        """Return a file:// URL the frontend can use in <img src>."""
+        """Return a file:// URL for the sprite sheet holding the nearest
+        thumb, plus the cell rectangle {x, y, w, h} inside it."""
         try:
             import visual_diff
-            p = visual_diff.get_frame_thumb(render_id, int(frame_idx))
-            if not p:
+            t = visual_diff.get_frame_thumb(render_id, int(frame_idx))
+            if not t:
                 return {'status': 'error', 'message': 'no thumb'}
-            return {'status': 'ok', 'url': 'file:///' + p.replace('\\', '/')}
+            return {'status': 'ok',
+                    'url': 'file:///' + t['sheet'].replace('\\', '/'),
+                    'x': t['x'], 'y': t['y'], 'w': t['w'], 'h': t['h'],
+                    'frame': t['frame']}
+        except Exception as e:
+            return {'status': 'error', 'message': str(e)}
+
+    def visual_diff_sprites(self, render_id):
+        """Return the whole sprite index for a render (sheet URLs + grid) so
+        the A/B scrubber can crop thumbs client-side without a round trip
+        per frame."""
+        try:
+            import visual_diff
+            idx = visual_diff.get_thumb_sprites(render_id)
+            if not idx:
+                return {'status': 'error', 'message': 'no sprites'}
+            idx['sheets'] = ['file:///' + p.replace('\\', '/')
+                             for p in idx['sheets']]
+            return {'status': 'ok', **idx}
+        except Exception as e:
+            return {'status': 'error', 'message': str(e)}
+
+    def visual_diff_frame(self, render_id, frame_idx, width=640):
+        """Decode one exact frame of a render for the A/B scrubber. Returns a
+        JPEG data URL; the frame server caches decoded frames and prefetches
+        in the scrub direction, so successive calls stay cheap."""
+        try:
+            import base64
+            import visual_diff
+            import frame_server
+            video = visual_diff.video_path(render_id)
+            if not video:
+                return {'status': 'error', 'message': 'video no longer available'}
+            f = frame_server.get_frame(video, int(frame_idx), int(width or 0))
+            if not f:
+                return {'status': 'error', 'message': 'frame decode failed'}
+            return {'status': 'ok',
+                    'url': 'data:image/jpeg;base64,' + base64.b64encode(f['jpeg']).decode('ascii'),
+                    'frame': f['frame'], 'width': f['width'],
+                    'height': f['height'], 'cached': f['cached']}
         except Exception as e:
             return {'status': 'error', 'message': str(e)}
 
@@ -4507,36 +4606,29 @@ class MyScene(Scene):
     # F-04 — Inspector
     # ══════════════════════════════════════════════════════════════════
 
-    def _inspector_target_file(self, code=None):
-        """Pick an inspectable file. Prefers the currently open file (so
-        edits persist to the user's source). Falls back to a temp scratch
-        file written from the editor's current code so Inspector still
-        works on unsaved buffers — flagged so the UI can warn that edits
-        are sandboxed."""
+    def _inspector_target_file(self):
+        """The currently open file, if any — edits to it persist to the
+        user's source. Without one, Inspector works on the editor buffer
+        passed in ``code`` (in memory, flagged as a scratch edit so the UI
+        can warn that it isn't saved)."""
         cur = app_state.get('current_file_path')
         if cur and os.path.isfile(cur):
-            return cur, False  # (path, is_scratch)
-        if not code:
-            return None, False
-        scratch = os.path.join(USER_DATA_DIR, 'inspector_scratch.py')
-        try:
-            with open(scratch, 'w', encoding='utf-8') as f:
-                f.write(code)
-            return scratch, True
-        except OSError:
-            return None, False
+            return cur
+        return None
 
     def inspector_resolve(self, object_path, code=None):
         if not feature_enabled('inspector'):
             return {'status': 'skipped', 'reason': 'feature disabled'}
         try:
             import inspector as ins_mod
-            target, is_scratch = self._inspector_target_file(code)
-            if not target:
+            target = self._inspector_target_file()
+            if target:
+                return ins_mod.resolve(target, object_path)
+            if not code:
                 return {'status': 'error',
                         'message': 'no scene file open and no editor code provided'}
-            res = ins_mod.resolve(target, object_path)
-            if is_scratch and res.get('status') == 'ok':
+            res = ins_mod.resolve_source(code, object_path)
+            if res.get('status') == 'ok':
                 res['scratch'] = True
                 res['hint'] = 'Editing a scratch copy — open the file in Manim Studio to persist mutations.'
             return res
@@ -4550,25 +4642,129 @@ class MyScene(Scene):
             return {'status': 'skipped', 'reason': 'feature disabled'}
         try:
             import inspector as ins_mod
-            target, is_scratch = self._inspector_target_file(code)
-            if not target:
+            decimals = int(decimals) if decimals is not None else 2
+            target = self._inspector_target_file()
+            if target:
+                return ins_mod.mutate(target, object_path, kwarg_name,
+                                      new_value, decimals=decimals)
+            if not code:
+                return {'status': 'error',
+                        'message': 'no scene file open and no editor code provided'}
+            res = ins_mod.mutate_source(code, [{
+                'object_path': object_path, 'name': kwarg_name,
+                'value': new_value, 'decimals': decimals}])
+            if res.get('status') != 'ok':
+                return res
+            if res['rejected']:
+                return {'status': 'error', 'message': res['rejected'][0]['reason']}
+            # Return the modified code so the frontend can update the
+            # editor buffer.
+            return {'status': 'ok', 'scratch': True,
+                    'new_literal': next(iter(res['literals'].values()), ''),
+                    'source_excerpt': res['excerpts'].get(object_path.strip(), ''),
+                    'updated_code': res['code']}
+        except Exception as e:
+            return {'status': 'error', 'message': str(e)}
+
+    def inspector_resolve_batch(self, object_paths, code=None):
+        """Resolve many objects at once (e.g. every mobject under the
+        cursor's scene) from one symbol index."""
+        if not feature_enabled('inspector'):
+            return {'status': 'skipped', 'reason': 'feature disabled'}
+        try:
+            import inspector as ins_mod
+            target = self._inspector_target_file()
+            if target:
+                return ins_mod.resolve_batch(object_paths or [], scene_file=target)
+            if not code:
                 return {'status': 'error',
                         'message': 'no scene file open and no editor code provided'}
-            res = ins_mod.mutate(target, object_path, kwarg_name, new_value,
-                                 decimals=int(decimals) if decimals else 2)
-            if is_scratch and res.get('status') == 'ok':
+            return {**ins_mod.resolve_batch(object_paths or [], source=code),
+                    'scratch': True}
+        except Exception as e:
+            return {'status': 'error', 'message': str(e)}
+
+    def inspector_mutate_batch(self, changes, code=None):
+        """Apply many ``{object_path, name, value, decimals}`` changes in
+        one pass — a drag across several sliders is a single write."""
+        if not feature_enabled('inspector'):
+            return {'status': 'skipped', 'reason': 'feature disabled'}
+        try:
+            import inspector as ins_mod
+            target = self._inspector_target_file()
+            if target:
+                return ins_mod.mutate_batch(target, changes or [])
+            if not code:
+                return {'status': 'error',
+                        'message': 'no scene file open and no editor code provided'}
+            res = ins_mod.mutate_source(code, changes or [])
+            if res.get('status') == 'ok':
                 res['scratch'] = True
-                # Also return the modified code so the frontend can update
-                # the editor buffer.
-                try:
-                    with open(target, 'r', encoding='utf-8') as f:
-                        res['updated_code'] = f.read()
-                except OSError:
-                    pass
+                res['updated_code'] = res.pop('code')
             return res
         except Exception as e:
             return {'status': 'error', 'message': str(e)}
 
+    def inspector_live_preview(self, object_path, kwarg_name, new_value,
+                               decimals=2, code=None):
+        """Render one low-res frame of the animation ``object_path`` appears
+        in, with the value applied in memory (nothing is written). Called on
+        every slider ``input``; live_frame debounces, coalesces and cancels
+        stale renders, and the newest frame is pushed to
+        ``window._inspectorLiveFrame``."""
+        if not feature_enabled('inspector'):
+            return {'status': 'skipped', 'reason': 'feature disabled'}
+        opts = app_state['settings'].get('inspector', {})
+        if not opts.get('live_preview', True):
+            return {'status': 'skipped', 'reason': 'live preview disabled'}
+        python = self.get_python_path()
+        if not python:
+            return {'status': 'error', 'message': 'Manim environment not set up'}
+        try:
+            import base64
+            import inspector as ins_mod
+            import live_frame
+            if not code:
+                target = self._inspector_target_file()
+                if not target:
+                    return {'status': 'error',
+                            'message': 'no scene file open and no editor code provided'}
+                with open(target, 'r', encoding='utf-8') as f:
+                    code = f.read()
+            decimals = int(decimals) if decimals is not None else 2
+            res = ins_mod.mutate_source(code, [{
+                'object_path': object_path, 'name': kwarg_name,
+                'value': new_value, 'decimals': decimals}])
+            if res.get('status') != 'ok':
+                return res
+            if res['rejected']:
+                return {'status': 'error', 'message': res['rejected'][0]['reason']}
+
+            def on_frame(frame):
+                if frame.get('status') == 'ok':
+                    try:
+                        with open(frame.pop('path'), 'rb') as f:
+                            frame['url'] = 'data:image/png;base64,' + base64.b64encode(f.read()).decode('ascii')
+                    except OSError as e:
+                        frame = {'status': 'error', 'seq': frame['seq'], 'message': str(e)}
+                safe_evaluate_js(
+                    app_state['window'],
+                    f'if(window._inspectorLiveFrame){{window._inspectorLiveFrame({json.dumps(frame)})}}'
+                )
+
+            live_frame.configure(python, env=get_clean_environment(),
+                                 work_dir=os.path.join(USER_DATA_DIR, 'live_frame'))
+            width, height = opts.get('live_resolution', [480, 270])
+            # Sibling imports resolve against the open file's folder, as in
+            # a normal render.
+            scene_file = self._inspector_target_file()
+            seq = live_frame.request(res['code'], object_path, on_frame=on_frame,
+                                     width=width, height=height,
+                                     scene_dir=os.path.dirname(scene_file) if scene_file else None)
+            return {'status': 'queued', 'seq': seq}
+        except Exception as e:
+            return {'status': 'error', 'message': str(e)}
+
     # ══════════════════════════════════════════════════════════════════
     # F-01 — Timeline
     # ══════════════════════════════════════════════════════════════════
@@ -4613,6 +4809,36 @@ class MyScene(Scene):
             import traceback; traceback.print_exc()
             return {'status': 'error', 'message': str(e)}
 
+    def timeline_measure(self, scene_name=None, code=None, refresh=False):
+        """Measured timeline: run the editor's scene once in the venv with
+        animations skipped and play/wait recorded. Same model shape as
+        timeline_parse; cached per source hash, so repeat calls on an
+        unchanged buffer return immediately."""
+        if not feature_enabled('timeline'):
+            return {'status': 'skipped', 'reason': 'feature disabled'}
+        if not code:
+            cur = app_state.get('current_file_path')
+            if cur and os.path.isfile(cur):
+                try:
+                    with open(cur, 'r', encoding='utf-8') as f:
+                        code = f.read()
+                except OSError:
+                    return {'status': 'error', 'message': f'cannot read {cur}'}
+            else:
+                return {'status': 'error',
+                        'message': 'no editor code and no saved file'}
+        python = self.get_python_path()
+        if not python:
+            return {'status': 'error', 'message': 'Manim environment not set up'}
+        try:
+            import timeline as tl_mod
+            return tl_mod.measure(code, scene_name, python_exe=python,
+                                  env=get_clean_environment(),
+                                  refresh=bool(refresh))
+        except Exception as e:
+            import traceback; traceback.print_exc()
+            return {'status': 'error', 'message': str(e)}
+
     def timeline_apply_edits(self, edits, code=None):
         """Apply retime edits to the editor's current code string and
         return the updated code. The frontend pushes ``updated_code``
@@ -7982,6 +8208,22 @@ def cleanup_on_exit():
     except Exception as e:
         print(f"[CLEANUP] Failed to stop dependency checker cleanly: {e}")
 
+    # Stop the persistent TTS service (no-op if it never started).
+    try:
+        from narration_addon import shutdown_tts_service
+        shutdown_tts_service()
+        print("[CLEANUP] TTS service stopped")
+    except Exception as e:
+        print(f"[CLEANUP] Failed to stop TTS service cleanly: {e}")
+
+    # Stop the live-frame render server (no-op if it never started).
+    try:
+        import live_frame
+        live_frame.shutdown()
+        print("[CLEANUP] Live-frame server stopped")
+    except Exception as e:
+        print(f"[CLEANUP] Failed to stop live-frame server cleanly: {e}")
+
     # Delete preview MP4s that were copied to assets folder during the session.
     # These are temporary preview renders — the user can save them via the
     # Save button (which moves them to a user-chosen location). Any unsaved
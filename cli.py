@@ -5,8 +5,13 @@ Uses the same venv (manim_studio_default) and quality presets as the GUI.
 
 Usage:
   ManimStudio render <file> [options]    Render a Manim scene headlessly
+                                         (--progress json: JSON-lines events)
   ManimStudio validate <file>            Check scene code for syntax errors
-  ManimStudio mcp                        Start MCP server (stdio, for Codex)
+  ManimStudio regress <dir|glob>         Render + visually diff every scene
+  ManimStudio batch <dir|glob>           Render every scene, skipping unchanged ones
+  ManimStudio watch <file> [--scene X]   Re-render changed scenes on every save
+  ManimStudio mcp                        Start MCP server (stdio, for Codex;
+                                         concurrent, cancellable render jobs)
   ManimStudio presets                    List quality presets
 """
 
@@ -18,6 +23,14 @@ import re
 import subprocess
 import argparse
 import ast
+import glob
+import hashlib
+import shutil
+import threading
+import itertools
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from xml.etree import ElementTree as ET
 
 # ── Shared constants (same values as app.py) ──
 USER_DATA_DIR = os.path.join(os.path.expanduser('~'), '.manim_studio')
@@ -88,6 +101,26 @@ def get_clean_environment():
     return env
 
 
+def _kill_process_tree(pid):
+    """Kill manim and its children (ffmpeg, LaTeX) — mirrors app.py."""
+    if os.name == 'nt':
+        try:
+            subprocess.run(['taskkill', '/F', '/T', '/PID', str(pid)],
+                           capture_output=True,
+                           creationflags=subprocess.CREATE_NO_WINDOW)
+        except Exception as e:
+            _log(f"[RENDER] taskkill failed for PID {pid}: {e}")
+    else:
+        import signal
+        try:
+            os.killpg(os.getpgid(pid), signal.SIGKILL)
+        except Exception:
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except Exception:
+                pass
+
+
 def extract_all_scene_classes(code):
     """Return every Scene-subclass class in ``code`` as
     ``[{name, line, parent}]``. AST-first with a regex fallback so
@@ -202,13 +235,197 @@ def _find_output_video(output_dir, fmt='mp4'):
 #  Headless Render
 # ═══════════════════════════════════════════════════════════════
 
+# Lines of manim output kept for error messages; the rest is streamed and
+# dropped so a long render never grows memory.
+_TAIL_LINES = 200
+
+# tqdm bar as printed by ``--progress_bar display``:
+#   "Animation 3: Create(Circle):  45%|####5     | 27/60 [00:01<00:02, 20.1it/s]"
+_PROGRESS_RE = re.compile(
+    r'Animation\s+(\d+)\s*:\s*(.*?):\s*(\d+)%\|.*?\|\s*(\d+)/(\d+)'
+    r'(?:\s*\[[\d:]+<([\d:?]+),\s*([\d.]+)it/s)?')
+_CACHED_RE = re.compile(r'Animation\s+(\d+)\s*:\s*Using cached data')
+_WRITTEN_RE = re.compile(r'Animation\s+(\d+)\s*:\s*Partial movie file written')
+_PLAYED_RE = re.compile(r'Played\s+(\d+)\s+animations')
+
+
+def _clock_seconds(text):
+    """tqdm's "MM:SS" / "H:MM:SS" -> seconds (None for "?")."""
+    try:
+        secs = 0
+        for part in text.split(':'):
+            secs = secs * 60 + int(part)
+        return secs
+    except (ValueError, AttributeError):
+        return None
+
+
+def _parse_progress(line):
+    """Parse one tqdm progress line into
+    ``{animation, desc, percent, done, total, fps, eta_s}`` or None
+    (fps / eta_s are None until tqdm has a rate)."""
+    m = _PROGRESS_RE.search(line)
+    if not m:
+        return None
+    return {'animation': int(m.group(1)), 'desc': m.group(2).strip(),
+            'percent': int(m.group(3)), 'done': int(m.group(4)),
+            'total': int(m.group(5)),
+            'fps': float(m.group(7)) if m.group(7) else None,
+            'eta_s': _clock_seconds(m.group(6)) if m.group(6) else None}
+
+
+class _ProgressEvents:
+    """Turns manim output lines into JSON-lines events for
+    ``render --progress json``. Keeps only counters, so memory stays flat
+    however long the render runs. Progress events are throttled to one per
+    ``interval`` seconds per animation (first and last always pass).
+
+    Events (``event`` key): start, stage, animation, progress, cache_hit,
+    done. Every event carries ``t`` (seconds since start)."""
+
+    def __init__(self, emit, interval=0.2):
+        self.emit = emit
+        self.interval = interval
+        self.started = time.time()
+        self.stage = None
+        self.animation = None
+        self.cache_hits = 0
+        self.animations_done = 0
+        self.played = None
+        self._last_progress = 0.0
+
+    def send(self, event, **fields):
+        self.emit({'event': event, 't': round(time.time() - self.started, 3), **fields})
+
+    def set_stage(self, stage, **fields):
+        if stage != self.stage:
+            self.stage = stage
+            self.send('stage', stage=stage, **fields)
+
+    def feed(self, line):
+        p = _parse_progress(line)
+        if p:
+            self.set_stage('rendering')
+            if p['animation'] != self.animation:
+                self.animation = p['animation']
+                self.send('animation', animation=p['animation'], desc=p['desc'],
+                          frames_total=p['total'])
+            now = time.time()
+            if (p['done'] in (0, p['total'])
+                    or now - self._last_progress >= self.interval):
+                self._last_progress = now
+                self.send('progress', stage='rendering', animation=p['animation'],
+                          frames_done=p['done'], frames_total=p['total'],
+                          percent=p['percent'], fps=p['fps'], eta_s=p['eta_s'],
+                          cache_hits=self.cache_hits)
+            return
+        m = _CACHED_RE.search(line)
+        if m:
+            self.cache_hits += 1
+            self.animations_done += 1
+            self.send('cache_hit', animation=int(m.group(1)), cache_hits=self.cache_hits)
+            return
+        if _WRITTEN_RE.search(line):
+            self.animations_done += 1
+            return
+        if 'Combining to Movie file' in line:
+            self.set_stage('combining')
+            return
+        m = _PLAYED_RE.search(line)
+        if m:
+            self.played = int(m.group(1))
+            return
+        if 'File ready at' in line:
+            self.set_stage('writing')
+
+    def finish(self, result):
+        self.set_stage('done')
+        self.send('done', status=result.get('status'),
+                  output_file=result.get('output_file'),
+                  error=(result.get('error') or None) and result['error'][-1500:],
+                  animations=self.played if self.played is not None else self.animations_done,
+                  cache_hits=self.cache_hits,
+                  duration_s=round(time.time() - self.started, 3))
+
+
+def _run_manim(cmd, cwd, on_line=None, cancel=None, timeout=3600):
+    """Run a manim command, streaming its merged stdout/stderr to
+    ``on_line`` one line at a time (tqdm's carriage-return redraws count as
+    lines). ``cancel`` is a threading.Event; setting it kills the process
+    tree. Returns (returncode, tail, reason) where tail is the last
+    ``_TAIL_LINES`` lines and reason is None, 'cancelled' or 'timeout'."""
+    proc = subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        env=get_clean_environment(),
+        cwd=cwd,
+        start_new_session=(os.name != 'nt'),
+        creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0,
+    )
+    tail = deque(maxlen=_TAIL_LINES)
+
+    def _pump():
+        pending = ''
+        for chunk in iter(lambda: proc.stdout.read1(4096), b''):
+            pending += chunk.decode('utf-8', errors='replace')
+            parts = re.split(r'[\r\n]', pending)
+            pending = parts.pop()
+            for line in parts:
+                if not line.strip():
+                    continue
+                tail.append(line)
+                if on_line:
+                    try:
+                        on_line(line)
+                    except Exception as e:
+                        _log(f"[RENDER] progress callback failed: {e}")
+        if pending.strip():
+            tail.append(pending)
+            if on_line:
+                on_line(pending)
+
+    reader = threading.Thread(target=_pump, daemon=True)
+    reader.start()
+    deadline = time.time() + timeout
+    reason = None
+    cancel = cancel or threading.Event()
+    while proc.poll() is None:
+        if cancel.wait(0.2):
+            reason = 'cancelled'
+        elif time.time() > deadline:
+            reason = 'timeout'
+        if reason:
+            _kill_process_tree(proc.pid)
+            proc.wait()
+            break
+    reader.join(timeout=5)
+    return (None if reason else proc.returncode), '\n'.join(tail), reason
+
+
 def render(code, quality='720p', fps=30, width=None, height=None,
-           format='mp4', scene_name=None, output_dir=None):
+           format='mp4', scene_name=None, output_dir=None,
+           on_progress=None, cancel=None, on_event=None):
     """
     Render a Manim scene headlessly. Returns a result dict:
       {status, output_file, scene_name, resolution, fps, format}
-    or {status: 'error', error: '...'}
+    or {status: 'error', error: '...'} / {status: 'cancelled'}.
+
+    ``on_progress`` receives each parsed progress bar update (see
+    _parse_progress); ``cancel`` is a threading.Event that aborts the render.
+    ``on_event`` receives structured progress events (see _ProgressEvents),
+    ending with a ``done`` event.
     """
+    events = _ProgressEvents(on_event) if on_event else None
+    result = _render(code, quality, fps, width, height, format, scene_name,
+                     output_dir, on_progress, cancel, events)
+    if events:
+        events.finish(result)
+    return result
+
+
+def _render(code, quality, fps, width, height, format, scene_name,
+            output_dir, on_progress, cancel, events):
     # Validate code
     err = validate_code(code)
     if err:
@@ -244,6 +461,10 @@ def render(code, quality='720p', fps=30, width=None, height=None,
         f.write(code)
 
     create_manim_config(output_dir)
+    if events:
+        events.send('start', scene=scene_name, quality=quality, fps=fps,
+                    resolution=f'{final_w}x{final_h}', output_dir=output_dir)
+        events.set_stage('starting')
 
     try:
         cmd = get_manim_cmd()
@@ -263,18 +484,22 @@ def render(code, quality='720p', fps=30, width=None, height=None,
 
         _log(f"[RENDER] {' '.join(cmd)}")
 
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            env=get_clean_environment(),
-            cwd=output_dir,
-            timeout=3600,
-            creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0,
-        )
-
-        if result.returncode != 0:
-            error = (result.stderr or result.stdout or 'Unknown error')[-1500:]
+        def _on_line(line):
+            if events:
+                events.feed(line)
+            if on_progress:
+                event = _parse_progress(line)
+                if event:
+                    on_progress(event)
+
+        returncode, tail, reason = _run_manim(cmd, output_dir, on_line=_on_line,
+                                              cancel=cancel, timeout=3600)
+        if reason == 'cancelled':
+            return {'status': 'cancelled', 'error': 'Render cancelled'}
+        if reason == 'timeout':
+            return {'status': 'error', 'error': 'Render timed out (1 hour limit)'}
+        if returncode != 0:
+            error = (tail or 'Unknown error')[-1500:]
             return {'status': 'error', 'error': error}
 
         video = _find_output_video(output_dir, format)
@@ -291,8 +516,6 @@ def render(code, quality='720p', fps=30, width=None, height=None,
 
     except FileNotFoundError as e:
         return {'status': 'error', 'error': str(e)}
-    except subprocess.TimeoutExpired:
-        return {'status': 'error', 'error': 'Render timed out (1 hour limit)'}
     finally:
         try:
             os.remove(temp_file)
@@ -300,12 +523,531 @@ def render(code, quality='720p', fps=30, width=None, height=None,
             pass
 
 
+# ═══════════════════════════════════════════════════════════════
+#  Visual Regression (headless batch render + diff)
+# ═══════════════════════════════════════════════════════════════
+
+def discover_scene_files(target):
+    """Expand a directory (recursively) or glob pattern into a sorted list
+    of .py files."""
+    if os.path.isdir(target):
+        pattern = os.path.join(target, '**', '*.py')
+    else:
+        pattern = target
+    files = [f for f in glob.glob(pattern, recursive=True)
+             if f.endswith('.py') and os.path.isfile(f)]
+    return sorted(set(os.path.abspath(f) for f in files))
+
+
+def _regress_one(job, quality, fps, threshold, update_baselines, out_root,
+                 sample_every=1):
+    """Render one scene, record its frames and diff against its baseline.
+    Returns a report entry (see regress())."""
+    import visual_diff
+
+    entry = {
+        'file': job['file'],
+        'scene': job['scene'],
+        'status': 'error',
+        'render_id': None,
+        'baseline_id': None,
+        'mean_drift': 0.0,
+        'flagged_count': 0,
+        'flagged_ranges': [],
+        'total_frames': 0,
+        'output_file': None,
+        'timings': {},
+        'error': None,
+    }
+    t0 = time.time()
+    try:
+        with open(job['file'], 'r', encoding='utf-8') as f:
+            code = f.read()
+    except OSError as e:
+        entry['error'] = str(e)
+        return entry
+
+    out_dir = os.path.join(out_root, f"{job['index']:04d}_{job['scene']}")
+    res = render(code, quality=quality, fps=fps, scene_name=job['scene'],
+                 output_dir=out_dir)
+    t1 = time.time()
+    entry['timings']['render_s'] = round(t1 - t0, 3)
+    if res.get('status') != 'success':
+        entry['error'] = res.get('error', 'render failed')
+        entry['timings']['total_s'] = round(t1 - t0, 3)
+        return entry
+    entry['output_file'] = res['output_file']
+
+    key = visual_diff.baseline_key(job['file'], job['scene'], quality, fps)
+    rec = visual_diff.record_render('', res['output_file'], job['file'],
+                                    baseline_key=key, sample_every=sample_every)
+    t2 = time.time()
+    entry['timings']['hash_s'] = round(t2 - t1, 3)
+    if not rec.get('ok'):
+        entry['error'] = rec.get('error', 'hashing failed')
+        entry['timings']['total_s'] = round(t2 - t0, 3)
+        return entry
+    entry['render_id'] = rec['render_id']
+
+    diff = visual_diff.diff_against_baseline(rec['render_id'], threshold=threshold)
+    t3 = time.time()
+    entry['timings']['diff_s'] = round(t3 - t2, 3)
+    entry['timings']['total_s'] = round(t3 - t0, 3)
+    if not diff.get('ok'):
+        entry['error'] = diff.get('error', 'diff failed')
+        return entry
+
+    entry.update({
+        'baseline_id': diff.get('baseline_id'),
+        'mean_drift': diff.get('mean_drift', 0.0),
+        'flagged_count': diff.get('flagged_count', 0),
+        'flagged_ranges': diff.get('flagged_ranges', []),
+        'total_frames': diff.get('total_frames', 0),
+    })
+    if not diff.get('baseline_id'):
+        entry['status'] = 'new'
+        visual_diff.accept(rec['render_id'])
+    elif diff.get('auto_accepted'):
+        entry['status'] = 'pass'
+        visual_diff.accept(rec['render_id'])
+    else:
+        entry['status'] = 'drift'
+        if update_baselines:
+            visual_diff.accept(rec['render_id'])
+        else:
+            visual_diff.block(rec['render_id'])
+    return entry
+
+
+def regress(target, quality='480p', fps=15, jobs=None, threshold=0.01,
+            update_baselines=False, output_dir=None, on_result=None,
+            sample_every=1):
+    """Render every Scene class in every file under ``target`` and diff each
+    against its per-scene baseline (keyed by file, class, quality, fps).
+    Scenes without a baseline are recorded as ``new`` and become the
+    baseline. ``sample_every`` > 1 hashes keyframes at least N frames apart
+    and refines only where the samples drift. Returns a report dict:
+      {status, target, quality, fps, threshold, started_at, duration_s,
+       counts: {pass, drift, new, error}, scenes: [...]}"""
+    started = time.time()
+    scene_jobs = []
+    for path in discover_scene_files(target):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                code = f.read()
+        except OSError:
+            continue
+        for sc in extract_all_scene_classes(code):
+            scene_jobs.append({'index': len(scene_jobs), 'file': path,
+                               'scene': sc['name']})
+
+    if output_dir is None:
+        output_dir = os.path.join(RENDER_DIR, f'regress_{int(started * 1000)}')
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Each job is dominated by its manim subprocess, so a thread per core
+    # keeps every core busy without a process pool.
+    jobs = max(1, jobs or (os.cpu_count() or 2))
+    results = [None] * len(scene_jobs)
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = {
+            pool.submit(_regress_one, job, quality, fps, threshold,
+                        update_baselines, output_dir, sample_every): job
+            for job in scene_jobs
+        }
+        for fut in as_completed(futures):
+            job = futures[fut]
+            try:
+                entry = fut.result()
+            except Exception as e:
+                entry = {'file': job['file'], 'scene': job['scene'],
+                         'status': 'error', 'error': str(e), 'timings': {}}
+            results[job['index']] = entry
+            if on_result:
+                on_result(entry)
+
+    counts = {'pass': 0, 'drift': 0, 'new': 0, 'error': 0}
+    for r in results:
+        counts[r['status']] = counts.get(r['status'], 0) + 1
+    return {
+        'status': 'success' if not (counts['drift'] or counts['error']) else 'failed',
+        'target': target,
+        'quality': quality,
+        'fps': fps,
+        'threshold': threshold,
+        'started_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(started)),
+        'duration_s': round(time.time() - started, 3),
+        'output_dir': output_dir,
+        'counts': counts,
+        'scenes': results,
+    }
+
+
+def regress_report_junit(report):
+    """Render a regress() report as JUnit XML (one testcase per scene)."""
+    counts = report.get('counts', {})
+    suite = ET.Element('testsuite', {
+        'name': 'manim-visual-regression',
+        'tests': str(len(report.get('scenes', []))),
+        'failures': str(counts.get('drift', 0)),
+        'errors': str(counts.get('error', 0)),
+        'time': str(report.get('duration_s', 0)),
+        'timestamp': report.get('started_at', ''),
+    })
+    for r in report.get('scenes', []):
+        case = ET.SubElement(suite, 'testcase', {
+            'classname': os.path.relpath(r['file']) if r.get('file') else '',
+            'name': r.get('scene', ''),
+            'time': str((r.get('timings') or {}).get('total_s', 0)),
+        })
+        if r['status'] == 'drift':
+            ranges = ', '.join(f'{a}-{b}' if a != b else str(a)
+                               for a, b in r.get('flagged_ranges', []))
+            fail = ET.SubElement(case, 'failure', {
+                'message': (f"{r.get('flagged_count', 0)} of {r.get('total_frames', 0)} "
+                            f"frames drifted (mean {r.get('mean_drift', 0):.4f})"),
+                'type': 'VisualDrift',
+            })
+            fail.text = f"flagged frames: {ranges}\nbaseline: {r.get('baseline_id')}\ncandidate: {r.get('render_id')}"
+        elif r['status'] == 'error':
+            err = ET.SubElement(case, 'error', {'message': (r.get('error') or '')[:200]})
+            err.text = r.get('error') or ''
+        elif r['status'] == 'new':
+            ET.SubElement(case, 'system-out').text = f"new baseline: {r.get('render_id')}"
+    return ET.tostring(suite, encoding='unicode')
+
+
+# ═══════════════════════════════════════════════════════════════
+#  Batch Render (incremental, resumable)
+# ═══════════════════════════════════════════════════════════════
+
+BATCH_MANIFEST = 'batch_manifest.json'
+
+
+def batch_source_hash(code, scene, quality, fps, format):
+    """Hash of everything that determines a scene's output. Only the
+    scene's own file is hashed — edits to modules it imports are not
+    seen (use --force)."""
+    h = hashlib.sha256()
+    for part in (code, scene, quality, str(fps), format, APP_VERSION):
+        h.update(part.encode('utf-8'))
+        h.update(b'\0')
+    return h.hexdigest()
+
+
+def _load_manifest(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_manifest(path, manifest):
+    """Atomic write, so an interrupted run never leaves a torn manifest."""
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, path)
+
+
+def batch(target, quality='720p', fps=30, format='mp4', jobs=None,
+          output_dir=None, force=False, on_result=None, cancel=None):
+    """Render every Scene class in every file under ``target``.
+
+    Scenes whose source hash (file contents, scene, quality, fps, format)
+    matches the manifest entry of a previous successful run — and whose
+    video still exists — are skipped. The manifest is rewritten after each
+    scene, so re-running an interrupted batch resumes where it stopped.
+    The default ``output_dir`` is derived from ``target`` for that reason.
+
+    Returns a summary dict:
+      {status, target, output_dir, quality, fps, format, jobs, started_at,
+       duration_s, counts: {rendered, skipped, error, cancelled}, scenes: [...]}"""
+    started = time.time()
+    target_abs = os.path.abspath(target)
+    if output_dir is None:
+        tag = hashlib.sha1(target_abs.encode('utf-8')).hexdigest()[:10]
+        output_dir = os.path.join(RENDER_DIR, f'batch_{tag}')
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, BATCH_MANIFEST)
+    manifest = _load_manifest(manifest_path)
+    manifest_lock = threading.Lock()
+    cancel = cancel or threading.Event()
+
+    scene_jobs = []
+    for path in discover_scene_files(target):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                code = f.read()
+        except OSError:
+            continue
+        rel = os.path.relpath(path, target_abs if os.path.isdir(target_abs) else os.getcwd())
+        for sc in extract_all_scene_classes(code):
+            scene_jobs.append({
+                'index': len(scene_jobs), 'file': path, 'scene': sc['name'],
+                'key': f"{rel}::{sc['name']}", 'code': code,
+                'hash': batch_source_hash(code, sc['name'], quality, fps, format),
+                'out': os.path.join(output_dir, re.sub(r'[^\w.-]+', '_', rel[:-3]), sc['name']),
+            })
+
+    def _one(job):
+        entry = {'file': job['file'], 'scene': job['scene'], 'status': 'error',
+                 'output_file': None, 'source_hash': job['hash'],
+                 'timings': {}, 'error': None}
+        prev = manifest.get(job['key'])
+        if (not force and prev and prev.get('source_hash') == job['hash']
+                and prev.get('output_file') and os.path.isfile(prev['output_file'])):
+            entry.update(status='skipped', output_file=prev['output_file'],
+                         timings=prev.get('timings', {}))
+            return entry
+        if cancel.is_set():
+            entry.update(status='cancelled', error='batch interrupted')
+            return entry
+        shutil.rmtree(job['out'], ignore_errors=True)
+        t0 = time.time()
+        res = render(job['code'], quality=quality, fps=fps, format=format,
+                     scene_name=job['scene'], output_dir=job['out'], cancel=cancel)
+        entry['timings']['render_s'] = round(time.time() - t0, 3)
+        if res.get('status') == 'success':
+            entry.update(status='rendered', output_file=res['output_file'])
+            with manifest_lock:
+                manifest[job['key']] = {
+                    'source_hash': job['hash'], 'output_file': res['output_file'],
+                    'timings': entry['timings'],
+                    'rendered_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                }
+                _write_manifest(manifest_path, manifest)
+        else:
+            entry.update(status='cancelled' if res.get('status') == 'cancelled' else 'error',
+                         error=res.get('error'))
+        return entry
+
+    # As in regress(): each job is one manim subprocess, so N threads keep
+    # N render processes busy.
+    jobs = max(1, jobs or (os.cpu_count() or 2))
+    results = [None] * len(scene_jobs)
+    pool = ThreadPoolExecutor(max_workers=jobs)
+    futures = {}
+    try:
+        futures = {pool.submit(_one, job): job for job in scene_jobs}
+        for fut in as_completed(futures):
+            job = futures[fut]
+            try:
+                entry = fut.result()
+            except Exception as e:
+                entry = {'file': job['file'], 'scene': job['scene'], 'status': 'error',
+                         'output_file': None, 'source_hash': job['hash'],
+                         'timings': {}, 'error': str(e)}
+            results[job['index']] = entry
+            if on_result:
+                on_result(entry)
+    except KeyboardInterrupt:
+        # Kill running renders; finished scenes are already in the manifest.
+        cancel.set()
+        for fut in futures:
+            fut.cancel()
+        for job in scene_jobs:
+            if results[job['index']] is None:
+                results[job['index']] = {'file': job['file'], 'scene': job['scene'],
+                                         'status': 'cancelled', 'output_file': None,
+                                         'source_hash': job['hash'], 'timings': {},
+                                         'error': 'batch interrupted'}
+    finally:
+        pool.shutdown(wait=True)
+
+    counts = {'rendered': 0, 'skipped': 0, 'error': 0, 'cancelled': 0}
+    for r in results:
+        counts[r['status']] = counts.get(r['status'], 0) + 1
+    summary = {
+        'status': 'success' if not (counts['error'] or counts['cancelled']) else 'failed',
+        'target': target,
+        'output_dir': output_dir,
+        'quality': quality,
+        'fps': fps,
+        'format': format,
+        'jobs': jobs,
+        'started_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(started)),
+        'duration_s': round(time.time() - started, 3),
+        'counts': counts,
+        'scenes': results,
+    }
+    _write_manifest(os.path.join(output_dir, 'batch_summary.json'), summary)
+    return summary
+
+
+# ═══════════════════════════════════════════════════════════════
+#  Watch Mode (debounced incremental re-render)
+# ═══════════════════════════════════════════════════════════════
+
+def scene_source_hashes(code):
+    """``{scene_name: hash}`` where each hash covers the scene's own class
+    (with decorators), any Scene base class defined in the same file, and
+    all module-level code outside Scene classes — so editing one scene
+    changes only its hash, while editing imports or helpers changes all."""
+    tree = ast.parse(code)
+    scene_names = {sc['name'] for sc in extract_all_scene_classes(code)}
+    # Subclasses of a scene defined in this file (``class B(A)``) are
+    # scenes too, even without "Scene" in the base name.
+    class_nodes = [n for n in tree.body if isinstance(n, ast.ClassDef)]
+    grew = True
+    while grew:
+        grew = False
+        for node in class_nodes:
+            if node.name not in scene_names and any(
+                    isinstance(b, ast.Name) and b.id in scene_names for b in node.bases):
+                scene_names.add(node.name)
+                grew = True
+    classes, shared = {}, []
+    for node in tree.body:
+        seg = ast.get_source_segment(code, node) or ''
+        if isinstance(node, ast.ClassDef) and node.name in scene_names:
+            decorators = [ast.get_source_segment(code, d) or '' for d in node.decorator_list]
+            classes[node.name] = (node, '\n'.join(decorators + [seg]))
+        else:
+            shared.append(seg)
+    shared_hash = hashlib.sha256('\n'.join(shared).encode('utf-8')).hexdigest()
+
+    def _segments(name, seen):
+        node, seg = classes[name]
+        out = [seg]
+        for base in node.bases:
+            base_name = base.id if isinstance(base, ast.Name) else None
+            if base_name in classes and base_name not in seen:
+                seen.add(base_name)
+                out.extend(_segments(base_name, seen))
+        return out
+
+    return {name: hashlib.sha256(
+                ('\0'.join([shared_hash] + _segments(name, {name}))).encode('utf-8')
+            ).hexdigest()
+            for name in classes}
+
+
+def watch(path, scenes=None, quality='480p', fps=15, format='mp4',
+          output_dir=None, debounce=0.3, poll=0.25, on_result=None, stop=None):
+    """Re-render ``path`` on every save until interrupted (or ``stop`` is
+    set).
+
+    - Saves are debounced: a render starts once the file has been quiet
+      for ``debounce`` seconds.
+    - Only scenes whose source hash (scene_source_hashes) differs from
+      their last successful render are rendered; ``scenes`` limits the
+      watch to those names.
+    - A newer save cancels the in-flight render; cancelled scenes are
+      picked up again on the next pass.
+    - Every scene keeps one output directory for the whole session, so
+      manim's partial-movie cache is reused and unchanged animations are
+      not re-encoded.
+
+    ``on_result`` receives one dict per finished scene render."""
+    path = os.path.abspath(path)
+    if output_dir is None:
+        tag = hashlib.sha1(path.encode('utf-8')).hexdigest()[:10]
+        output_dir = os.path.join(RENDER_DIR, f'watch_{tag}')
+    os.makedirs(output_dir, exist_ok=True)
+    stop = stop or threading.Event()
+    rendered = {}           # scene -> hash of the last successful render
+    current = {'thread': None, 'cancel': None}
+
+    def _stat():
+        try:
+            st = os.stat(path)
+            return (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    def _render_pass(code, todo, cancel):
+        for name, digest in todo:
+            if cancel.is_set():
+                return
+            _log(f"[WATCH] rendering {name}")
+            t0 = time.time()
+            res = render(code, quality=quality, fps=fps, format=format,
+                         scene_name=name, output_dir=os.path.join(output_dir, name),
+                         cancel=cancel)
+            if res.get('status') == 'cancelled':
+                _log(f"[WATCH] {name} cancelled by a newer save")
+                return
+            res['render_s'] = round(time.time() - t0, 3)
+            if res.get('status') == 'success':
+                rendered[name] = digest
+            _log(f"[WATCH] {name} {res.get('status')} in {res['render_s']:.1f}s")
+            if on_result:
+                on_result(res)
+
+    def _start(code):
+        try:
+            hashes = scene_source_hashes(code)
+        except SyntaxError as e:
+            _log(f"[WATCH] syntax error, waiting for the next save: line {e.lineno}: {e.msg}")
+            return
+        wanted = [n for n in hashes if not scenes or n in scenes]
+        if scenes:
+            for missing in set(scenes) - set(hashes):
+                _log(f"[WATCH] scene {missing} not found in {os.path.basename(path)}")
+        todo = [(n, hashes[n]) for n in wanted if rendered.get(n) != hashes[n]]
+        if not todo:
+            _log("[WATCH] no scene changed")
+            return
+        cancel = threading.Event()
+        thread = threading.Thread(target=_render_pass, args=(code, todo, cancel), daemon=True)
+        current.update(thread=thread, cancel=cancel)
+        thread.start()
+
+    def _cancel_inflight():
+        if current['thread'] is not None and current['thread'].is_alive():
+            current['cancel'].set()
+            current['thread'].join()
+
+    _log(f"[WATCH] watching {path} (Ctrl-C to stop)")
+    last = None
+    changed_at = time.time() - debounce     # render once at start
+    try:
+        while not stop.is_set():
+            st = _stat()
+            if st != last:
+                last = st
+                changed_at = time.time()
+                # A newer save supersedes whatever is rendering now.
+                _cancel_inflight()
+            elif changed_at is not None and time.time() - changed_at >= debounce:
+                changed_at = None
+                if st is not None:
+                    try:
+                        with open(path, 'r', encoding='utf-8') as f:
+                            code = f.read()
+                    except OSError as e:
+                        _log(f"[WATCH] cannot read {path}: {e}")
+                    else:
+                        _start(code)
+            stop.wait(poll)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        _cancel_inflight()
+        _log("[WATCH] stopped")
+
+
 # ═══════════════════════════════════════════════════════════════
 #  MCP Server (stdio, Content-Length framing — MCP 2024-11-05)
 # ═══════════════════════════════════════════════════════════════
 
 class MCPServer:
-    """Minimal MCP server over stdio for Codex integration."""
+    """MCP server over stdio for Codex integration.
+
+    The main thread only reads and routes messages. Renders run as jobs on
+    a bounded worker pool, so ``ping``, validation and status checks are
+    answered while renders are in flight. Every render gets a job id in
+    the job table, streams ``notifications/progress`` when the request
+    carries a ``progressToken``, and stops on ``notifications/cancelled``
+    or the ``cancel_render`` tool."""
+
+    # Finished jobs kept for check_render_status.
+    MAX_FINISHED_JOBS = 200
+    # Minimum seconds between progress notifications per job.
+    PROGRESS_INTERVAL = 0.25
 
     TOOLS = {
         'render_manim_animation': {
@@ -349,18 +1091,31 @@ class MCPServer:
                         'type': 'string',
                         'description': 'Scene class name (auto-detected if omitted)',
                     },
+                    'wait': {
+                        'type': 'boolean',
+                        'default': True,
+                        'description': (
+                            'Wait for the render to finish (default). With false, '
+                            'return the job_id at once and poll check_render_status.'
+                        ),
+                    },
                 },
                 'required': ['code'],
             },
         },
         'check_render_status': {
             'description': (
-                'Check if a previously started render has completed. '
-                'Pass the output_dir returned by render_manim_animation.'
+                'Check a render job: queued, running (with progress), success, '
+                'error or cancelled. Pass the job_id returned by '
+                'render_manim_animation (output_dir is still accepted).'
             ),
             'inputSchema': {
                 'type': 'object',
                 'properties': {
+                    'job_id': {
+                        'type': 'string',
+                        'description': 'Job id from render_manim_animation',
+                    },
                     'output_dir': {
                         'type': 'string',
                         'description': 'The output directory from a previous render',
@@ -371,7 +1126,19 @@ class MCPServer:
                         'default': 'mp4',
                     },
                 },
-                'required': ['output_dir'],
+            },
+        },
+        'cancel_render': {
+            'description': 'Cancel a queued or running render job.',
+            'inputSchema': {
+                'type': 'object',
+                'properties': {
+                    'job_id': {
+                        'type': 'string',
+                        'description': 'Job id from render_manim_animation',
+                    },
+                },
+                'required': ['job_id'],
             },
         },
         'validate_scene': {
@@ -409,6 +1176,18 @@ class MCPServer:
         },
     }
 
+    def __init__(self, workers=None):
+        # Renders are CPU-heavy subprocesses; half the cores keeps the
+        # machine responsive while still overlapping LaTeX/ffmpeg waits.
+        self.workers = max(1, workers or (os.cpu_count() or 2) // 2)
+        self._pool = ThreadPoolExecutor(max_workers=self.workers,
+                                        thread_name_prefix='mcp-render')
+        self._write_lock = threading.Lock()
+        self._jobs_lock = threading.Lock()
+        self._jobs = {}             # job_id -> job dict (insertion ordered)
+        self._by_request = {}       # JSON-RPC request id -> job_id
+        self._job_seq = itertools.count(1)
+
     # ── stdio framing (Content-Length, like LSP) ──
 
     @staticmethod
@@ -430,15 +1209,16 @@ class MCPServer:
         body = stdin.read(content_length)
         return json.loads(body.decode('utf-8'))
 
-    @staticmethod
-    def _write_message(msg):
-        """Write one Content-Length framed JSON-RPC message to stdout."""
+    def _write_message(self, msg):
+        """Write one Content-Length framed JSON-RPC message to stdout.
+        Workers write concurrently, so frames are serialised."""
         stdout = sys.stdout.buffer
         body = json.dumps(msg).encode('utf-8')
         header = f'Content-Length: {len(body)}\r\n\r\n'.encode('utf-8')
-        stdout.write(header)
-        stdout.write(body)
-        stdout.flush()
+        with self._write_lock:
+            stdout.write(header)
+            stdout.write(body)
+            stdout.flush()
 
     # ── JSON-RPC helpers ──
 
@@ -451,6 +1231,119 @@ class MCPServer:
         return {'jsonrpc': '2.0', 'id': req_id,
                 'error': {'code': code, 'message': message}}
 
+    @staticmethod
+    def _text(req_id, res, is_error=False, indent=None):
+        return {'jsonrpc': '2.0', 'id': req_id, 'result': {
+            'content': [{'type': 'text', 'text': json.dumps(res, indent=indent)}],
+            'isError': is_error,
+        }}
+
+    # ── Job table ──
+
+    @staticmethod
+    def _job_view(job):
+        """Public, JSON-safe view of a job."""
+        view = {k: job[k] for k in ('job_id', 'status', 'scene_name', 'output_dir',
+                                    'created_at', 'started_at', 'finished_at',
+                                    'progress')}
+        if job['result'] is not None:
+            view['result'] = job['result']
+        return view
+
+    def _new_job(self, req_id, args):
+        job_id = f'r{next(self._job_seq)}'
+        job = {
+            'job_id': job_id,
+            'status': 'queued',
+            'scene_name': args.get('scene_name') or extract_scene_name(args.get('code', '')),
+            'output_dir': os.path.join(RENDER_DIR, f'cli_{int(time.time() * 1000)}_{job_id}'),
+            'created_at': time.time(),
+            'started_at': None,
+            'finished_at': None,
+            'progress': None,
+            'result': None,
+            'request_id': req_id,
+            'cancel': threading.Event(),
+            'silent': False,
+        }
+        with self._jobs_lock:
+            self._jobs[job_id] = job
+            if req_id is not None:
+                self._by_request[req_id] = job_id
+            finished = [j for j in self._jobs.values() if j['finished_at']]
+            for old in finished[:max(0, len(finished) - self.MAX_FINISHED_JOBS)]:
+                self._jobs.pop(old['job_id'], None)
+                self._by_request.pop(old['request_id'], None)
+        return job
+
+    def _cancel_job(self, job_id, silent=False):
+        """Stop a job. ``silent`` (client cancelled its own request) means
+        the original call gets no response, as MCP requires."""
+        with self._jobs_lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        if not job['finished_at']:
+            job['silent'] = silent
+            job['cancel'].set()
+        return job
+
+    def _run_job(self, job, args, progress_token, reply):
+        """Worker: render, publish progress, then answer the original call
+        (when ``reply``) with the final result."""
+        if job['cancel'].is_set():
+            res = {'status': 'cancelled', 'error': 'Render cancelled before it started'}
+        else:
+            job['status'] = 'running'
+            job['started_at'] = time.time()
+            last_sent = [0.0]
+
+            def on_progress(event):
+                job['progress'] = event
+                if progress_token is None:
+                    return
+                now = time.time()
+                if now - last_sent[0] < self.PROGRESS_INTERVAL and event['done'] < event['total']:
+                    return
+                last_sent[0] = now
+                # Animation index + fraction of the current one: monotonic
+                # across the render even though the total is unknown.
+                self._write_message({
+                    'jsonrpc': '2.0', 'method': 'notifications/progress',
+                    'params': {
+                        'progressToken': progress_token,
+                        'progress': round(event['animation'] + event['done'] / max(1, event['total']), 3),
+                        'message': f"Animation {event['animation']}: {event['desc']} {event['percent']}%",
+                    },
+                })
+
+            try:
+                res = render(
+                    code=args['code'],
+                    quality=args.get('quality', '720p'),
+                    width=args.get('width'),
+                    height=args.get('height'),
+                    fps=args.get('fps', 30),
+                    format=args.get('format', 'mp4'),
+                    scene_name=args.get('scene_name'),
+                    output_dir=job['output_dir'],
+                    on_progress=on_progress,
+                    cancel=job['cancel'],
+                )
+            except Exception as e:
+                res = {'status': 'error', 'error': str(e)}
+        res['job_id'] = job['job_id']
+        res.setdefault('output_dir', job['output_dir'])
+        job['result'] = res
+        job['status'] = res['status']
+        job['finished_at'] = time.time()
+        with self._jobs_lock:
+            self._by_request.pop(job['request_id'], None)
+        _log(f"[ManimStudio MCP] job {job['job_id']} {res['status']}")
+        if reply and not job.get('silent'):
+            self._write_message(self._text(job['request_id'], res,
+                                           is_error=res['status'] != 'success', indent=2))
+
     # ── Dispatch ──
 
     def handle(self, request):
@@ -468,6 +1361,15 @@ class MCPServer:
         if method == 'notifications/initialized':
             return None  # notification — no response
 
+        if method == 'notifications/cancelled':
+            with self._jobs_lock:
+                job_id = self._by_request.get(params.get('requestId'))
+            if job_id:
+                self._cancel_job(job_id, silent=True)
+                _log(f"[ManimStudio MCP] job {job_id} cancelled by client"
+                     f" ({params.get('reason') or 'no reason'})")
+            return None
+
         if method == 'tools/list':
             tools = [
                 {'name': n, 'description': t['description'],
@@ -490,33 +1392,42 @@ class MCPServer:
 
         try:
             if name == 'render_manim_animation':
-                res = render(
-                    code=args['code'],
-                    quality=args.get('quality', '720p'),
-                    width=args.get('width'),
-                    height=args.get('height'),
-                    fps=args.get('fps', 30),
-                    format=args.get('format', 'mp4'),
-                    scene_name=args.get('scene_name'),
-                )
-                is_err = res['status'] != 'success'
-                text = json.dumps(res, indent=2)
-                return self._result(req_id, {
-                    'content': [{'type': 'text', 'text': text}],
-                    'isError': is_err,
-                })
+                if 'code' not in args:
+                    raise KeyError('code')
+                job = self._new_job(req_id, args)
+                wait = args.get('wait', True) is not False
+                token = (params.get('_meta') or {}).get('progressToken')
+                self._pool.submit(self._run_job, job, args, token, wait)
+                if wait:
+                    return None  # the worker answers when the render ends
+                return self._text(req_id, self._job_view(job))
 
             if name == 'check_render_status':
-                output_dir = args['output_dir']
-                fmt = args.get('format', 'mp4')
-                video = _find_output_video(output_dir, fmt)
-                if video:
-                    res = {'status': 'complete', 'output_file': video}
-                else:
-                    res = {'status': 'pending'}
-                return self._result(req_id, {
-                    'content': [{'type': 'text', 'text': json.dumps(res)}],
-                })
+                job_id = args.get('job_id')
+                output_dir = args.get('output_dir')
+                with self._jobs_lock:
+                    job = self._jobs.get(job_id) if job_id else next(
+                        (j for j in self._jobs.values() if j['output_dir'] == output_dir), None)
+                if job is not None:
+                    return self._text(req_id, self._job_view(job))
+                if job_id or not output_dir:
+                    return self._text(req_id, {'status': 'unknown', 'job_id': job_id},
+                                      is_error=True)
+                # Renders started by an earlier server process.
+                video = _find_output_video(output_dir, args.get('format', 'mp4')) \
+                    if os.path.isdir(output_dir) else None
+                res = ({'status': 'complete', 'output_file': video} if video
+                       else {'status': 'pending'})
+                return self._text(req_id, res)
+
+            if name == 'cancel_render':
+                job = self._cancel_job(args['job_id'])
+                if job is None:
+                    return self._text(req_id, {'status': 'unknown', 'job_id': args['job_id']},
+                                      is_error=True)
+                return self._text(req_id, {'job_id': job['job_id'],
+                                           'status': job['status'],
+                                           'cancel_requested': not job['finished_at']})
 
             if name == 'validate_scene':
                 err = validate_code(args['code'])
@@ -559,8 +1470,10 @@ class MCPServer:
             })
 
     def run(self):
-        """Main loop — read stdin, dispatch, write stdout."""
-        _log('[ManimStudio MCP] Server started (stdio, Content-Length framing)')
+        """Main loop — read stdin, route, write stdout. Renders are handed
+        to the worker pool and answer on their own."""
+        _log(f'[ManimStudio MCP] Server started (stdio, Content-Length framing, '
+             f'{self.workers} render workers)')
         while True:
             msg = self._read_message()
             if msg is None:
@@ -568,6 +1481,12 @@ class MCPServer:
             resp = self.handle(msg)
             if resp is not None:
                 self._write_message(resp)
+        # stdin closed: nobody is left to read results.
+        with self._jobs_lock:
+            jobs = list(self._jobs.values())
+        for job in jobs:
+            job['cancel'].set()
+        self._pool.shutdown(wait=True)
         _log('[ManimStudio MCP] Server stopped')
 
 
@@ -576,7 +1495,8 @@ class MCPServer:
 # ═══════════════════════════════════════════════════════════════
 
 def cli_main(argv=None):
-    """Parse args and dispatch to render / validate / mcp / presets."""
+    """Parse args and dispatch to render / validate / regress / batch /
+    watch / mcp / presets."""
     parser = argparse.ArgumentParser(
         prog='ManimStudio',
         description='Manim Studio — Animation IDE with CLI & MCP support',
@@ -599,11 +1519,67 @@ def cli_main(argv=None):
     rp.add_argument('--scene', '-s',
                      help='Scene class name (auto-detected if omitted)')
     rp.add_argument('--output-dir', '-o', help='Output directory')
+    rp.add_argument('--progress', choices=['none', 'json'], default='none',
+                     help='json: stream JSON-lines progress events on stdout '
+                          '(the last line is the result)')
 
     # ── validate ──
     vp = sub.add_parser('validate', help='Validate scene code for errors')
     vp.add_argument('file', help='Path to .py file')
 
+    # ── regress ──
+    gp = sub.add_parser('regress',
+                        help='Render and visually diff every scene under a directory or glob')
+    gp.add_argument('target', help='Directory (searched recursively) or glob of .py files')
+    gp.add_argument('--quality', '-q', default='480p',
+                     choices=list(QUALITY_PRESETS.keys()),
+                     help='Quality preset (default: 480p)')
+    gp.add_argument('--fps', type=int, default=15, help='Frames per second (default: 15)')
+    gp.add_argument('--jobs', '-j', type=int,
+                     help='Parallel renders (default: CPU count)')
+    gp.add_argument('--threshold', type=float, default=0.01,
+                     help='Per-frame drift threshold (default: 0.01)')
+    gp.add_argument('--sample-every', type=int, default=1,
+                     help='Hash keyframes at least N frames apart and refine only where drift shows (default: 1)')
+    gp.add_argument('--update-baselines', action='store_true',
+                     help='Promote drifted renders to the new baselines')
+    gp.add_argument('--report', help='Write the JSON report to this path')
+    gp.add_argument('--junit', help='Write a JUnit XML report to this path')
+    gp.add_argument('--output-dir', '-o', help='Directory for rendered videos')
+
+    # ── batch ──
+    bp = sub.add_parser('batch',
+                        help='Render every scene under a directory or glob, skipping unchanged ones')
+    bp.add_argument('target', help='Directory (searched recursively) or glob of .py files')
+    bp.add_argument('--quality', '-q', default='720p',
+                     choices=list(QUALITY_PRESETS.keys()),
+                     help='Quality preset (default: 720p)')
+    bp.add_argument('--fps', type=int, default=30, help='Frames per second')
+    bp.add_argument('--format', '-f', default='mp4',
+                     choices=['mp4', 'gif', 'webm'])
+    bp.add_argument('--jobs', '-j', type=int,
+                     help='Parallel renders (default: CPU count)')
+    bp.add_argument('--force', action='store_true',
+                     help='Re-render every scene, ignoring the manifest')
+    bp.add_argument('--summary', help='Also write the JSON summary to this path')
+    bp.add_argument('--output-dir', '-o',
+                     help='Output directory (reuse it to resume / skip unchanged scenes)')
+
+    # ── watch ──
+    wp = sub.add_parser('watch', help='Re-render changed scenes on every save')
+    wp.add_argument('file', help='Path to .py file to watch')
+    wp.add_argument('--scene', '-s', action='append',
+                     help='Scene class to render (repeatable; default: all)')
+    wp.add_argument('--quality', '-q', default='480p',
+                     choices=list(QUALITY_PRESETS.keys()),
+                     help='Quality preset (default: 480p)')
+    wp.add_argument('--fps', type=int, default=15, help='Frames per second (default: 15)')
+    wp.add_argument('--format', '-f', default='mp4',
+                     choices=['mp4', 'gif', 'webm'])
+    wp.add_argument('--debounce', type=float, default=0.3,
+                     help='Seconds of quiet after a save before rendering (default: 0.3)')
+    wp.add_argument('--output-dir', '-o', help='Output directory')
+
     # ── mcp ──
     sub.add_parser('mcp', help='Start MCP server for Codex (stdio)')
 
@@ -615,6 +1591,11 @@ def cli_main(argv=None):
     if args.command == 'render':
         with open(args.file, 'r', encoding='utf-8') as f:
             code = f.read()
+        json_progress = args.progress == 'json'
+
+        def _emit(event):
+            sys.stdout.write(json.dumps(event) + '\n')
+            sys.stdout.flush()
         result = render(
             code=code,
             quality=args.quality,
@@ -624,8 +1605,12 @@ def cli_main(argv=None):
             format=args.format,
             scene_name=args.scene,
             output_dir=args.output_dir,
+            on_event=_emit if json_progress else None,
         )
-        print(json.dumps(result, indent=2))
+        if json_progress:
+            _emit({'event': 'result', **result})
+        else:
+            print(json.dumps(result, indent=2))
         sys.exit(0 if result['status'] == 'success' else 1)
 
     elif args.command == 'validate':
@@ -637,6 +1622,63 @@ def cli_main(argv=None):
         print(json.dumps(result, indent=2))
         sys.exit(0 if err is None else 1)
 
+    elif args.command == 'regress':
+        def _progress(entry):
+            _log(f"[REGRESS] {entry['status'].upper():5s} {entry.get('scene')} "
+                 f"({os.path.basename(entry.get('file') or '')}) "
+                 f"{(entry.get('timings') or {}).get('total_s', 0):.1f}s")
+        report = regress(
+            args.target,
+            quality=args.quality,
+            fps=args.fps,
+            jobs=args.jobs,
+            threshold=args.threshold,
+            update_baselines=args.update_baselines,
+            output_dir=args.output_dir,
+            on_result=_progress,
+            sample_every=args.sample_every,
+        )
+        if args.report:
+            with open(args.report, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+        if args.junit:
+            with open(args.junit, 'w', encoding='utf-8') as f:
+                f.write(regress_report_junit(report))
+        print(json.dumps(report, indent=2))
+        sys.exit(0 if report['status'] == 'success' else 1)
+
+    elif args.command == 'batch':
+        def _batch_progress(entry):
+            _log(f"[BATCH] {entry['status'].upper():9s} {entry.get('scene')} "
+                 f"({os.path.basename(entry.get('file') or '')}) "
+                 f"{(entry.get('timings') or {}).get('render_s', 0):.1f}s")
+        summary = batch(
+            args.target,
+            quality=args.quality,
+            fps=args.fps,
+            format=args.format,
+            jobs=args.jobs,
+            output_dir=args.output_dir,
+            force=args.force,
+            on_result=_batch_progress,
+        )
+        if args.summary:
+            with open(args.summary, 'w', encoding='utf-8') as f:
+                json.dump(summary, f, indent=2)
+        print(json.dumps(summary, indent=2))
+        sys.exit(0 if summary['status'] == 'success' else 1)
+
+    elif args.command == 'watch':
+        if not os.path.isfile(args.file):
+            print(json.dumps({'status': 'error', 'error': f'not a file: {args.file}'}))
+            sys.exit(1)
+
+        def _emit(res):
+            print(json.dumps(res), flush=True)
+        watch(args.file, scenes=args.scene, quality=args.quality, fps=args.fps,
+              format=args.format, output_dir=args.output_dir,
+              debounce=args.debounce, on_result=_emit)
+
     elif args.command == 'mcp':
         MCPServer().run()
 
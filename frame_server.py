@@ -0,0 +1,420 @@
+"""Frame Server (F-03)
+=====================
+
+Random-access, frame-accurate decoding for the A/B diff scrubber.
+
+The sprite sheets written by ``visual_diff`` only hold ~60 thumbnails per
+render, which is enough to navigate but not to inspect a single flagged
+frame. This module serves exact frames on demand:
+
+- **Seek index.** The first request for a video probes its keyframe
+  positions (PyAV demux, else ``ffprobe -skip_frame nokey``) once. The
+  index is cached in memory and under ``~/.manim_studio/frame_index/``
+  keyed by path + mtime + size, so reopening a render does not re-probe.
+- **Open decoders.** Each video keeps a ``cv2.VideoCapture`` open with its
+  current position. A request ahead of the position within the same GOP
+  reads forward; anything else seeks to the nearest keyframe at or before
+  the target and decodes forward from there. Every frame decoded on the
+  way is cached, so neighbours come for free.
+- **LRU.** Decoded frames (scaled to the requested width) live in one
+  byte-bounded LRU shared by all videos.
+- **Prefetch.** The scrub direction is inferred from successive requests
+  for the same video; a background thread then decodes the next few
+  frames in that direction. A new foreground request supersedes it.
+
+Public surface:
+
+    get_frame(video_path, frame_idx, width=640) -> dict or None
+        {frame, width, height, jpeg: bytes, cached}
+    video_info(video_path) -> {fps, frame_count, width, height, keyframes}
+    cache_status() -> dict
+    release(video_path=None)   # close decoders (all when None)
+
+Requires OpenCV; without it ``get_frame`` returns None and the scrubber
+keeps using sprite thumbnails.
+"""
+
+from __future__ import annotations
+
+import bisect
+import collections
+import hashlib
+import json
+import os
+import subprocess
+import threading
+from typing import Optional
+
+
+_CACHE_BYTES = 192 * 1024 * 1024   # Budget for decoded frames across videos.
+_MAX_SOURCES = 4        # Open decoders kept (the scrubber needs two).
+_PREFETCH = 8           # Frames decoded ahead in the scrub direction.
+_READ_AHEAD_MAX = 48    # Read forward instead of seeking when no index.
+_JPEG_QUALITY = 88
+
+# (abs path, frame, width) -> (ndarray, nbytes), most recently used last.
+_FRAMES: collections.OrderedDict = collections.OrderedDict()
+_CACHE = {'bytes': 0, 'hits': 0, 'misses': 0}
+_CACHE_LOCK = threading.Lock()
+
+# abs path -> _Source, most recently used last.
+_SOURCES: collections.OrderedDict = collections.OrderedDict()
+_SOURCES_LOCK = threading.Lock()
+
+
+def _index_dir() -> str:
+    d = os.path.join(os.path.expanduser('~'), '.manim_studio', 'frame_index')
+    os.makedirs(d, exist_ok=True)
+    return d
+
+
+def _stamp(path: str):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+# ---------- Seek index ----------
+
+def _probe_keyframes_av(path: str, fps: float) -> Optional[list]:
+    try:
+        import av
+    except ImportError:
+        return None
+    try:
+        with av.open(path) as container:
+            stream = container.streams.video[0]
+            base = stream.start_time or 0
+            tb = float(stream.time_base)
+            keys = []
+            for packet in container.demux(stream):
+                if packet.is_keyframe and packet.pts is not None:
+                    keys.append(int(round((packet.pts - base) * tb * fps)))
+        return sorted(set(keys))
+    except Exception as e:
+        print(f"[FRAME SERVER] PyAV probe failed: {e}")
+        return None
+
+
+def _probe_keyframes_ffprobe(path: str, fps: float) -> Optional[list]:
+    cmd = ['ffprobe', '-v', 'error', '-select_streams', 'v:0',
+           '-skip_frame', 'nokey', '-show_entries', 'frame=pts_time',
+           '-of', 'csv=p=0', path]
+    try:
+        result = subprocess.run(
+            cmd, capture_output=True, text=True, timeout=30,
+            creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0)
+    except Exception:
+        return None
+    if result.returncode != 0:
+        return None
+    keys = []
+    for line in result.stdout.splitlines():
+        line = line.strip().rstrip(',')
+        try:
+            keys.append(int(round(float(line) * fps)))
+        except ValueError:
+            continue
+    return sorted(set(keys)) or None
+
+
+def _build_index(path: str) -> Optional[dict]:
+    try:
+        import cv2
+    except ImportError:
+        return None
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        return None
+    try:
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        info = {
+            'fps': fps,
+            'frame_count': int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0),
+            'width': int(cap.get(cv2.CAP_PROP_FRAME_WIDTH) or 0),
+            'height': int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT) or 0),
+        }
+    finally:
+        cap.release()
+    # None = unknown keyframe layout; seeks then go through cv2 directly.
+    info['keyframes'] = (_probe_keyframes_av(path, fps)
+                         or _probe_keyframes_ffprobe(path, fps))
+    return info
+
+
+def _load_index(path: str, stamp) -> Optional[dict]:
+    key = hashlib.sha1(f'{path}|{stamp[0]}|{stamp[1]}'.encode('utf-8')).hexdigest()
+    cache_file = os.path.join(_index_dir(), key + '.json')
+    try:
+        with open(cache_file, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        pass
+    info = _build_index(path)
+    if info:
+        try:
+            with open(cache_file, 'w') as f:
+                json.dump(info, f)
+        except OSError:
+            pass
+    return info
+
+
+# ---------- Decoders ----------
+
+class _Source:
+    """One open decoder. ``lock`` serialises access to ``cap``; prefetch
+    checks ``generation`` between frames and stops as soon as a foreground
+    request has arrived."""
+
+    def __init__(self, path: str, stamp, info: dict):
+        self.path = path
+        self.stamp = stamp
+        self.info = info
+        self.cap = None
+        self.pos = 0            # index of the frame the next read returns
+        self.last = None        # last foreground frame (for direction)
+        self.generation = 0
+        self.lock = threading.Lock()
+
+    def close(self) -> None:
+        with self.lock:
+            if self.cap is not None:
+                self.cap.release()
+                self.cap = None
+
+    def _open(self):
+        if self.cap is None:
+            import cv2
+            self.cap = cv2.VideoCapture(self.path)
+            self.pos = 0
+            if not self.cap.isOpened():
+                self.cap = None
+        return self.cap
+
+    def _keyframe_at_or_before(self, frame: int) -> Optional[int]:
+        keys = self.info.get('keyframes')
+        if not keys:
+            return None
+        pos = bisect.bisect_right(keys, frame) - 1
+        return keys[pos] if pos >= 0 else 0
+
+    def _should_read_forward(self, frame: int) -> bool:
+        if frame < self.pos:
+            return False
+        key = self._keyframe_at_or_before(frame)
+        if key is None:
+            return frame - self.pos <= _READ_AHEAD_MAX
+        # Another keyframe between here and the target means a seek is
+        # cheaper than decoding the rest of the current GOP.
+        return key <= self.pos
+
+    def decode(self, start: int, end: int, width: int, gen: Optional[int] = None):
+        """Decode frames ``start..end`` inclusive into the cache. Caller
+        holds ``lock``. Returns the array for ``end`` (or None). With
+        ``gen`` set, stops early once a newer request exists."""
+        import cv2
+        cap = self._open()
+        if cap is None:
+            return None
+        if not self._should_read_forward(start):
+            key = self._keyframe_at_or_before(start)
+            target = start if key is None else key
+            cap.set(cv2.CAP_PROP_POS_FRAMES, target)
+            self.pos = target
+        out = None
+        while self.pos <= end:
+            if gen is not None and gen != self.generation:
+                return None
+            ok, img = cap.read()
+            if not ok:
+                break
+            idx = self.pos
+            self.pos += 1
+            if idx < start and _cached(self.path, idx, width):
+                continue
+            out = _scale(img, width)
+            _put(self.path, idx, width, out)
+        return out if self.pos > end else None
+
+
+def _source(path: str) -> Optional[_Source]:
+    stamp = _stamp(path)
+    if stamp is None:
+        return None
+    with _SOURCES_LOCK:
+        src = _SOURCES.get(path)
+        if src is not None and src.stamp == stamp:
+            _SOURCES.move_to_end(path)
+            return src
+    # Indexing a cold video can take seconds (ffprobe/PyAV); do it without
+    # the lock so other sources keep serving frames meanwhile.
+    info = _load_index(path, stamp)
+    with _SOURCES_LOCK:
+        src = _SOURCES.pop(path, None)
+        if src is not None and src.stamp == stamp:
+            # Another request indexed it while we were probing.
+            _SOURCES[path] = src
+            return src
+        if src is not None:
+            src.close()
+            _drop_video(path)
+        if not info:
+            return None
+        src = _Source(path, stamp, info)
+        _SOURCES[path] = src
+        while len(_SOURCES) > _MAX_SOURCES:
+            _SOURCES.popitem(last=False)[1].close()
+    return src
+
+
+# ---------- Frame cache ----------
+
+def _scale(img, width: int):
+    import cv2
+    h, w = img.shape[:2]
+    if width and w > width:
+        img = cv2.resize(img, (width, max(1, int(h * width / w))),
+                         interpolation=cv2.INTER_AREA)
+    return img
+
+
+def _cached(path: str, frame: int, width: int) -> bool:
+    with _CACHE_LOCK:
+        return (path, frame, width) in _FRAMES
+
+
+def _get(path: str, frame: int, width: int):
+    key = (path, frame, width)
+    with _CACHE_LOCK:
+        hit = _FRAMES.pop(key, None)
+        if hit is None:
+            return None
+        _FRAMES[key] = hit
+        return hit[0]
+
+
+def _put(path: str, frame: int, width: int, img) -> None:
+    key = (path, frame, width)
+    size = int(img.nbytes)
+    with _CACHE_LOCK:
+        old = _FRAMES.pop(key, None)
+        if old is not None:
+            _CACHE['bytes'] -= old[1]
+        _FRAMES[key] = (img, size)
+        _CACHE['bytes'] += size
+        while _CACHE['bytes'] > _CACHE_BYTES and len(_FRAMES) > 1:
+            _, (_, victim) = _FRAMES.popitem(last=False)
+            _CACHE['bytes'] -= victim
+
+
+def _drop_video(path: str) -> None:
+    with _CACHE_LOCK:
+        for key in [k for k in _FRAMES if k[0] == path]:
+            _CACHE['bytes'] -= _FRAMES.pop(key)[1]
+
+
+# ---------- Prefetch ----------
+
+def _prefetch(src: _Source, frame: int, direction: int, width: int, gen: int) -> None:
+    total = src.info.get('frame_count') or 0
+    if direction > 0:
+        start, end = frame + 1, frame + _PREFETCH
+        if total:
+            end = min(end, total - 1)
+    else:
+        start, end = max(0, frame - _PREFETCH), frame - 1
+    # Start after frames that are already cached, so a window overlapping
+    # the decoder's position keeps reading forward instead of re-seeking.
+    while start <= end and _cached(src.path, start, width):
+        start += 1
+    if start > end:
+        return
+    with src.lock:
+        if gen != src.generation:
+            return
+        try:
+            src.decode(start, end, width, gen=gen)
+        except Exception as e:
+            print(f"[FRAME SERVER] prefetch failed: {e}")
+
+
+# ---------- Public API ----------
+
+def video_info(video_path: str) -> Optional[dict]:
+    """Seek index for a video: {fps, frame_count, width, height, keyframes}.
+    ``keyframes`` is None when neither PyAV nor ffprobe is available."""
+    src = _source(os.path.abspath(video_path))
+    return dict(src.info) if src else None
+
+
+def get_frame(video_path: str, frame_idx: int, width: int = 640) -> Optional[dict]:
+    """Decode exactly ``frame_idx`` of ``video_path`` scaled to at most
+    ``width`` pixels wide. Returns {frame, width, height, jpeg, cached} or
+    None if the frame cannot be decoded."""
+    try:
+        import cv2
+    except ImportError:
+        return None
+    path = os.path.abspath(video_path)
+    src = _source(path)
+    if src is None:
+        return None
+    frame_idx = max(0, int(frame_idx))
+    width = int(width or 0)
+
+    src.generation += 1
+    gen = src.generation
+    direction = 0
+    if src.last is not None and frame_idx != src.last:
+        direction = 1 if frame_idx > src.last else -1
+    src.last = frame_idx
+
+    img = _get(path, frame_idx, width)
+    cached = img is not None
+    with _CACHE_LOCK:
+        _CACHE['hits' if cached else 'misses'] += 1
+    if img is None:
+        with src.lock:
+            img = src.decode(frame_idx, frame_idx, width)
+    if img is None:
+        return None
+
+    if direction:
+        threading.Thread(target=_prefetch,
+                         args=(src, frame_idx, direction, width, gen),
+                         daemon=True).start()
+
+    ok, buf = cv2.imencode('.jpg', img, [cv2.IMWRITE_JPEG_QUALITY, _JPEG_QUALITY])
+    if not ok:
+        return None
+    h, w = img.shape[:2]
+    return {'frame': frame_idx, 'width': w, 'height': h,
+            'jpeg': buf.tobytes(), 'cached': cached}
+
+
+def cache_status() -> dict:
+    with _CACHE_LOCK:
+        stats = {'frames': len(_FRAMES), 'bytes': _CACHE['bytes'],
+                 'budget': _CACHE_BYTES, 'hits': _CACHE['hits'],
+                 'misses': _CACHE['misses']}
+    with _SOURCES_LOCK:
+        stats['open'] = list(_SOURCES)
+    return stats
+
+
+def release(video_path: Optional[str] = None) -> None:
+    """Close open decoders and drop their cached frames — for one video,
+    or all of them when ``video_path`` is None."""
+    with _SOURCES_LOCK:
+        if video_path is None:
+            paths = list(_SOURCES)
+        else:
+            paths = [os.path.abspath(video_path)]
+        for path in paths:
+            src = _SOURCES.pop(path, None)
+            if src is not None:
+                src.close()
+            _drop_video(path)
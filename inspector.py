@@ -4,28 +4,38 @@
 - ``resolve(object_path)`` finds the constructor call in the current file
   and returns editable kwargs (``numeric``, ``color``, or ``readonly``).
 - ``mutate(object_path, name, value)`` rewrites the literal in-place,
-  preserving surrounding formatting.
+  preserving surrounding formatting. ``mutate_source(source, changes)``
+  and ``mutate_batch(file, changes)`` apply a whole batch at once.
+- A symbol index per file version / buffer makes lookups dict hits;
+  ``resolve_batch`` answers many objects from one index, and mutations
+  update it by shifting offsets rather than reparsing. A file's index is
+  keyed by its mtime/size, so an edit made while the inspector is open is
+  picked up by the next resolve/mutate.
+- Live preview: while a slider is dragged, ``live_frame`` re-renders one
+  low-res frame of the edited object's animation (see live_frame.py).
 
 We use Python's built-in ``ast`` + ``tokenize`` rather than libcst so the
 feature works without extra deps. Formatting preservation is achieved by
-operating on source-line byte ranges and splicing in the new literal
-without reformatting the rest of the file.
+splicing the new literal over the old one's exact source range (see
+``source_edit.EditBuffer``) without reformatting the rest of the file.
 
 **v1 non-scope (TODO):**
 - Preview instrumentation that emits clickable bounding boxes.
-- Auto-preview after slider release.
 - ValueTracker / expression-based kwarg editing (we currently flag those
   as readonly).
-- Rebind-on-source-change: if the user edits the file while the inspector
-  is open, the next mutate() will re-resolve and may fail.
 """
 
 from __future__ import annotations
 
 import ast
+import bisect
+import hashlib
+import os
 import re
 from typing import Optional
 
+from source_edit import EditBuffer, apply_splices
+
 
 # Manim color constants → hex. Enough to round-trip the common cases.
 _MANIM_COLORS = {
@@ -72,15 +82,6 @@ def _file_source(path: str) -> Optional[str]:
         return None
 
 
-def _source_offset(source: str, lineno: int, col: int) -> int:
-    """Convert 1-based line / 0-based col to a byte offset."""
-    lines = source.splitlines(keepends=True)
-    off = 0
-    for i in range(min(lineno - 1, len(lines))):
-        off += len(lines[i])
-    return off + col
-
-
 def _kwarg_group(name: str) -> str:
     if name in _COLOR_KWARGS: return 'Color'
     if name in _GEOMETRY_KWARGS: return 'Geometry'
@@ -132,62 +133,199 @@ def _build_kwarg_descriptor(keyword: ast.keyword) -> Optional[dict]:
             'value': src, 'readonly_reason': 'expression — not inline-editable'}
 
 
-def resolve(scene_file: str, object_path: str) -> dict:
-    """Find the constructor call that assigns to ``object_path`` (e.g.
-    ``self.c1`` or ``c1``) and return its editable kwargs."""
-    source = _file_source(scene_file)
-    if source is None:
-        return {'status': 'error', 'message': f'cannot read {scene_file}'}
-    try:
-        tree = ast.parse(source)
-    except SyntaxError as e:
-        return {'status': 'error', 'message': f'syntax error: {e}'}
-
-    target_expr = object_path.strip()
-    call_node = None
-    for node in ast.walk(tree):
-        if isinstance(node, ast.Assign):
+# ── Symbol index ─────────────────────────────────────────────────
+#
+# One parse per file version maps every assignment target (``c1``,
+# ``self.c1``) to its constructor call: the call's source span and, per
+# kwarg, the value's span and UI descriptor. Lookups are dict hits. A
+# mutation only swaps literals, so the index is carried over to the new
+# source by shifting spans past each splice instead of reparsing.
+
+_INDEX_MAX = 8          # Indexed file versions / buffers kept.
+_INDEXES: dict = {}     # key -> _SymbolIndex, most recently used last
+
+
+class _SymbolIndex:
+    def __init__(self, source: str, entries: dict, stamp=None):
+        self.source = source
+        self.entries = entries      # object path -> entry dict
+        self.stamp = stamp          # (mtime_ns, size) for file indexes
+
+    @classmethod
+    def build(cls, source: str, stamp=None) -> '_SymbolIndex':
+        """Raises SyntaxError if ``source`` doesn't parse."""
+        buf = EditBuffer(source)
+        entries = {}
+        for node in ast.walk(buf.tree):
+            if not (isinstance(node, ast.Assign) and isinstance(node.value, ast.Call)):
+                continue
+            call = node.value
             for t in node.targets:
+                t_src = _target_path(t)
+                if t_src is None or t_src in entries:
+                    continue
                 try:
-                    t_src = ast.unparse(t).strip()
+                    kind = ast.unparse(call.func)
                 except Exception:
-                    continue
-                if t_src == target_expr:
-                    if isinstance(node.value, ast.Call):
-                        call_node = node.value
-                        break
-        if call_node:
-            break
-
-    if not call_node:
-        return {'status': 'error',
-                'message': f'no constructor call found for `{object_path}`'}
-
-    kwargs = []
-    for kw in call_node.keywords:
-        desc = _build_kwarg_descriptor(kw)
-        if desc:
-            kwargs.append(desc)
+                    kind = 'call'
+                kwargs = {}
+                for kw in call.keywords:
+                    desc = _build_kwarg_descriptor(kw)
+                    if desc:
+                        kwargs[kw.arg] = {'span': buf.span(kw.value), 'desc': desc}
+                entries[t_src] = {
+                    'kind': kind,
+                    'line': call.lineno,
+                    'end_line': getattr(call, 'end_lineno', call.lineno),
+                    'span': buf.span(call),
+                    'kwargs': kwargs,
+                }
+        return cls(source, entries, stamp)
+
+    def excerpt(self, entry: dict) -> str:
+        start, end = entry['span']
+        first = self.source.rfind('\n', 0, start) + 1
+        last = self.source.find('\n', end)
+        return self.source[first:last if last >= 0 else len(self.source)]
+
+    def resolve(self, object_path: str) -> dict:
+        entry = self.entries.get(object_path.strip())
+        if entry is None:
+            return {'status': 'error',
+                    'message': f'no constructor call found for `{object_path}`'}
+        return {
+            'status': 'ok',
+            'object_path': object_path,
+            'kind': entry['kind'],
+            'line': entry['line'],
+            'end_line': entry['end_line'],
+            'kwargs': [dict(k['desc']) for k in entry['kwargs'].values()],
+            'source_excerpt': self.excerpt(entry),
+        }
 
+    def shifted(self, code: str, applied: list) -> '_SymbolIndex':
+        """Index for ``code``, produced from this one by the literal
+        ``applied`` splices [(start, end, text, (path, name))]. Spans after
+        a splice move by its length change; the edited kwargs get fresh
+        descriptors from their new literal."""
+        applied = sorted(applied, key=lambda s: s[0])
+        ends, deltas, total = [], [], 0
+        for start, end, text, _ in applied:
+            total += len(text) - (end - start)
+            ends.append(end)
+            deltas.append(total)
+
+        def shift(pos: int) -> int:
+            i = bisect.bisect_right(ends, pos) - 1
+            return pos + (deltas[i] if i >= 0 else 0)
+
+        new_spans = {}
+        for start, end, text, (path, name) in applied:
+            i = bisect.bisect_right(ends, start) - 1
+            new_start = start + (deltas[i] if i >= 0 else 0)
+            new_spans[(path, name)] = ((new_start, new_start + len(text)), text)
+
+        entries = {}
+        for path, entry in self.entries.items():
+            kwargs = {}
+            for name, kw in entry['kwargs'].items():
+                hit = new_spans.get((path, name))
+                if hit:
+                    span, text = hit
+                    value = ast.parse(text, mode='eval').body
+                    desc = _build_kwarg_descriptor(ast.keyword(arg=name, value=value))
+                    kwargs[name] = {'span': span, 'desc': desc}
+                else:
+                    s, e = kw['span']
+                    kwargs[name] = {'span': (shift(s), shift(e)), 'desc': kw['desc']}
+            s, e = entry['span']
+            entries[path] = dict(entry, span=(shift(s), shift(e)), kwargs=kwargs)
+        return _SymbolIndex(code, entries)
+
+
+def _target_path(node) -> Optional[str]:
+    """``c1`` / ``self.c1`` without ast.unparse for the common shapes."""
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name):
+        return f'{node.value.id}.{node.attr}'
     try:
-        kind = ast.unparse(call_node.func)
+        return ast.unparse(node).strip()
     except Exception:
-        kind = 'call'
+        return None
 
-    excerpt_start = max(0, call_node.lineno - 1)
-    excerpt_end = min(len(source.splitlines()),
-                      getattr(call_node, 'end_lineno', call_node.lineno))
-    excerpt = '\n'.join(source.splitlines()[excerpt_start:excerpt_end])
 
-    return {
-        'status': 'ok',
-        'object_path': object_path,
-        'kind': kind,
-        'line': call_node.lineno,
-        'end_line': getattr(call_node, 'end_lineno', call_node.lineno),
-        'kwargs': kwargs,
-        'source_excerpt': excerpt,
-    }
+def _digest(source: str) -> str:
+    return hashlib.sha1(source.encode('utf-8', 'surrogatepass')).hexdigest()
+
+
+def _remember(key: str, index: _SymbolIndex) -> None:
+    _INDEXES.pop(key, None)
+    _INDEXES[key] = index
+    while len(_INDEXES) > _INDEX_MAX:
+        _INDEXES.pop(next(iter(_INDEXES)))
+
+
+def _index_for_source(source: str) -> _SymbolIndex:
+    """Index for an editor buffer, keyed by content hash. Raises
+    SyntaxError."""
+    key = 'buf:' + _digest(source)
+    index = _INDEXES.get(key)
+    if index is None:
+        index = _SymbolIndex.build(source)
+    _remember(key, index)
+    return index
+
+
+def _index_for_file(path: str) -> _SymbolIndex:
+    """Index for a file, rebuilt only when its mtime/size change. Raises
+    OSError / SyntaxError."""
+    key = 'file:' + os.path.abspath(path)
+    st = os.stat(path)
+    stamp = (st.st_mtime_ns, st.st_size)
+    index = _INDEXES.get(key)
+    if index is None or index.stamp != stamp:
+        with open(path, 'r', encoding='utf-8') as f:
+            index = _SymbolIndex.build(f.read(), stamp)
+    _remember(key, index)
+    return index
+
+
+def _index_error(scene_file: Optional[str] = None, source: Optional[str] = None):
+    """Load the index for a file or buffer: (index, None) or (None, error
+    dict)."""
+    try:
+        if source is not None:
+            return _index_for_source(source), None
+        return _index_for_file(scene_file), None
+    except OSError:
+        return None, {'status': 'error', 'message': f'cannot read {scene_file}'}
+    except SyntaxError as e:
+        return None, {'status': 'error', 'message': f'syntax error: {e}'}
+
+
+def resolve(scene_file: str, object_path: str) -> dict:
+    """Find the constructor call that assigns to ``object_path`` (e.g.
+    ``self.c1`` or ``c1``) and return its editable kwargs."""
+    res = resolve_batch([object_path], scene_file=scene_file)
+    return res['objects'][object_path] if res.get('status') == 'ok' else res
+
+
+def resolve_source(source: str, object_path: str) -> dict:
+    """``resolve`` on an in-memory buffer (no disk I/O)."""
+    res = resolve_batch([object_path], source=source)
+    return res['objects'][object_path] if res.get('status') == 'ok' else res
+
+
+def resolve_batch(object_paths: list, scene_file: Optional[str] = None,
+                  source: Optional[str] = None) -> dict:
+    """Resolve many objects against one index (a file, or a buffer when
+    ``source`` is given). Returns {status, objects: {path: resolve()}}."""
+    index, err = _index_error(scene_file, source)
+    if err:
+        return err
+    return {'status': 'ok',
+            'objects': {p: index.resolve(p) for p in object_paths or []}}
 
 
 def _fmt_numeric(value: str, decimals: int) -> str:
@@ -206,80 +344,120 @@ def _hex_to_manim_color(hex_val: str) -> Optional[str]:
     return _COLOR_BY_HEX.get((hex_val or '').upper())
 
 
-def mutate(scene_file: str, object_path: str, kwarg_name: str,
-           new_value, decimals: int = 2) -> dict:
-    """Rewrite the literal for (object_path, kwarg_name) in scene_file.
-    Returns {status, source_excerpt?}."""
-    source = _file_source(scene_file)
-    if source is None:
-        return {'status': 'error', 'message': f'cannot read {scene_file}'}
-    try:
-        tree = ast.parse(source)
-    except SyntaxError as e:
-        return {'status': 'error', 'message': f'syntax error: {e}'}
-
-    target_expr = object_path.strip()
-    keyword_node = None
-    for node in ast.walk(tree):
-        if isinstance(node, ast.Assign):
-            for t in node.targets:
-                try:
-                    t_src = ast.unparse(t).strip()
-                except Exception:
-                    continue
-                if t_src == target_expr and isinstance(node.value, ast.Call):
-                    for kw in node.value.keywords:
-                        if kw.arg == kwarg_name:
-                            keyword_node = kw
-                            break
-            if keyword_node:
-                break
-        if keyword_node:
-            break
-
-    if not keyword_node:
-        return {'status': 'error',
-                'message': f'kwarg `{kwarg_name}` not found on `{object_path}`'}
-
-    # Build the new literal text.
-    value_node = keyword_node.value
-    if isinstance(value_node, ast.Constant) and isinstance(value_node.value, (int, float)):
-        new_literal = _fmt_numeric(new_value, decimals)
-    elif kwarg_name in _COLOR_KWARGS:
+def _new_literal(desc: dict, kwarg_name: str, new_value, decimals: int) -> Optional[str]:
+    if desc['type'] == 'numeric':
+        try:
+            float(new_value)
+        except (TypeError, ValueError):
+            return None
+        return _fmt_numeric(new_value, decimals)
+    if kwarg_name in _COLOR_KWARGS:
         # Prefer a Manim color constant if the hex matches; else a hex string.
         named = _hex_to_manim_color(new_value)
-        new_literal = named if named else f'"{str(new_value).upper()}"'
-    else:
-        return {'status': 'error',
-                'message': 'value-type not editable'}
-
-    # Splice into the source.
-    start_line = value_node.lineno
-    start_col = value_node.col_offset
-    end_line = getattr(value_node, 'end_lineno', start_line)
-    end_col = getattr(value_node, 'end_col_offset', start_col + 1)
-
-    start_off = _source_offset(source, start_line, start_col)
-    end_off = _source_offset(source, end_line, end_col)
+        if named:
+            return named
+        hex_val = str(new_value).strip().upper()
+        return f'"{hex_val}"' if re.match(r'^#[0-9A-F]{6}$', hex_val) else None
+    return None
 
-    new_source = source[:start_off] + new_literal + source[end_off:]
 
-    # Parse-check before writing so we never leave the file broken.
+def _mutate_index(index: _SymbolIndex, changes: list) -> dict:
+    """Splice a batch of literal changes into ``index.source``. Every
+    replacement is a single literal (number, colour name or hex string)
+    standing in for a whole kwarg value; the batch is re-validated with one
+    parse of the result, and the new index is derived by shifting."""
+    splices = {}        # value span -> (start, end, text, tag)
+    rejected = []
+    for change in changes or []:
+        path = str(change.get('object_path', '')).strip()
+        name = change.get('name')
+        entry = index.entries.get(path)
+        kw = entry['kwargs'].get(name) if entry else None
+        if kw is None:
+            rejected.append({'object_path': path, 'name': name,
+                             'reason': f'kwarg `{name}` not found on `{path}`'})
+            continue
+        decimals = change.get('decimals')
+        literal = _new_literal(kw['desc'], name, change.get('value'),
+                               2 if decimals is None else int(decimals))
+        if literal is None:
+            rejected.append({'object_path': path, 'name': name,
+                             'reason': 'value-type not editable'})
+            continue
+        # Same kwarg twice in one batch (a drag): the last value wins.
+        splices[kw['span']] = (kw['span'][0], kw['span'][1], literal, (path, name))
+
+    code, conflicts = apply_splices(index.source, list(splices.values()))
+    skipped = {c['tag'] for c in conflicts}
+    for c in conflicts:
+        rejected.append({'object_path': c['tag'][0], 'name': c['tag'][1],
+                         'reason': c['reason']})
+    applied = [s for s in splices.values() if s[3] not in skipped]
     try:
-        ast.parse(new_source)
+        ast.parse(code)
     except SyntaxError as e:
-        return {'status': 'error',
-                'message': f'refusing to write — result would break syntax: {e}'}
+        return {'status': 'error', 'message': f'result would break syntax: {e}'}
+    new_index = index.shifted(code, applied)
+    excerpts = {}
+    for _, _, _, (path, _) in applied:
+        excerpts[path] = new_index.excerpt(new_index.entries[path])
+    return {'status': 'ok', 'code': code, 'index': new_index,
+            'applied': len(applied), 'rejected': rejected,
+            'literals': {f'{p}.{k}': t for _, _, t, (p, k) in applied},
+            'excerpts': excerpts}
+
+
+def mutate_source(source: str, changes: list) -> dict:
+    """Apply a batch of kwarg changes to an in-memory buffer. Each change is
+    ``{object_path, name, value, decimals?}``. Returns {status, code,
+    applied, rejected, literals, excerpts}; ``excerpts`` maps object_path
+    to its constructor's new source lines. The resulting buffer's index is
+    cached, so the next resolve/mutate on it needs no parse."""
+    index, err = _index_error(source=source)
+    if err:
+        return err
+    res = _mutate_index(index, changes)
+    if res.get('status') != 'ok':
+        return res
+    _remember('buf:' + _digest(res['code']), res.pop('index'))
+    return res
+
+
+def mutate_batch(scene_file: str, changes: list) -> dict:
+    """``mutate_source`` for a file: one read (skipped when the index is
+    current), one write."""
+    index, err = _index_error(scene_file=scene_file)
+    if err:
+        return err
+    res = _mutate_index(index, changes)
+    if res.get('status') != 'ok':
+        return res
+    new_index = res.pop('index')
+    if res['applied']:
+        try:
+            with open(scene_file, 'w', encoding='utf-8') as f:
+                f.write(res['code'])
+            st = os.stat(scene_file)
+        except OSError as e:
+            return {'status': 'error', 'message': str(e)}
+        new_index.stamp = (st.st_mtime_ns, st.st_size)
+        _remember('file:' + os.path.abspath(scene_file), new_index)
+    res.pop('code')
+    return res
 
-    try:
-        with open(scene_file, 'w', encoding='utf-8') as f:
-            f.write(new_source)
-    except OSError as e:
-        return {'status': 'error', 'message': str(e)}
 
+def mutate(scene_file: str, object_path: str, kwarg_name: str,
+           new_value, decimals: int = 2) -> dict:
+    """Rewrite the literal for (object_path, kwarg_name) in scene_file.
+    Returns {status, source_excerpt?}."""
+    res = mutate_batch(scene_file, [{'object_path': object_path, 'name': kwarg_name,
+                                     'value': new_value, 'decimals': decimals}])
+    if res.get('status') != 'ok':
+        return res
+    if res['rejected']:
+        return {'status': 'error', 'message': res['rejected'][0]['reason']}
     return {
         'status': 'ok',
-        'new_literal': new_literal,
-        'source_excerpt': '\n'.join(new_source.splitlines()[
-            max(0, start_line - 1):max(1, end_line)]),
+        'new_literal': res['literals'][f'{object_path.strip()}.{kwarg_name}'],
+        'source_excerpt': res['excerpts'].get(object_path.strip(), ''),
     }
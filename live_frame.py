@@ -0,0 +1,380 @@
+"""Live Frame (F-04)
+===================
+
+Single-frame, low-resolution re-renders while the user drags an
+Inspector value.
+
+Starting manim costs more than a second per process, so instead of one
+``manim -s`` subprocess per value we keep one render server alive inside
+the manim venv. It imports manim once and then, per request, loads the
+mutated scene and renders only the animation the edited object appears
+in (``from_animation_number`` / ``upto_animation_number``, i.e. ``-n k,k``)
+with ``save_last_frame`` at a small resolution.
+
+- **Debounce / coalesce.** ``request()`` only replaces the pending
+  request; a dispatcher thread sends it once no newer value has arrived
+  for ``_DEBOUNCE`` seconds. Intermediate values are never rendered.
+- **Cancel.** The server reads stdin on its own thread. When a newer
+  request arrives it is remembered, and the in-flight render aborts at
+  its next ``Scene.play`` / ``Scene.wait`` so the new one starts at once.
+- **Imports.** ``scene_dir`` (the scene file's folder) is put on
+  ``sys.path`` for the request, as in a normal render, so sibling modules
+  import; they are dropped from ``sys.modules`` afterwards so edits to
+  them show up in the next frame.
+- **Results** for superseded requests are dropped; the latest frame is
+  handed to the ``on_frame`` callback as {status, seq, path, ms}. The
+  PNG is deleted once the callback returns.
+
+Public surface:
+
+    configure(python_exe, env=None, work_dir=None)
+    animation_index(source, object_path, scene_name=None) -> (scene, n)
+    request(source, object_path, scene_name=None, on_frame=None,
+            width=480, height=270, scene_dir=None) -> seq
+    status() -> dict
+    shutdown()
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import subprocess
+import tempfile
+import threading
+import time
+from typing import Callable, Optional
+
+
+_DEBOUNCE = 0.05        # Seconds without a newer value before rendering.
+_FRAME_RATE = 15        # Low fps keeps skipped animations cheap.
+
+_CONFIG = {'python': None, 'env': None, 'work_dir': None}
+_STATE = {
+    'seq': 0,               # last request handed out
+    'sent': 0,              # last request sent to the server
+    'pending': None,        # newest not-yet-sent request
+    'server': None,         # subprocess.Popen
+    'dispatcher': None,
+    'callbacks': {},        # seq -> on_frame
+    'rendered': 0,
+    'cancelled': 0,
+    'last_ms': 0,
+    'last_error': '',
+}
+_COND = threading.Condition()
+
+# Runs inside the venv. One JSON request per stdin line; one JSON result
+# per stdout line (prefixed, since manim may also print).
+_SERVER_SCRIPT = r'''
+import sys, os, json, threading, importlib.util, time, traceback
+
+out = sys.stdout
+sys.stdout = sys.stderr          # keep manim's chatter off the result pipe
+
+def emit(obj):
+    out.write("__LIVE_FRAME__" + json.dumps(obj) + "\n")
+    out.flush()
+
+try:
+    from manim import Scene, tempconfig
+except Exception as e:
+    emit({"id": 0, "ok": False, "fatal": True, "error": "manim import failed: %s" % e})
+    sys.exit(0)
+
+cond = threading.Condition()
+slot = {"req": None, "latest": 0, "eof": False}
+
+def reader():
+    for line in sys.stdin:
+        try:
+            req = json.loads(line)
+        except ValueError:
+            continue
+        with cond:
+            slot["req"] = req
+            slot["latest"] = req["id"]
+            cond.notify()
+    with cond:
+        slot["eof"] = True
+        cond.notify()
+
+threading.Thread(target=reader, daemon=True).start()
+
+class Cancelled(Exception):
+    pass
+
+current = [0]
+_play, _wait = Scene.play, Scene.wait
+
+def play(self, *a, **k):
+    if slot["latest"] != current[0]:
+        raise Cancelled()
+    return _play(self, *a, **k)
+
+def wait(self, *a, **k):
+    if slot["latest"] != current[0]:
+        raise Cancelled()
+    return _wait(self, *a, **k)
+
+Scene.play, Scene.wait = play, wait
+
+while True:
+    with cond:
+        while slot["req"] is None and not slot["eof"]:
+            cond.wait()
+        if slot["req"] is None:
+            break
+        req, slot["req"] = slot["req"], None
+    current[0] = req["id"]
+    t0 = time.time()
+    opts = {
+        "pixel_width": req["width"], "pixel_height": req["height"],
+        "frame_rate": req["fps"], "save_last_frame": True,
+        "write_to_movie": False, "disable_caching": True,
+        "media_dir": req["media_dir"], "verbosity": "ERROR",
+        "progress_bar": "none", "output_file": "live_%d" % req["id"],
+    }
+    if req.get("n") is not None:
+        opts["from_animation_number"] = req["n"]
+        opts["upto_animation_number"] = req["n"]
+    scene_dir = os.path.abspath(req["scene_dir"]) if req.get("scene_dir") else None
+    if scene_dir:
+        sys.path.insert(0, scene_dir)
+    before = set(sys.modules)
+    try:
+        spec = importlib.util.spec_from_file_location("_live_%d" % req["id"], req["path"])
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        with tempconfig(opts):
+            scene = getattr(module, req["scene"])()
+            scene.render()
+            path = getattr(scene.renderer.file_writer, "image_file_path", None)
+        emit({"id": req["id"], "ok": bool(path), "path": str(path or ""),
+              "ms": int((time.time() - t0) * 1000)})
+    except Cancelled:
+        emit({"id": req["id"], "ok": False, "cancelled": True})
+    except Exception as e:
+        emit({"id": req["id"], "ok": False,
+              "error": "%s: %s" % (type(e).__name__, e),
+              "trace": traceback.format_exc()[-1500:]})
+    finally:
+        if scene_dir:
+            sys.path.remove(scene_dir)
+            for name in set(sys.modules) - before:
+                f = getattr(sys.modules.get(name), "__file__", None) or ""
+                if os.path.abspath(f).startswith(scene_dir + os.sep):
+                    del sys.modules[name]
+'''
+_MARKER = '__LIVE_FRAME__'
+
+
+def configure(python_exe: str, env: Optional[dict] = None,
+              work_dir: Optional[str] = None) -> None:
+    """Set the venv interpreter (and its environment) used for the render
+    server. Restarts the server if the interpreter changed."""
+    with _COND:
+        changed = python_exe != _CONFIG['python']
+        _CONFIG['python'] = python_exe
+        _CONFIG['env'] = env
+        _CONFIG['work_dir'] = work_dir or os.path.join(tempfile.gettempdir(), 'manim_live_frame')
+    if changed:
+        shutdown()
+
+
+# ---------- Locating the animation ----------
+
+def animation_index(source: str, object_path: str,
+                    scene_name: Optional[str] = None) -> tuple:
+    """(scene class, animation number) of the first ``self.play`` whose
+    call mentions ``object_path``. Waits count as animations, exactly as
+    in manim's ``-n``. The number is None when the object is never
+    animated (the scene's last frame is rendered instead)."""
+    import timeline
+    parsed = timeline.parse_string(source, scene_name)
+    if parsed.get('status') != 'ok':
+        return None, None
+    model = parsed['model']
+    bars = sorted((b for t in model['tracks'] if t['kind'] in ('mobject', 'wait')
+                   for b in t['bars']), key=lambda b: int(b['id'][1:]))
+    pattern = re.compile(r'(?<![\w.])' + re.escape(object_path.strip()) + r'\b')
+    lines = source.splitlines()
+    for n, bar in enumerate(bars):
+        if bar['kind'] == 'Wait':
+            continue
+        text = '\n'.join(lines[bar['line'] - 1:bar.get('end_line', bar['line'])])
+        if pattern.search(text):
+            return model['scene'], n
+    return model['scene'], None
+
+
+# ---------- Server ----------
+
+def _ensure_server() -> Optional[subprocess.Popen]:
+    """Caller holds ``_COND``."""
+    proc = _STATE['server']
+    if proc is not None and proc.poll() is None:
+        return proc
+    if not _CONFIG['python']:
+        _STATE['last_error'] = 'live frame server not configured'
+        return None
+    os.makedirs(_CONFIG['work_dir'], exist_ok=True)
+    try:
+        proc = subprocess.Popen(
+            [_CONFIG['python'], '-u', '-c', _SERVER_SCRIPT],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL, text=True, encoding='utf-8',
+            errors='replace', bufsize=1, env=_CONFIG['env'],
+            cwd=_CONFIG['work_dir'],
+            creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0,
+        )
+    except OSError as e:
+        _STATE['last_error'] = str(e)
+        return None
+    _STATE['server'] = proc
+    threading.Thread(target=_read_results, args=(proc,), daemon=True).start()
+    print(f"[LIVE FRAME] render server started (pid {proc.pid})")
+    return proc
+
+
+def _read_results(proc: subprocess.Popen) -> None:
+    for line in proc.stdout:
+        if not line.startswith(_MARKER):
+            continue
+        try:
+            res = json.loads(line[len(_MARKER):])
+        except ValueError:
+            continue
+        seq = res.get('id', 0)
+        with _COND:
+            callback = _STATE['callbacks'].pop(seq, None)
+            latest = seq == _STATE['seq']
+            if res.get('cancelled'):
+                _STATE['cancelled'] += 1
+            elif res.get('ok'):
+                _STATE['rendered'] += 1
+                _STATE['last_ms'] = res.get('ms', 0)
+            else:
+                _STATE['last_error'] = res.get('error', '')
+        _remove(os.path.join(_CONFIG['work_dir'] or '', f'live_src_{seq}.py'))
+        if res.get('fatal'):
+            print(f"[LIVE FRAME] {res.get('error')}")
+        if callback is not None and latest and not res.get('cancelled'):
+            payload = ({'status': 'ok', 'seq': seq, 'path': res['path'], 'ms': res.get('ms', 0)}
+                       if res.get('ok') else
+                       {'status': 'error', 'seq': seq, 'message': res.get('error', 'render failed')})
+            try:
+                callback(payload)
+            except Exception as e:
+                print(f"[LIVE FRAME] callback failed: {e}")
+        # The callback reads the PNG synchronously; frames are never reused.
+        if res.get('path'):
+            _remove(res['path'])
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _dispatch() -> None:
+    """Send the newest pending request once it has been quiet for
+    ``_DEBOUNCE`` seconds."""
+    while True:
+        with _COND:
+            while _STATE['pending'] is None:
+                _COND.wait()
+            req = _STATE['pending']
+            quiet = time.time() - req['at']
+            if quiet < _DEBOUNCE:
+                _COND.wait(_DEBOUNCE - quiet)
+                continue
+            _STATE['pending'] = None
+            proc = _ensure_server()
+            work = _CONFIG['work_dir']
+            if proc is None:
+                callback = _STATE['callbacks'].pop(req['seq'], None)
+                message = _STATE['last_error'] or 'render server unavailable'
+        if proc is None:
+            # Callback runs outside the lock, like _read_results does.
+            if callback is not None:
+                callback({'status': 'error', 'seq': req['seq'], 'message': message})
+            continue
+        path = os.path.join(work, f"live_src_{req['seq']}.py")
+        try:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(req['source'])
+            proc.stdin.write(json.dumps({
+                'id': req['seq'], 'path': path, 'scene': req['scene'],
+                'n': req['n'], 'width': req['width'], 'height': req['height'],
+                'fps': _FRAME_RATE, 'media_dir': os.path.join(work, 'media'),
+                'scene_dir': req['scene_dir'],
+            }) + '\n')
+            proc.stdin.flush()
+            with _COND:
+                _STATE['sent'] = req['seq']
+        except (OSError, ValueError) as e:
+            with _COND:
+                _STATE['last_error'] = str(e)
+                _STATE['server'] = None
+
+
+def request(source: str, object_path: str, scene_name: Optional[str] = None,
+            on_frame: Optional[Callable[[dict], None]] = None,
+            width: int = 480, height: int = 270,
+            scene_dir: Optional[str] = None) -> int:
+    """Queue a live frame of ``source`` (the mutated scene) around
+    ``object_path``. ``scene_dir`` is the scene file's folder, put on the
+    server's ``sys.path`` for sibling imports. Replaces any pending request;
+    returns its seq."""
+    scene, n = animation_index(source, object_path, scene_name)
+    with _COND:
+        _STATE['seq'] += 1
+        seq = _STATE['seq']
+        if scene is None:
+            _STATE['last_error'] = 'no scene found'
+        else:
+            superseded = _STATE['pending']
+            if superseded is not None:
+                _STATE['callbacks'].pop(superseded['seq'], None)
+            _STATE['pending'] = {
+                'seq': seq, 'at': time.time(), 'source': source, 'scene': scene,
+                'n': n, 'width': int(width), 'height': int(height),
+                'scene_dir': scene_dir,
+            }
+            if on_frame is not None:
+                _STATE['callbacks'][seq] = on_frame
+            if _STATE['dispatcher'] is None or not _STATE['dispatcher'].is_alive():
+                _STATE['dispatcher'] = threading.Thread(target=_dispatch, daemon=True)
+                _STATE['dispatcher'].start()
+            _COND.notify_all()
+    if scene is None and on_frame is not None:
+        on_frame({'status': 'error', 'seq': seq, 'message': 'no scene found'})
+    return seq
+
+
+def status() -> dict:
+    with _COND:
+        proc = _STATE['server']
+        return {
+            'running': proc is not None and proc.poll() is None,
+            'seq': _STATE['seq'], 'sent': _STATE['sent'],
+            'pending': _STATE['pending'] is not None,
+            'rendered': _STATE['rendered'], 'cancelled': _STATE['cancelled'],
+            'last_ms': _STATE['last_ms'], 'last_error': _STATE['last_error'],
+        }
+
+
+def shutdown() -> None:
+    """Stop the render server (it restarts on the next request)."""
+    with _COND:
+        proc, _STATE['server'] = _STATE['server'], None
+    if proc is not None and proc.poll() is None:
+        try:
+            proc.stdin.close()
+            proc.wait(timeout=2)
+        except Exception:
+            proc.kill()
@@ -2,8 +2,10 @@
 Narration — Local TTS using Kokoro ONNX (built-in feature).
 
 Adds narrate("...") call support to Manim code.
-Parses these comments, generates speech with Kokoro TTS,
-and merges the audio with the rendered video via ffmpeg.
+Parses these comments, generates speech with Kokoro TTS (one long-lived
+service process per app session, so the model loads once), assembles the
+segments into one WAV + WebVTT in-process, and merges the audio with the
+rendered video via ffmpeg.
 
 Engine packages (kokoro-onnx, soundfile, onnxruntime) are installed
 automatically via the global missing-packages check at startup.
@@ -16,22 +18,27 @@ import json
 import time
 import threading
 import shutil
+import hashlib
+import wave
 
 # ── Module-level refs injected by init_narration() ──
 _preview_dir = None
 _get_clean_env = None
 _venv_dir = None
 _models_dir = None
+_cache_dir = None
 
 
 def init_narration(preview_dir, get_clean_env_func, venv_dir, user_data_dir):
     """Initialise module-level dependencies (called once from app.py)."""
-    global _preview_dir, _get_clean_env, _venv_dir, _models_dir
+    global _preview_dir, _get_clean_env, _venv_dir, _models_dir, _cache_dir
     _preview_dir = preview_dir
     _get_clean_env = get_clean_env_func
     _venv_dir = venv_dir
     _models_dir = os.path.join(user_data_dir, 'narration', 'models')
     os.makedirs(_models_dir, exist_ok=True)
+    _cache_dir = os.path.join(user_data_dir, 'narration', 'cache')
+    os.makedirs(_cache_dir, exist_ok=True)
 
 
 def _get_venv_python():
@@ -43,23 +50,33 @@ def _get_venv_python():
     return python if os.path.exists(python) else None
 
 
-# ── Helper script executed inside the venv to generate all TTS segments ──
-# Loads the Kokoro model once, processes every segment, streams progress to stdout.
-_TTS_GENERATE_SCRIPT = r'''
-import sys, json, os, urllib.request
-
-data = json.loads(sys.stdin.read())
-segments   = data["segments"]
-voice      = data.get("voice", "af_heart")
-speed      = data.get("speed", 1.0)
-output_dir = data["output_dir"]
-models_dir = data.get("models_dir", "")
+# ── Long-lived TTS service executed inside the venv ──
+# Loads Kokoro once and stays up between generations. Jobs arrive as JSON
+# lines on stdin ({"job", "segments", "voice", "speed", "output_dir"} or
+# {"cancel": job}); segments are synthesized concurrently on a pool of
+# ONNX sessions that split the cores between them, and each result is
+# streamed back as soon as it is written. Exits when stdin closes or after
+# ``idle_timeout`` seconds without work.
+_TTS_SERVICE_SCRIPT = r'''
+import sys, json, os, threading, queue, urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+cfg        = json.loads(sys.argv[1])
+models_dir = cfg.get("models_dir", "")
+workers    = max(1, int(cfg.get("workers", 1)))
+idle       = float(cfg.get("idle_timeout", 600))
+
+_out_lock = threading.Lock()
+def emit(obj):
+    with _out_lock:
+        sys.stdout.write(json.dumps(obj) + "\n")
+        sys.stdout.flush()
 
 # ── Load Kokoro ONNX ──
 try:
-    import kokoro_onnx, soundfile as sf, numpy as np
+    import kokoro_onnx, soundfile as sf
 except ImportError as e:
-    print(json.dumps({"fatal": f"Missing package: {e}"}), flush=True)
+    emit({"fatal": f"Missing package: {e}"})
     sys.exit(1)
 
 model_path  = os.path.join(models_dir, "kokoro-v1.0.onnx")
@@ -70,39 +87,404 @@ _BASE_URL = "https://github.com/thewh1teagle/kokoro-onnx/releases/download/model
 for fname, fpath in [("kokoro-v1.0.onnx", model_path), ("voices-v1.0.bin", voices_path)]:
     if not os.path.isfile(fpath):
         url = f"{_BASE_URL}/{fname}"
-        print(json.dumps({"info": f"Downloading {fname}..."}), flush=True)
+        emit({"info": f"Downloading {fname}..."})
         try:
             os.makedirs(os.path.dirname(fpath), exist_ok=True)
             urllib.request.urlretrieve(url, fpath)
             size_mb = os.path.getsize(fpath) / (1024 * 1024)
-            print(json.dumps({"info": f"Downloaded {fname} ({size_mb:.1f} MB)"}), flush=True)
+            emit({"info": f"Downloaded {fname} ({size_mb:.1f} MB)"})
         except Exception as dl_err:
-            print(json.dumps({"fatal": f"Failed to download {fname}: {dl_err}"}), flush=True)
+            emit({"fatal": f"Failed to download {fname}: {dl_err}"})
             sys.exit(1)
 
+# Each session gets an equal share of the cores, so ``workers`` sessions
+# running side by side don't oversubscribe the CPU.
+threads = max(1, (os.cpu_count() or 2) // workers)
+
+def load_engine():
+    try:
+        import onnxruntime as ort
+        if hasattr(kokoro_onnx.Kokoro, "from_session"):
+            opts = ort.SessionOptions()
+            opts.intra_op_num_threads = threads
+            opts.inter_op_num_threads = 1
+            session = ort.InferenceSession(model_path, opts,
+                                           providers=["CPUExecutionProvider"])
+            return kokoro_onnx.Kokoro.from_session(session, voices_path)
+    except Exception:
+        pass
+    return kokoro_onnx.Kokoro(model_path, voices_path)
+
 try:
-    kokoro = kokoro_onnx.Kokoro(model_path, voices_path)
+    _engines = queue.Queue()
+    _engines.put(load_engine())
 except Exception as load_err:
-    print(json.dumps({"fatal": f"Cannot load Kokoro model: {load_err}"}), flush=True)
+    emit({"fatal": f"Cannot load Kokoro model: {load_err}"})
     sys.exit(1)
+_created = [1]
+_engine_lock = threading.Lock()
 
-results = []
-for i, seg in enumerate(segments):
-    audio_path = os.path.join(output_dir, f"segment_{i:03d}.wav")
+def acquire():
+    # Extra sessions are only loaded once segments actually overlap.
+    try:
+        return _engines.get_nowait()
+    except queue.Empty:
+        with _engine_lock:
+            if _created[0] < workers:
+                _created[0] += 1
+                return load_engine()
+        return _engines.get()
+
+jobs = {}          # job -> {"total", "done", "cancelled"}
+jobs_lock = threading.Lock()
+pool = ThreadPoolExecutor(max_workers=workers)
+
+def synth(job, i, seg, voice, speed, output_dir):
+    state = jobs[job]
+    if state["cancelled"]:
+        entry = {"index": i, "status": "cancelled"}
+    else:
+        audio_path = seg.get("audio_path") or os.path.join(output_dir, f"segment_{i:03d}.wav")
+        engine = acquire()
+        try:
+            seg_voice = seg.get("voice", "") or voice
+            samples, sr = engine.create(seg["text"], voice=seg_voice, speed=speed)
+            sf.write(audio_path, samples, sr)
+            entry = {"index": i, "audio_path": audio_path,
+                     "duration": round(len(samples) / sr, 3),
+                     "samples": int(len(samples)), "sample_rate": int(sr),
+                     "status": "ok"}
+        except Exception as exc:
+            entry = {"index": i, "status": "error", "message": str(exc)}
+        finally:
+            _engines.put(engine)
+    with jobs_lock:
+        state["done"] += 1
+        done = state["done"]
+        finished = done == state["total"]
+        if finished:
+            jobs.pop(job, None)
+    emit({"job": job, "progress": done, "total": state["total"], "segment": entry})
+    if finished:
+        emit({"job": job, "done": True})
+
+emit({"ready": True, "workers": workers, "threads": threads})
+
+lines = queue.Queue()
+def _read_stdin():
+    for line in sys.stdin:
+        lines.put(line)
+    lines.put(None)
+threading.Thread(target=_read_stdin, daemon=True).start()
+
+while True:
     try:
-        seg_voice = seg.get("voice", "") or voice
-        samples, sr = kokoro.create(seg["text"], voice=seg_voice, speed=speed)
-        sf.write(audio_path, samples, sr)
-        duration = round(len(samples) / sr, 3)
-        entry = {"index": i, "audio_path": audio_path, "duration": duration, "status": "ok"}
-    except Exception as exc:
-        entry = {"index": i, "status": "error", "message": str(exc)}
-    results.append(entry)
-    print(json.dumps({"progress": i + 1, "total": len(segments), "segment": entry}), flush=True)
-
-print(json.dumps({"done": True, "results": results}), flush=True)
+        line = lines.get(timeout=idle)
+    except queue.Empty:
+        with jobs_lock:
+            if not jobs:
+                break
+        continue
+    if line is None:
+        break
+    try:
+        msg = json.loads(line)
+    except ValueError:
+        continue
+    if "cancel" in msg:
+        with jobs_lock:
+            if msg["cancel"] in jobs:
+                jobs[msg["cancel"]]["cancelled"] = True
+        continue
+    job = msg["job"]
+    segments = msg.get("segments") or []
+    if not segments:
+        emit({"job": job, "done": True})
+        continue
+    with jobs_lock:
+        jobs[job] = {"total": len(segments), "done": 0, "cancelled": False}
+    for i, seg in enumerate(segments):
+        pool.submit(synth, job, seg.get("index", i), seg, msg.get("voice", "af_heart"),
+                    msg.get("speed", 1.0), msg["output_dir"])
+
+os._exit(0)
 '''
 
+# Seconds the service may sit idle before it exits (and frees the model).
+_TTS_IDLE_TIMEOUT = 600
+
+# Service process + job routing. Callbacks run on the reader thread.
+_TTS = {'proc': None, 'seq': 0, 'jobs': {}, 'ready': False, 'workers': 0}
+_TTS_LOCK = threading.Lock()
+
+
+def _tts_workers():
+    """Concurrent Kokoro sessions. Each holds ~300 MB; beyond three, extra
+    sessions add memory faster than throughput."""
+    return max(1, min(3, (os.cpu_count() or 2) // 4))
+
+
+def _tts_service():
+    """Return the running TTS service, starting it if needed. Caller holds
+    ``_TTS_LOCK``."""
+    proc = _TTS['proc']
+    if proc is not None and proc.poll() is None:
+        return proc
+    python = _get_venv_python()
+    if not python:
+        raise RuntimeError('Python venv not found')
+    workers = _tts_workers()
+    cfg = json.dumps({'models_dir': _models_dir, 'workers': workers,
+                      'idle_timeout': _TTS_IDLE_TIMEOUT})
+    proc = subprocess.Popen(
+        [python, '-u', '-c', _TTS_SERVICE_SCRIPT, cfg],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL, text=True,
+        encoding='utf-8', errors='replace',
+        bufsize=1, env=_get_clean_env(), cwd=_models_dir,
+        creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0,
+    )
+    _TTS.update(proc=proc, ready=False, workers=workers)
+    threading.Thread(target=_tts_reader, args=(proc,), daemon=True).start()
+    print(f"[NARRATION] TTS service started (pid {proc.pid}, {workers} sessions)")
+    return proc
+
+
+def _tts_reader(proc):
+    """Route service output to job callbacks until the service exits."""
+    for line in proc.stdout:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            msg = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if 'job' in msg:
+            with _TTS_LOCK:
+                callback = _TTS['jobs'].get(msg['job'])
+                if msg.get('done'):
+                    _TTS['jobs'].pop(msg['job'], None)
+            if callback:
+                callback(msg)
+            continue
+        if msg.get('ready'):
+            _TTS['ready'] = True
+            print(f"[NARRATION] TTS service ready ({msg.get('workers')} sessions x "
+                  f"{msg.get('threads')} threads)")
+            continue
+        # info / fatal concern every job waiting on the service.
+        with _TTS_LOCK:
+            callbacks = list(_TTS['jobs'].values())
+            if 'fatal' in msg:
+                _TTS['jobs'].clear()
+        for callback in callbacks:
+            callback(msg)
+    proc.wait()
+    with _TTS_LOCK:
+        if _TTS['proc'] is proc:
+            _TTS['proc'] = None
+        orphans = list(_TTS['jobs'].values())
+        _TTS['jobs'].clear()
+    for callback in orphans:
+        callback({'fatal': 'TTS service exited unexpectedly'})
+
+
+def _tts_submit(segments, voice, speed, output_dir, on_message):
+    """Queue a synthesis job; ``on_message`` receives its progress, info
+    and fatal messages, ending with ``{"done": True}``. Returns the job id."""
+    with _TTS_LOCK:
+        proc = _tts_service()
+        _TTS['seq'] += 1
+        job = _TTS['seq']
+        _TTS['jobs'][job] = on_message
+        try:
+            proc.stdin.write(json.dumps({
+                'job': job, 'segments': segments, 'voice': voice,
+                'speed': speed, 'output_dir': output_dir}) + '\n')
+            proc.stdin.flush()
+        except (OSError, ValueError) as e:
+            _TTS['jobs'].pop(job, None)
+            raise RuntimeError(f'TTS service unavailable: {e}')
+    return job
+
+
+def _tts_cancel(job):
+    """Drop a job's callback and tell the service to skip its pending
+    segments (segments already being synthesized finish)."""
+    with _TTS_LOCK:
+        _TTS['jobs'].pop(job, None)
+        proc = _TTS['proc']
+        if proc is None or proc.poll() is not None:
+            return
+        try:
+            proc.stdin.write(json.dumps({'cancel': job}) + '\n')
+            proc.stdin.flush()
+        except (OSError, ValueError):
+            pass
+
+
+def shutdown_tts_service():
+    """Stop the TTS service (it restarts on the next generation)."""
+    with _TTS_LOCK:
+        proc, _TTS['proc'] = _TTS['proc'], None
+    if proc is not None and proc.poll() is None:
+        try:
+            proc.stdin.close()
+            proc.wait(timeout=3)
+        except Exception:
+            proc.kill()
+
+
+# ── Per-segment audio cache ──
+# Content-addressed: <sha256(text, voice, speed, model digest)>.wav, so an
+# edit to one narrate() line re-synthesizes only that line. Hits touch the
+# file's mtime; the least recently used files are evicted past the quota.
+_TTS_CACHE_QUOTA = 512 * 1024 * 1024
+_MODEL_DIGEST = {'stamp': None, 'digest': None}
+_CACHE_LOCK = threading.Lock()
+
+
+def _model_digest():
+    """Digest of the Kokoro model + voices files, or None before they are
+    downloaded. Hashing ~300 MB is done once per file version: the result
+    is persisted next to the models, keyed by mtime and size."""
+    paths = [os.path.join(_models_dir, 'kokoro-v1.0.onnx'),
+             os.path.join(_models_dir, 'voices-v1.0.bin')]
+    try:
+        stamp = [[os.path.getmtime(p), os.path.getsize(p)] for p in paths]
+    except OSError:
+        return None
+    if _MODEL_DIGEST['stamp'] == stamp:
+        return _MODEL_DIGEST['digest']
+    sidecar = os.path.join(_models_dir, 'model_digest.json')
+    try:
+        with open(sidecar, 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+        if saved.get('stamp') == stamp:
+            _MODEL_DIGEST.update(stamp=stamp, digest=saved['digest'])
+            return saved['digest']
+    except (OSError, ValueError, KeyError):
+        pass
+    h = hashlib.sha256()
+    for p in paths:
+        with open(p, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                h.update(chunk)
+    digest = h.hexdigest()
+    _MODEL_DIGEST.update(stamp=stamp, digest=digest)
+    try:
+        with open(sidecar, 'w', encoding='utf-8') as f:
+            json.dump({'stamp': stamp, 'digest': digest}, f)
+    except OSError:
+        pass
+    return digest
+
+
+def _segment_key(text, voice, speed, digest):
+    h = hashlib.sha256()
+    for part in (text, voice, f'{float(speed):.4f}', digest):
+        h.update(part.encode('utf-8'))
+        h.update(b'\0')
+    return h.hexdigest()
+
+
+def _wav_info(path):
+    """(samples, sample_rate) of a PCM WAV file."""
+    with wave.open(path, 'rb') as w:
+        return w.getnframes(), w.getframerate()
+
+
+def _link_or_copy(src, dst):
+    try:
+        if os.path.exists(dst):
+            os.remove(dst)
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def _cache_lookup(key, index, audio_dir):
+    """Materialize a cached segment as ``segment_<index>.wav`` in
+    ``audio_dir``; returns its segment entry or None on a miss."""
+    cached = os.path.join(_cache_dir, f'{key}.wav')
+    if not os.path.isfile(cached):
+        return None
+    try:
+        samples, sr = _wav_info(cached)
+        audio_path = os.path.join(audio_dir, f'segment_{index:03d}.wav')
+        _link_or_copy(cached, audio_path)
+        os.utime(cached)
+        if os.path.isfile(cached + '.peaks'):
+            os.utime(cached + '.peaks')
+            _link_or_copy(cached + '.peaks', audio_path + '.peaks')
+    except (OSError, wave.Error, EOFError):
+        return None
+    return {'index': index, 'audio_path': audio_path,
+            'duration': round(samples / sr, 3), 'samples': samples,
+            'sample_rate': sr, 'status': 'ok', 'cached': True}
+
+
+def _cache_store(key, audio_path):
+    """Add a freshly synthesized segment to the cache."""
+    if not key or not os.path.isfile(audio_path):
+        return
+    try:
+        cached = os.path.join(_cache_dir, f'{key}.wav')
+        _link_or_copy(audio_path, cached)
+    except OSError as e:
+        print(f"[NARRATION] Cache store failed: {e}")
+
+
+def _cache_trim(quota=_TTS_CACHE_QUOTA):
+    """Evict least recently used segments until the cache fits ``quota``."""
+    with _CACHE_LOCK:
+        entries = []
+        for name in os.listdir(_cache_dir):
+            path = os.path.join(_cache_dir, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        total = sum(e[1] for e in entries)
+        for _mtime, size, path in sorted(entries):
+            if total <= quota:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+
+def _generation_key(code, voice, speed, starts):
+    h = hashlib.sha1()
+    h.update(json.dumps([code, voice, float(speed), starts]).encode('utf-8'))
+    return h.hexdigest()
+
+
+def _narration_starts(code, segments):
+    """Start time (seconds) of each segment's ``narrate()`` call in the
+    animation, from the static timeline; ``None`` where unknown. Returns
+    None when the timeline cannot be evaluated."""
+    try:
+        import timeline
+        parsed = timeline.parse_string(code)
+    except Exception as e:
+        print(f"[NARRATION] Timeline unavailable, using sequential placement: {e}")
+        return None
+    if parsed.get('status') != 'ok':
+        return None
+    by_line = {}
+    for track in parsed['model']['tracks']:
+        if track['kind'] != 'narrate':
+            continue
+        for bar in track['bars']:
+            by_line.setdefault(bar['line'], bar['start'])
+    starts = [by_line.get(seg['line']) for seg in segments]
+    return starts if any(t is not None for t in starts) else None
+
 
 class NarrationMixin:
     """Mixin providing narration / TTS pywebview API methods.
@@ -112,7 +494,8 @@ class NarrationMixin:
     """
 
     # ── Generation state ──
-    _narr_proc = None
+    _narr_job = None          # TTS service job id of the current generation
+    _narr_key = None          # hash of (code, voice, speed, starts) it was made from
     _narr_generating = False
     _narr_progress = 0
     _narr_total = 0
@@ -198,11 +581,16 @@ class NarrationMixin:
     #  Generate TTS audio
     # ------------------------------------------------------------------ #
 
-    def generate_narration(self, code, voice='af_heart', speed=1.0):
+    def generate_narration(self, code, voice='af_heart', speed=1.0, starts=None):
         """Generate TTS audio for all ``narrate("...")`` calls in *code*.
 
-        Spawns a subprocess in the app venv that loads Kokoro once and
-        processes every segment.  Poll with ``narration_poll()``.
+        ``starts`` optionally gives each segment's start time in seconds
+        (``None`` entries follow the previous segment after the usual gap).
+
+        Segments found in the per-segment cache (same text, voice, speed and
+        model) are reused; the rest go to the long-lived TTS service
+        (started on first use), which synthesizes them concurrently and
+        streams each one back as it finishes.  Poll with ``narration_poll()``.
         """
         if NarrationMixin._narr_generating:
             return {'status': 'error', 'message': 'Already generating'}
@@ -214,121 +602,140 @@ class NarrationMixin:
             return {'status': 'error',
                     'message': 'No narrate() calls found in code'}
 
-        # Check engine
-        engine = self.check_narration_engine()
-        if not engine.get('installed'):
-            return {'status': 'error',
-                    'message': 'Kokoro TTS not installed. Restart the app to install missing packages.'}
-
-        python = _get_venv_python()
-        if not python:
-            return {'status': 'error', 'message': 'Python venv not found'}
-
         # Setup output dir
-        ts = int(time.time())
+        ts = int(time.time() * 1000)
         audio_dir = os.path.join(_preview_dir, f'narration_{ts}')
         os.makedirs(audio_dir, exist_ok=True)
 
+        # Cached segments are materialized right away; only the rest go to
+        # the engine.
+        digest = _model_digest()
+        keys, hits, misses = {}, [], []
+        for i, seg in enumerate(segments):
+            if digest:
+                keys[i] = _segment_key(seg['text'], seg.get('voice') or voice, speed, digest)
+            hit = _cache_lookup(keys[i], i, audio_dir) if i in keys else None
+            if hit:
+                hits.append(hit)
+            else:
+                misses.append({**seg, 'index': i})
+
+        if misses:
+            # Check engine (a ready service has already imported it)
+            proc = _TTS['proc']
+            service_up = proc is not None and proc.poll() is None and _TTS['ready']
+            engine = {'installed': True} if service_up else self.check_narration_engine()
+            if not engine.get('installed'):
+                shutil.rmtree(audio_dir, ignore_errors=True)
+                return {'status': 'error',
+                        'message': 'Kokoro TTS not installed. Restart the app to install missing packages.'}
+
+            python = _get_venv_python()
+            if not python:
+                shutil.rmtree(audio_dir, ignore_errors=True)
+                return {'status': 'error', 'message': 'Python venv not found'}
+
         # Reset state
+        NarrationMixin._narr_key = _generation_key(code, voice, speed, starts)
         NarrationMixin._narr_generating = True
-        NarrationMixin._narr_progress = 0
+        NarrationMixin._narr_progress = len(hits)
         NarrationMixin._narr_total = len(segments)
         NarrationMixin._narr_error = None
         NarrationMixin._narr_info = ''
         NarrationMixin._narr_output_buf = ''
         NarrationMixin._narr_audio_dir = audio_dir
-        NarrationMixin._narr_segments = []
+        NarrationMixin._narr_segments = list(hits)
         NarrationMixin._narr_texts = [s['text'] for s in segments]
         NarrationMixin._narr_final_audio = None
         NarrationMixin._narr_done = False
 
-        # Write the helper script to the audio dir
-        script_path = os.path.join(audio_dir, '_generate.py')
-        with open(script_path, 'w', encoding='utf-8') as f:
-            f.write(_TTS_GENERATE_SCRIPT)
-
-        # Build input JSON
-        input_data = json.dumps({
-            'segments': segments,
-            'voice': voice,
-            'speed': speed,
-            'output_dir': audio_dir,
-            'models_dir': _models_dir
-        })
-
-        print(f"[NARRATION] Generating {len(segments)} segments, voice={voice}, speed={speed}")
-
-        try:
-            NarrationMixin._narr_proc = subprocess.Popen(
-                [python, script_path],
-                stdin=subprocess.PIPE, stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT, text=True,
-                encoding='utf-8', errors='replace',
-                bufsize=1, env=_get_clean_env(), cwd=audio_dir
-            )
-            # Feed input JSON via stdin
-            try:
-                NarrationMixin._narr_proc.stdin.write(input_data)
-                NarrationMixin._narr_proc.stdin.close()
-            except Exception as e:
-                print(f"[NARRATION] stdin write error: {e}")
-
-            def _reader():
-                proc = NarrationMixin._narr_proc
+        print(f"[NARRATION] Generating {len(misses)} of {len(segments)} segments "
+              f"({len(hits)} cached), voice={voice}, speed={speed}")
+        stored = {}  # segment index -> cache key, for _finish to cache peaks
+
+        def _finish():
+            # Segments stream back in completion order; assembly needs
+            # script order.
+            NarrationMixin._narr_segments.sort(key=lambda seg: seg['index'])
+            for seg in NarrationMixin._narr_segments:
+                if starts and seg['index'] < len(starts) and starts[seg['index']] is not None:
+                    seg['start'] = float(starts[seg['index']])
+
+            # Assemble segment WAVs + subtitles into the final mix (before
+            # flagging done, so a poll never sees success without audio)
+            if NarrationMixin._narr_segments and not NarrationMixin._narr_error:
                 try:
-                    for line in proc.stdout:
-                        NarrationMixin._narr_output_buf += line
-                        line = line.strip()
-                        if not line:
-                            continue
-                        try:
-                            msg = json.loads(line)
-                        except json.JSONDecodeError:
-                            continue
-
-                        if 'fatal' in msg:
-                            NarrationMixin._narr_error = msg['fatal']
-                            break
-                        if 'info' in msg:
-                            NarrationMixin._narr_info = msg['info']
-                            print(f"[NARRATION] {msg['info']}")
-                            continue
-                        if 'progress' in msg:
-                            NarrationMixin._narr_progress = msg['progress']
-                            seg = msg.get('segment')
-                            if seg and seg.get('status') == 'ok':
-                                NarrationMixin._narr_segments.append(seg)
-                        if msg.get('done'):
-                            break
+                    _assemble_narration(
+                        NarrationMixin._narr_segments,
+                        NarrationMixin._narr_texts,
+                        audio_dir)
                 except Exception as e:
-                    NarrationMixin._narr_error = str(e)
-
-                proc.wait()
-                NarrationMixin._narr_done = True
-                NarrationMixin._narr_generating = False
-
-                # Concatenate segment WAVs into one file
-                if NarrationMixin._narr_segments and not NarrationMixin._narr_error:
-                    try:
-                        _concatenate_audio(
-                            NarrationMixin._narr_segments, audio_dir)
-                    except Exception as e:
-                        print(f"[NARRATION] Concat error: {e}")
-
-                    # Generate WebVTT subtitles
+                    print(f"[NARRATION] Assembly error: {e}")
+                # Waveform pyramids for the preview strip, built here rather
+                # than on the service reader; fresh segments also get theirs
+                # cached next to the WAV stored by _on_message.
+                for seg in NarrationMixin._narr_segments + [
+                        {'audio_path': NarrationMixin._narr_final_audio or ''}]:
+                    path = seg['audio_path']
+                    if not path or not os.path.isfile(path):
+                        continue
                     try:
-                        _generate_subtitles_vtt(
-                            NarrationMixin._narr_segments,
-                            NarrationMixin._narr_texts,
-                            audio_dir)
+                        peaks = _peaks_for(path)
+                        key = stored.get(seg.get('index'))
+                        if key:
+                            _link_or_copy(peaks, os.path.join(_cache_dir, f'{key}.wav.peaks'))
                     except Exception as e:
-                        print(f"[NARRATION] VTT error: {e}")
+                        print(f"[NARRATION] Peaks error for {os.path.basename(path)}: {e}")
+            NarrationMixin._narr_done = True
+            NarrationMixin._narr_generating = False
 
-                print(f"[NARRATION] Done. {len(NarrationMixin._narr_segments)} segments, "
-                      f"error={NarrationMixin._narr_error}")
+            print(f"[NARRATION] Done. {len(NarrationMixin._narr_segments)} segments, "
+                  f"error={NarrationMixin._narr_error}")
+            try:
+                _cache_trim()
+            except OSError as e:
+                print(f"[NARRATION] Cache trim failed: {e}")
+
+        def _on_message(msg):
+            if NarrationMixin._narr_audio_dir != audio_dir:
+                return  # superseded or cancelled generation
+            if 'fatal' in msg:
+                NarrationMixin._narr_error = msg['fatal']
+                threading.Thread(target=_finish, daemon=True).start()
+                return
+            if 'info' in msg:
+                NarrationMixin._narr_info = msg['info']
+                print(f"[NARRATION] {msg['info']}")
+                return
+            if 'progress' in msg:
+                NarrationMixin._narr_info = ''
+                NarrationMixin._narr_progress = len(hits) + msg['progress']
+                seg = msg.get('segment')
+                if seg and seg.get('status') == 'ok':
+                    NarrationMixin._narr_segments.append(seg)
+                    # Models may have been downloaded by this very job.
+                    key = keys.get(seg['index'])
+                    if key is None and _model_digest():
+                        src = segments[seg['index']]
+                        key = _segment_key(src['text'], src.get('voice') or voice,
+                                           speed, _model_digest())
+                    _cache_store(key, seg['audio_path'])
+                    if key:
+                        stored[seg['index']] = key
+            if msg.get('done'):
+                # Assembly runs ffmpeg; keep it off the service reader.
+                threading.Thread(target=_finish, daemon=True).start()
+
+        if not misses:
+            NarrationMixin._narr_job = 0
+            threading.Thread(target=_finish, daemon=True).start()
+            return {'status': 'started', 'total': len(segments), 'cached': len(hits),
+                    'message': 'All segments cached'}
 
-            threading.Thread(target=_reader, daemon=True).start()
-            return {'status': 'started', 'total': len(segments),
+        try:
+            NarrationMixin._narr_job = _tts_submit(
+                misses, voice, speed, audio_dir, _on_message)
+            return {'status': 'started', 'total': len(segments), 'cached': len(hits),
                     'message': 'Generating narration...'}
 
         except Exception as e:
@@ -336,9 +743,32 @@ class NarrationMixin:
             print(f"[NARRATION ERROR] {e}")
             return {'status': 'error', 'message': str(e)}
 
+    def narration_prestart(self, code, voice='af_heart', speed=1.0):
+        """Start narration for *code* as soon as a render or preview starts,
+        so TTS runs concurrently with manim and the final merge only waits
+        for whichever finishes last.
+
+        Segments are placed where their ``narrate()`` call happens in the
+        animation (static timeline; see ``_narration_starts``). A generation
+        already running or finished for the same code, voice and speed is
+        reused; one for different code is cancelled and replaced."""
+        parsed = self.parse_narrate_comments(code)
+        if not parsed['segments']:
+            return {'status': 'skipped', 'message': 'No narrate() calls found in code'}
+        starts = _narration_starts(code, parsed['segments'])
+        key = _generation_key(code, voice, speed, starts)
+        if NarrationMixin._narr_key == key and NarrationMixin._narr_job is not None:
+            if NarrationMixin._narr_generating or (
+                    NarrationMixin._narr_done and not NarrationMixin._narr_error
+                    and NarrationMixin._narr_final_audio):
+                return {'status': 'reused', 'total': NarrationMixin._narr_total}
+        if NarrationMixin._narr_generating:
+            self.narration_cancel()
+        return self.generate_narration(code, voice, speed, starts)
+
     def narration_poll(self):
         """Poll narration generation progress."""
-        if NarrationMixin._narr_proc is None:
+        if NarrationMixin._narr_job is None:
             return {'status': 'idle', 'done': True}
 
         if NarrationMixin._narr_done:
@@ -369,6 +799,8 @@ class NarrationMixin:
             msg = info
         elif NarrationMixin._narr_progress > 0:
             msg = f'Generating... ({NarrationMixin._narr_progress}/{NarrationMixin._narr_total})'
+        elif _TTS['ready']:
+            msg = 'Generating...'
         else:
             msg = 'Loading Kokoro model...'
         return {
@@ -381,13 +813,11 @@ class NarrationMixin:
 
     def narration_cancel(self):
         """Cancel a running narration generation."""
-        if NarrationMixin._narr_proc and not NarrationMixin._narr_done:
-            try:
-                NarrationMixin._narr_proc.kill()
-                print("[NARRATION] Cancelled by user")
-            except Exception:
-                pass
-        NarrationMixin._narr_proc = None
+        if NarrationMixin._narr_job is not None and not NarrationMixin._narr_done:
+            # The service stays up (model loaded) for the next generation.
+            _tts_cancel(NarrationMixin._narr_job)
+            print("[NARRATION] Cancelled by user")
+        NarrationMixin._narr_job = None
         NarrationMixin._narr_generating = False
         NarrationMixin._narr_done = False
         NarrationMixin._narr_progress = 0
@@ -489,6 +919,23 @@ class NarrationMixin:
                 sum(s.get('duration', 0) for s in NarrationMixin._narr_segments), 2)
         }
 
+    def get_narration_waveform(self, segment=None, start=0.0, end=None, buckets=1000):
+        """Waveform peaks for the final mix (``segment=None``) or one
+        segment, as a flat ``[min, max, ...]`` int16 list covering
+        [start, end) seconds in roughly *buckets* columns. Served from the
+        peak pyramid next to the audio; raw samples are never read."""
+        if segment is None:
+            path = NarrationMixin._narr_final_audio
+        else:
+            path = next((seg['audio_path'] for seg in NarrationMixin._narr_segments
+                         if seg.get('index') == int(segment)), None)
+        if not path or not os.path.isfile(path):
+            return {'status': 'error', 'message': 'No narration audio'}
+        try:
+            return _peak_slice(path, start, end, buckets)
+        except Exception as e:
+            return {'status': 'error', 'message': str(e)}
+
     def get_narration_subtitles(self):
         """Return WebVTT subtitle content for the current narration."""
         vtt_path = NarrationMixin._narr_subtitles_vtt
@@ -501,83 +948,277 @@ class NarrationMixin:
             return {'status': 'error', 'message': str(e)}
 
 
-# ── Helper: concatenate segment WAVs into one file with gaps ──
-
-def _concatenate_audio(segments, audio_dir, gap_seconds=0.5):
-    """Concatenate segment WAV files with silence gaps between them.
-
-    Uses ffmpeg concat demuxer (avoids needing numpy/soundfile in the
-    main process).  Result is saved as ``narration_full.wav``.
-    """
-    # Build ffmpeg concat list
-    list_path = os.path.join(audio_dir, 'concat_list.txt')
-    silence_path = os.path.join(audio_dir, 'silence.wav')
+# ── Helper: assemble segment WAVs into one file + matching subtitles ──
+
+_COPY_CHUNK = 1 << 20
+
+
+def _wav_layout(path):
+    """Parse a RIFF/WAVE header. Returns
+    ``({tag, channels, rate, width}, data_offset, data_size)``; ``tag`` is
+    1 (PCM) or 3 (IEEE float), resolved through WAVE_FORMAT_EXTENSIBLE."""
+    import struct
+    with open(path, 'rb') as f:
+        riff = f.read(12)
+        if len(riff) < 12 or riff[:4] != b'RIFF' or riff[8:12] != b'WAVE':
+            raise ValueError(f'not a WAV file: {path}')
+        fmt = None
+        while True:
+            head = f.read(8)
+            if len(head) < 8:
+                raise ValueError(f'no data chunk in {path}')
+            cid, size = head[:4], struct.unpack('<I', head[4:])[0]
+            if cid == b'fmt ':
+                raw = f.read(size)
+                tag, channels, rate = struct.unpack('<HHI', raw[:8])
+                width = struct.unpack('<H', raw[14:16])[0] // 8
+                if tag == 0xFFFE and len(raw) >= 26:
+                    tag = struct.unpack('<H', raw[24:26])[0]
+                fmt = {'tag': tag, 'channels': channels, 'rate': rate, 'width': width}
+                if size % 2:
+                    f.seek(1, 1)
+            elif cid == b'data':
+                if fmt is None:
+                    raise ValueError(f'data before fmt in {path}')
+                # Streaming writers may leave 0 / 0xFFFFFFFF as the size.
+                avail = os.path.getsize(path) - f.tell()
+                if size == 0 or size > avail:
+                    size = avail
+                return fmt, f.tell(), size - size % (fmt['channels'] * fmt['width'])
+            else:
+                f.seek(size + size % 2, 1)
+
+
+def _wav_header(fmt, data_size):
+    import struct
+    block = fmt['channels'] * fmt['width']
+    return (b'RIFF' + struct.pack('<I', 36 + data_size) + b'WAVE'
+            + b'fmt ' + struct.pack('<IHHIIHH', 16, fmt['tag'], fmt['channels'],
+                                    fmt['rate'], fmt['rate'] * block, block,
+                                    fmt['width'] * 8)
+            + b'data' + struct.pack('<I', data_size))
+
+
+def _write_silence(out, fmt, frames):
+    # Unsigned 8-bit PCM is centred on 0x80; every other format on 0.
+    fill = b'\x80' if fmt['width'] == 1 and fmt['tag'] == 1 else b'\x00'
+    remaining = frames * fmt['channels'] * fmt['width']
+    while remaining > 0:
+        n = min(remaining, _COPY_CHUNK)
+        out.write(fill * n)
+        remaining -= n
+
+
+def _assemble_narration(segments, texts, audio_dir, gap_seconds=0.5):
+    """Write ``narration_full.wav`` and ``subtitles.vtt`` in one pass.
+
+    Segment sample data is copied straight out of memory-mapped segment
+    files; gaps are exact sample counts of silence. A segment may carry a
+    ``start`` (seconds) to be placed at that position instead of one gap
+    after the previous segment; starts that would overlap the previous
+    segment are pushed back to its end. Each cue is derived from the same
+    sample positions as the audio, so subtitles cannot drift. Every
+    segment entry gains ``start``/``end`` (seconds) in the final mix.
+
+    All segments must share the first segment's sample format (Kokoro
+    writes 24 kHz mono); mismatching ones are skipped."""
+    import mmap
     output_path = os.path.join(audio_dir, 'narration_full.wav')
-
-    # Generate a short silence file
-    subprocess.run([
-        'ffmpeg', '-y', '-f', 'lavfi',
-        '-i', f'anullsrc=r=24000:cl=mono:d={gap_seconds}',
-        silence_path
-    ], capture_output=True, timeout=10)
-
-    with open(list_path, 'w', encoding='utf-8') as f:
-        for i, seg in enumerate(segments):
-            ap = seg.get('audio_path', '')
-            if ap and os.path.isfile(ap):
-                f.write(f"file '{ap}'\n")
-                # Add silence gap after each segment except the last
-                if i < len(segments) - 1 and os.path.isfile(silence_path):
-                    f.write(f"file '{silence_path}'\n")
-
-    result = subprocess.run([
-        'ffmpeg', '-y', '-f', 'concat', '-safe', '0',
-        '-i', list_path, '-c', 'copy', output_path
-    ], capture_output=True, text=True, encoding='utf-8',
-       errors='replace', timeout=60)
-
-    if result.returncode == 0 and os.path.isfile(output_path):
-        NarrationMixin._narr_final_audio = output_path
-        print(f"[NARRATION] Concatenated audio: {output_path}")
-    else:
-        print(f"[NARRATION] Concat ffmpeg failed: {result.stderr[:300]}")
-
-
-def _generate_subtitles_vtt(segments, texts, audio_dir, gap_seconds=0.5):
-    """Generate a WebVTT subtitle file from narration segments.
-
-    Timing matches the concatenated audio (segment durations + silence gaps).
-    """
     vtt_path = os.path.join(audio_dir, 'subtitles.vtt')
-    lines = ['WEBVTT', '']
 
-    current_time = 0.0
-    for i, seg in enumerate(segments):
-        duration = seg.get('duration', 0)
-        if duration <= 0:
+    fmt = None
+    placed = []      # (seg, data_offset, data_size, start_frame, frames)
+    cursor = 0
+    for seg in segments:
+        ap = seg.get('audio_path', '')
+        if not ap or not os.path.isfile(ap):
             continue
-        text = texts[i] if i < len(texts) else ''
-        if not text:
+        try:
+            seg_fmt, offset, size = _wav_layout(ap)
+        except (OSError, ValueError) as e:
+            print(f"[NARRATION] Skipping segment {seg.get('index')}: {e}")
             continue
-
-        start = current_time
-        end = current_time + duration
-
-        lines.append(str(i + 1))
-        lines.append(f'{_format_vtt_time(start)} --> {_format_vtt_time(end)}')
+        if fmt is None:
+            fmt = seg_fmt
+        elif seg_fmt != fmt:
+            print(f"[NARRATION] Skipping segment {seg.get('index')}: format {seg_fmt} != {fmt}")
+            continue
+        frames = size // (fmt['channels'] * fmt['width'])
+        if seg.get('start') is not None:
+            start = max(cursor, int(round(float(seg['start']) * fmt['rate'])))
+        elif placed:
+            start = cursor + int(round(gap_seconds * fmt['rate']))
+        else:
+            start = 0
+        placed.append((seg, offset, size, start, frames))
+        cursor = start + frames
+
+    if fmt is None:
+        print("[NARRATION] Nothing to assemble")
+        return None
+
+    block = fmt['channels'] * fmt['width']
+    with open(output_path, 'wb') as out:
+        out.write(_wav_header(fmt, cursor * block))
+        written = 0
+        for seg, offset, size, start, frames in placed:
+            _write_silence(out, fmt, start - written)
+            if size:
+                with open(seg['audio_path'], 'rb') as f, \
+                        mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    for pos in range(offset, offset + size, _COPY_CHUNK):
+                        out.write(mm[pos:min(pos + _COPY_CHUNK, offset + size)])
+            written = start + frames
+
+    rate = fmt['rate']
+    lines = ['WEBVTT', '']
+    cue = 0
+    for seg, _offset, _size, start, frames in placed:
+        seg['start'] = round(start / rate, 6)
+        seg['end'] = round((start + frames) / rate, 6)
+        idx = seg.get('index', 0)
+        text = texts[idx] if idx < len(texts) else ''
+        if not text or not frames:
+            continue
+        cue += 1
+        lines.append(str(cue))
+        lines.append(f'{_format_vtt_time(start / rate)} --> {_format_vtt_time((start + frames) / rate)}')
         lines.append(text)
         lines.append('')
-
-        # Advance by segment duration + gap (except after last segment)
-        current_time = end
-        if i < len(segments) - 1:
-            current_time += gap_seconds
-
     with open(vtt_path, 'w', encoding='utf-8') as f:
         f.write('\n'.join(lines))
 
+    NarrationMixin._narr_final_audio = output_path
     NarrationMixin._narr_subtitles_vtt = vtt_path
+    print(f"[NARRATION] Assembled audio: {output_path} "
+          f"({cursor / rate:.2f}s, {len(placed)} segments)")
     print(f"[NARRATION] Subtitles: {vtt_path}")
+    return {'audio': output_path, 'vtt': vtt_path,
+            'samples': cursor, 'sample_rate': rate}
+
+
+# ── Helper: waveform peak pyramid ──
+# ``<audio>.wav.peaks`` holds min/max int16 pairs per bucket of
+# ``_PEAK_BASE`` frames, then per 2x, 4x, ... buckets up to a few hundred
+# buckets for the whole file. A zoom level reads only the slice of the
+# level that matches its resolution, never the raw samples.
+_PEAK_MAGIC = b'MSPK'
+_PEAK_BASE = 256
+_PEAK_HEADER = '<4sHIIIH'       # magic, version, rate, base, frames, levels
+_PEAK_LEVEL = '<II'             # file offset, bucket count
+
+
+def _build_peaks(wav_path):
+    """Write the peak pyramid for *wav_path*; returns the .peaks path."""
+    import array
+    import mmap
+    import struct
+    fmt, offset, size = _wav_layout(wav_path)
+    block = fmt['channels'] * fmt['width']
+    frames = size // block
+    if fmt['tag'] == 3 and fmt['width'] == 4:
+        typecode, scale = 'f', 32767.0
+    elif fmt['tag'] == 1 and fmt['width'] == 2:
+        typecode, scale = 'h', None
+    else:
+        raise ValueError(f"unsupported WAV format for peaks: {fmt}")
+
+    mins, maxs = array.array('h'), array.array('h')
+    step = _PEAK_BASE * block
+    with open(wav_path, 'rb') as f, \
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        # 4096 buckets per read keeps memory flat for any length.
+        for pos in range(offset, offset + size, step * 4096):
+            samples = array.array(typecode, mm[pos:min(pos + step * 4096, offset + size)])
+            per = _PEAK_BASE * fmt['channels']
+            for i in range(0, len(samples), per):
+                chunk = samples[i:i + per]
+                lo, hi = min(chunk), max(chunk)
+                if scale:
+                    lo = max(-32768, min(32767, int(lo * scale)))
+                    hi = max(-32768, min(32767, int(hi * scale)))
+                mins.append(lo)
+                maxs.append(hi)
+
+    levels = [(mins, maxs)]
+    while len(levels[-1][0]) > 256:
+        pmin, pmax = levels[-1]
+        nmin, nmax = array.array('h'), array.array('h')
+        for i in range(0, len(pmin), 2):
+            nmin.append(min(pmin[i:i + 2]))
+            nmax.append(max(pmax[i:i + 2]))
+        levels.append((nmin, nmax))
+
+    peaks_path = wav_path + '.peaks'
+    header = struct.calcsize(_PEAK_HEADER) + struct.calcsize(_PEAK_LEVEL) * len(levels)
+    table, pos = [], header
+    for lmin, _lmax in levels:
+        table.append((pos, len(lmin)))
+        pos += len(lmin) * 4
+    tmp = peaks_path + '.tmp'
+    with open(tmp, 'wb') as out:
+        out.write(struct.pack(_PEAK_HEADER, _PEAK_MAGIC, 1, fmt['rate'],
+                              _PEAK_BASE, frames, len(levels)))
+        for entry in table:
+            out.write(struct.pack(_PEAK_LEVEL, *entry))
+        for lmin, lmax in levels:
+            pairs = array.array('h', bytes(len(lmin) * 4))
+            pairs[0::2] = lmin
+            pairs[1::2] = lmax
+            if sys.byteorder != 'little':
+                pairs.byteswap()
+            out.write(pairs.tobytes())
+    os.replace(tmp, peaks_path)
+    return peaks_path
+
+
+def _peaks_for(wav_path):
+    """The up-to-date .peaks file for *wav_path*, building it if needed."""
+    peaks_path = wav_path + '.peaks'
+    try:
+        if os.path.getmtime(peaks_path) >= os.path.getmtime(wav_path):
+            return peaks_path
+    except OSError:
+        pass
+    return _build_peaks(wav_path)
+
+
+def _peak_slice(wav_path, start=0.0, end=None, buckets=1000):
+    """Min/max pairs covering [start, end) seconds in about *buckets*
+    columns, read from the coarsest pyramid level that still has at least
+    one bucket per column."""
+    import array
+    import struct
+    peaks_path = _peaks_for(wav_path)
+    with open(peaks_path, 'rb') as f:
+        head = f.read(struct.calcsize(_PEAK_HEADER))
+        magic, _version, rate, base, frames, nlevels = struct.unpack(_PEAK_HEADER, head)
+        if magic != _PEAK_MAGIC:
+            raise ValueError(f'not a peaks file: {peaks_path}')
+        table = [struct.unpack(_PEAK_LEVEL, f.read(struct.calcsize(_PEAK_LEVEL)))
+                 for _ in range(nlevels)]
+        duration = frames / rate
+        start = max(0.0, float(start or 0.0))
+        end = duration if end is None else min(duration, float(end))
+        buckets = max(1, int(buckets))
+        span_frames = max(1, int((end - start) * rate))
+        level = 0
+        while (level + 1 < nlevels
+               and span_frames / (base << (level + 1)) >= buckets):
+            level += 1
+        bucket_frames = base << level
+        offset, count = table[level]
+        first = min(count, int(start * rate) // bucket_frames)
+        last = min(count, -(-int(end * rate) // bucket_frames))
+        f.seek(offset + first * 4)
+        pairs = array.array('h', f.read((last - first) * 4))
+    if sys.byteorder != 'little':
+        pairs.byteswap()
+    return {'status': 'success', 'peaks': pairs.tolist(),
+            'level': level, 'bucket_seconds': bucket_frames / rate,
+            'start': first * bucket_frames / rate,
+            'end': min(duration, last * bucket_frames / rate),
+            'sample_rate': rate, 'duration': round(duration, 6)}
 
 
 def _format_vtt_time(seconds):
@@ -0,0 +1,180 @@
+"""Source edits — batched, in-memory splicing for Timeline (F-01) and
+Inspector (F-04).
+
+Both features rewrite literals inside the user's scene (``run_time=``,
+``self.wait(...)`` durations, constructor kwargs) without reformatting
+anything else. ``EditBuffer`` parses the source once, collects every edit
+as a character-offset splice, applies them all in a single pass and
+re-validates the result once, so a drag that produces hundreds of edits
+costs one parse + one join instead of a parse per edit.
+
+    buf = EditBuffer(source)            # SyntaxError if source is broken
+    buf.replace(node, '2.5')            # replace an AST node's text
+    buf.insert(offset, ', run_time=2')  # insert at a character offset
+    buf.move(stmt, before_stmt)         # move whole statement lines
+    res = buf.commit()  # {status, code, conflicts} or {status: error}
+
+    code, conflicts = apply_splices(source, [(start, end, text, tag)])
+
+Splices are keyed by span: replacing the same node twice keeps the last
+value (a drag re-sends the same bar), while partially overlapping edits
+are reported in ``conflicts`` and skipped. Edits that fall inside a moved
+statement travel with it.
+
+AST columns are UTF-8 byte offsets; ``span()`` converts them to ``str``
+indices so non-ASCII lines (labels, comments) splice correctly.
+"""
+
+from __future__ import annotations
+
+import ast
+import bisect
+from typing import Optional
+
+
+class EditBuffer:
+    def __init__(self, source: str, tree: Optional[ast.AST] = None):
+        self.source = source
+        self.tree = tree if tree is not None else ast.parse(source)
+        self._lines = source.splitlines(keepends=True)
+        self._starts = [0]
+        for line in self._lines:
+            self._starts.append(self._starts[-1] + len(line))
+        self._splices = {}      # (start, end) -> [text, tag, seq]
+        self._moves = []        # [(start, end, dest, tag, src_col, dest_col)]
+        self._seq = 0
+
+    # ── Offsets ──────────────────────────────────────────────────
+
+    def offset(self, lineno: int, col: int) -> int:
+        """1-based line + UTF-8 byte column -> character offset."""
+        i = max(0, min(lineno - 1, len(self._lines)))
+        line = self._lines[i] if i < len(self._lines) else ''
+        if col and not line.isascii():
+            col = len(line.encode('utf-8')[:col].decode('utf-8', 'ignore'))
+        return self._starts[i] + col
+
+    def span(self, node) -> tuple:
+        return (self.offset(node.lineno, node.col_offset),
+                self.offset(getattr(node, 'end_lineno', node.lineno),
+                            getattr(node, 'end_col_offset', node.col_offset)))
+
+    def line_span(self, node) -> tuple:
+        """Whole lines covered by a statement, including the newline."""
+        first = node.lineno - 1
+        last = getattr(node, 'end_lineno', node.lineno)
+        return self._starts[first], self._starts[min(last, len(self._lines))]
+
+    def text(self, start: int, end: int) -> str:
+        return self.source[start:end]
+
+    def line_of(self, offset: int) -> int:
+        return bisect.bisect_right(self._starts, offset)
+
+    # ── Recording ────────────────────────────────────────────────
+
+    def replace(self, node_or_span, text: str, tag=None) -> None:
+        start, end = (node_or_span if isinstance(node_or_span, tuple)
+                      else self.span(node_or_span))
+        self._seq += 1
+        self._splices[(start, end)] = [text, tag, self._seq]
+
+    def insert(self, offset: int, text: str, tag=None) -> None:
+        """Insert at ``offset``. Repeated inserts at the same offset with
+        the same tag replace each other; different tags stack in order."""
+        self._seq += 1
+        key = (offset, offset, tag)
+        self._splices[key] = [text, tag, self._seq]
+
+    def move(self, stmt, before_stmt, tag=None) -> None:
+        """Move the lines of ``stmt`` to just above ``before_stmt``,
+        re-indented to the destination's indentation."""
+        start, end = self.line_span(stmt)
+        dest, _ = self.line_span(before_stmt)
+        self._moves.append((start, end, dest, tag,
+                            stmt.col_offset, before_stmt.col_offset))
+
+    # ── Commit ───────────────────────────────────────────────────
+
+    def commit(self) -> dict:
+        """Apply everything in one pass and parse the result once.
+        Returns {status, code, conflicts}; each conflict carries the
+        ``tag`` of the edit that was skipped."""
+        splices = []        # (start, end, text, tag, seq)
+        for key, (text, tag, seq) in self._splices.items():
+            splices.append((key[0], key[1], text, tag, seq))
+        conflicts = []
+
+        for start, end, dest, tag, src_indent, dest_indent in self._moves:
+            if start <= dest < end:
+                conflicts.append({'tag': tag, 'reason': 'cannot move a statement into itself'})
+                continue
+            inner = [s for s in splices if start <= s[0] and s[1] <= end
+                     and not (s[0] == s[1] == end)]
+            splices = [s for s in splices if s not in inner]
+            moved = _apply(self.source[start:end], [
+                (s[0] - start, s[1] - start, s[2], s[3], s[4]) for s in inner
+            ], conflicts)
+            if not moved.endswith('\n'):
+                moved += '\n'
+            if src_indent != dest_indent:
+                moved = _reindent(moved, src_indent, dest_indent)
+            self._seq += 1
+            splices.append((start, end, '', tag, self._seq))
+            self._seq += 1
+            splices.append((dest, dest, moved, tag, self._seq))
+
+        code = _apply(self.source, splices, conflicts)
+        try:
+            ast.parse(code)
+        except SyntaxError as e:
+            return {'status': 'error',
+                    'message': f'result would break syntax: {e}'}
+        return {'status': 'ok', 'code': code, 'conflicts': conflicts}
+
+
+def apply_splices(source: str, splices: list) -> tuple:
+    """Apply ``[(start, end, text, tag), ...]`` without parsing anything —
+    for callers that already know every replacement is a self-contained
+    literal swap. Returns (code, conflicts)."""
+    conflicts = []
+    code = _apply(source, [(s, e, t, tag, i) for i, (s, e, t, tag) in enumerate(splices)],
+                  conflicts)
+    return code, conflicts
+
+
+def _apply(source: str, splices: list, conflicts: list) -> str:
+    """Join ``source`` with non-overlapping splices in one pass. Splices
+    that overlap an earlier (already placed) one are reported and skipped."""
+    splices = sorted(splices, key=lambda s: (s[0], s[1], s[4]))
+    out = []
+    pos = 0
+    for start, end, text, tag, _ in splices:
+        if start < pos:
+            conflicts.append({'tag': tag, 'reason': 'overlaps another edit'})
+            continue
+        out.append(source[pos:start])
+        out.append(text)
+        pos = end
+    out.append(source[pos:])
+    return ''.join(out)
+
+
+def _reindent(text: str, old: int, new: int) -> str:
+    lines = text.splitlines(keepends=True)
+    if new > old:
+        pad = ' ' * (new - old)
+        return ''.join(pad + l if l.strip() else l for l in lines)
+    cut = old - new
+    return ''.join(l[cut:] if l[:cut].strip() == '' else l.lstrip() for l in lines)
+
+
+def format_number(old_text: Optional[str], value: float) -> str:
+    """Format ``value`` keeping the decimal places of the literal it
+    replaces (``1.50`` stays two decimals); whole numbers drop the point."""
+    decimals = 0
+    if old_text and '.' in old_text:
+        decimals = len(old_text.split('.')[1].rstrip('fFjJ'))
+    if decimals:
+        return f'{value:.{decimals}f}'
+    return f'{value:g}'
@@ -0,0 +1,28 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import timeline
+
+
+def test_nested_literal_loops_stop_at_step_budget():
+    source = '''
+class Nest(Scene):
+    def construct(self):
+        for i in range(400):
+            for j in range(400):
+                for k in range(50):
+                    x = i + j
+'''
+    start = time.perf_counter()
+    result = timeline.parse_string(source)
+    elapsed = time.perf_counter() - start
+
+    assert result['status'] == 'ok'
+    assert elapsed < 0.1
+    model = result['model']
+    assert model['estimated']
+    assert any(s['reason'] == 'too many steps to evaluate'
+               for s in model['unknown_spans'])
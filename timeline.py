@@ -2,14 +2,28 @@
 apply retime edits back to source.
 
 **v1 scope:**
-- Parse top-level statements inside ``construct()``; emit one track per
-  "primary mobject" of each ``self.play()`` call.
+- Statically evaluate ``construct()``; emit one track per "primary
+  mobject" of each ``self.play()`` call. Constant ``run_time`` values are
+  folded through variables, ``for`` loops with literal bounds are
+  unrolled, same-class helper methods are inlined, and
+  ``AnimationGroup`` / ``LaggedStart`` / ``Succession`` durations follow
+  manim's lag_ratio timing. Lines that can't be folded are listed in
+  ``model['unknown_spans']`` and ``model['estimated']`` is set; so is
+  the span where a parse runs out of its step budget (nested loops).
+- Results are memoized by source hash, so reparsing on every keystroke
+  is cheap.
 - Detect ``self.wait()`` and ``narrate()`` as special tracks.
-- ``apply_edits`` handles ``retime`` edits (updates ``run_time=``);
-  reorder edits are rejected with a ``unsafe`` reason.
+- ``measure`` gives a runtime-accurate alternative: one dry run of the
+  scene in the manim venv with ``Scene.play`` / ``Scene.wait`` recorded,
+  returned as the same model (``model['measured']`` is set) and cached
+  per source hash.
+- ``apply_edits`` handles ``retime`` edits (updates ``run_time=`` or the
+  wait duration) and ``reorder`` edits within one block, batched through
+  ``source_edit.EditBuffer`` (one parse, one splice pass, one check).
 
 **v1 non-scope (TODO):**
-- Reorder + dependency analysis (spec's "dirty, needs review" state).
+- Reorders across blocks / out of loops and helpers, and data-flow
+  analysis beyond plain names (spec's "dirty, needs review" state).
 - File-watcher two-way binding (caller is expected to reparse manually).
 - Camera-move / non-play tracks.
 """
@@ -17,9 +31,18 @@ apply retime edits back to source.
 from __future__ import annotations
 
 import ast
-import re
+import copy
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
 from typing import Optional
 
+from source_edit import EditBuffer, format_number
+
 
 _DEFAULT_RUN_TIME = 1.0
 _DEFAULT_WAIT = 1.0
@@ -68,19 +91,455 @@ def _animation_kind(call: ast.Call) -> str:
     return 'Play'
 
 
-def _extract_run_time(call: ast.Call) -> float:
+# ── Static evaluation ────────────────────────────────────────────
+#
+# ``construct()`` is walked like a tiny interpreter over constants: names
+# bound to literals (and arithmetic on them) are folded, ``for`` loops over
+# literal ranges/lists are unrolled, ``self.helper(...)`` calls into the
+# same class are inlined, and composite animations get manim's own timing
+# rules. Anything that cannot be folded (user input, numpy, mobject
+# attributes) becomes ``_UNKNOWN``; the statement is still walked once with
+# default durations and its lines are reported in ``unknown_spans`` so the
+# UI can show the total as an estimate.
+
+_MAX_UNROLL = 500        # Loop iterations unrolled before giving up.
+_MAX_BARS = 2000         # Bars emitted per parse (keystroke budget).
+_MAX_STEPS = 10000       # Statements + loop iterations walked per parse.
+_MAX_INLINE_DEPTH = 8    # Nested helper inlining limit.
+_CACHE_MAX = 32          # Memoized parse results, keyed by source hash.
+
+# Composite animations and their default lag_ratio (manim CE).
+_GROUP_LAG = {'AnimationGroup': 0.0, 'LaggedStart': 0.05, 'Succession': 1.0}
+
+_UNKNOWN = object()
+_SAFE_CALLS = {
+    'range': range, 'len': len, 'min': min, 'max': max, 'abs': abs,
+    'round': round, 'int': int, 'float': float, 'sum': sum,
+    'list': list, 'tuple': tuple, 'reversed': lambda x: list(reversed(x)),
+    'enumerate': lambda x, start=0: list(enumerate(x, start)),
+    'zip': lambda *xs: list(zip(*xs)),
+}
+_BIN_OPS = {
+    ast.Add: lambda a, b: a + b, ast.Sub: lambda a, b: a - b,
+    ast.Mult: lambda a, b: a * b, ast.Div: lambda a, b: a / b,
+    ast.FloorDiv: lambda a, b: a // b, ast.Mod: lambda a, b: a % b,
+    ast.Pow: lambda a, b: a ** b if abs(b) <= 64 else _UNKNOWN,
+}
+_CMP_OPS = {
+    ast.Eq: lambda a, b: a == b, ast.NotEq: lambda a, b: a != b,
+    ast.Lt: lambda a, b: a < b, ast.LtE: lambda a, b: a <= b,
+    ast.Gt: lambda a, b: a > b, ast.GtE: lambda a, b: a >= b,
+    ast.In: lambda a, b: a in b, ast.NotIn: lambda a, b: a not in b,
+}
+
+_PARSE_CACHE: dict = {}
+
+
+class _Break(Exception):
+    pass
+
+
+class _Continue(Exception):
+    pass
+
+
+class _Return(Exception):
+    pass
+
+
+def _fold(node, env: dict):
+    """Constant-fold an expression against ``env``; ``_UNKNOWN`` if it
+    depends on anything that isn't a literal."""
+    try:
+        if isinstance(node, ast.Constant):
+            return node.value
+        if isinstance(node, ast.Name):
+            return env.get(node.id, _UNKNOWN)
+        if isinstance(node, ast.Attribute):
+            chain = _attr_chain(node)
+            return env.get(chain, _UNKNOWN) if chain.startswith('self.') else _UNKNOWN
+        if isinstance(node, (ast.Tuple, ast.List)):
+            vals = [_fold(e, env) for e in node.elts]
+            if any(v is _UNKNOWN for v in vals):
+                return _UNKNOWN
+            return tuple(vals) if isinstance(node, ast.Tuple) else vals
+        if isinstance(node, ast.UnaryOp):
+            v = _fold(node.operand, env)
+            if v is _UNKNOWN:
+                return _UNKNOWN
+            if isinstance(node.op, ast.USub):
+                return -v
+            if isinstance(node.op, ast.UAdd):
+                return +v
+            if isinstance(node.op, ast.Not):
+                return not v
+            return _UNKNOWN
+        if isinstance(node, ast.BinOp):
+            op = _BIN_OPS.get(type(node.op))
+            a, b = _fold(node.left, env), _fold(node.right, env)
+            if op is None or a is _UNKNOWN or b is _UNKNOWN:
+                return _UNKNOWN
+            if isinstance(node.op, ast.Mult) and (
+                    isinstance(a, (list, tuple, str)) or isinstance(b, (list, tuple, str))):
+                seq, n = (a, b) if isinstance(b, int) else (b, a)
+                if not isinstance(n, int) or len(seq) * n > _MAX_UNROLL:
+                    return _UNKNOWN
+            return op(a, b)
+        if isinstance(node, ast.BoolOp):
+            vals = [_fold(v, env) for v in node.values]
+            if any(v is _UNKNOWN for v in vals):
+                return _UNKNOWN
+            return all(vals) if isinstance(node.op, ast.And) else any(vals)
+        if isinstance(node, ast.Compare):
+            left = _fold(node.left, env)
+            if left is _UNKNOWN:
+                return _UNKNOWN
+            for op, comp in zip(node.ops, node.comparators):
+                right = _fold(comp, env)
+                fn = _CMP_OPS.get(type(op))
+                if right is _UNKNOWN or fn is None:
+                    return _UNKNOWN
+                if not fn(left, right):
+                    return False
+                left = right
+            return True
+        if isinstance(node, ast.IfExp):
+            test = _fold(node.test, env)
+            if test is _UNKNOWN:
+                return _UNKNOWN
+            return _fold(node.body if test else node.orelse, env)
+        if isinstance(node, ast.Slice):
+            parts = [None if p is None else _fold(p, env)
+                     for p in (node.lower, node.upper, node.step)]
+            return _UNKNOWN if _UNKNOWN in parts else slice(*parts)
+        if isinstance(node, ast.Subscript):
+            base = _fold(node.value, env)
+            idx = _fold(node.slice, env)
+            if base is _UNKNOWN or idx is _UNKNOWN:
+                return _UNKNOWN
+            return base[idx]
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name):
+            fn = _SAFE_CALLS.get(node.func.id)
+            if fn is None or node.func.id in env:
+                return _UNKNOWN
+            args = [_fold(a, env) for a in node.args]
+            kwargs = {k.arg: _fold(k.value, env) for k in node.keywords if k.arg}
+            if any(a is _UNKNOWN for a in args) or any(v is _UNKNOWN for v in kwargs.values()):
+                return _UNKNOWN
+            if node.func.id == 'range' and len(range(*args)) > _MAX_UNROLL:
+                return _UNKNOWN
+            return fn(*args, **kwargs)
+    except Exception:
+        return _UNKNOWN
+    return _UNKNOWN
+
+
+def _number(value) -> Optional[float]:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    return float(value)
+
+
+def _kwarg(call: ast.Call, name: str):
     for kw in call.keywords:
-        if kw.arg == 'run_time' and isinstance(kw.value, ast.Constant) \
-                and isinstance(kw.value.value, (int, float)):
-            return float(kw.value.value)
-    return _DEFAULT_RUN_TIME
+        if kw.arg == name:
+            return kw.value
+    return None
+
+
+def _anim_duration(node, env: dict):
+    """Duration of one animation expression as (seconds, known). Follows
+    manim's AnimationGroup timing: child *i* starts at ``lag_ratio`` times
+    the summed run times of the children before it, and the group lasts
+    until its last child ends (unless ``run_time=`` overrides it)."""
+    if isinstance(node, ast.Starred):
+        inner = node.value
+        if isinstance(inner, (ast.ListComp, ast.GeneratorExp)):
+            return _anim_duration(inner.elt, env)
+        return _DEFAULT_RUN_TIME, False
+    if isinstance(node, ast.Name) and isinstance(env.get('@' + node.id), ast.Call):
+        # ``anim = Create(c); self.play(anim)`` — time the bound expression.
+        node = env['@' + node.id]
+    if not isinstance(node, ast.Call):
+        return _DEFAULT_RUN_TIME, False
+    rt_node = _kwarg(node, 'run_time')
+    if rt_node is not None:
+        rt = _number(_fold(rt_node, env))
+        if rt is None:
+            return _DEFAULT_RUN_TIME, False
+        return rt, True
+    name = _attr_chain(node.func).split('.')[-1]
+    if name in _GROUP_LAG:
+        lag = _GROUP_LAG[name]
+        known = True
+        lag_node = _kwarg(node, 'lag_ratio')
+        if lag_node is not None:
+            lag_val = _number(_fold(lag_node, env))
+            if lag_val is None:
+                known = False
+            else:
+                lag = lag_val
+        begin, end = 0.0, 0.0
+        for child in node.args:
+            if isinstance(child, ast.Starred):
+                # Unknown number of children: only one can be accounted for.
+                known = False
+            rt, child_known = _anim_duration(child, env)
+            known = known and child_known
+            end = max(end, begin + rt)
+            begin += lag * rt
+        return end, known
+    if name == 'LaggedStartMap':
+        return _DEFAULT_RUN_TIME, False
+    return _DEFAULT_RUN_TIME, True
+
+
+def _play_duration(call: ast.Call, env: dict):
+    """``self.play(...)`` lasts as long as its longest animation, unless a
+    ``run_time=`` on the play call itself overrides every animation."""
+    rt_node = _kwarg(call, 'run_time')
+    if rt_node is not None:
+        rt = _number(_fold(rt_node, env))
+        return (rt, True) if rt is not None else (_DEFAULT_RUN_TIME, False)
+    if not call.args:
+        return _DEFAULT_RUN_TIME, True
+    best, known = 0.0, True
+    for arg in call.args:
+        rt, k = _anim_duration(arg, env)
+        best = max(best, rt)
+        known = known and k
+    return best, known
+
+
+def _wait_duration(call: ast.Call, env: dict):
+    node = call.args[0] if call.args else _kwarg(call, 'duration')
+    if node is None:
+        return _DEFAULT_WAIT, True
+    rt = _number(_fold(node, env))
+    return (rt, True) if rt is not None else (_DEFAULT_WAIT, False)
+
+
+def _bind(target, value, env: dict) -> None:
+    if isinstance(target, ast.Name):
+        env[target.id] = value
+        env.pop('@' + target.id, None)
+    elif isinstance(target, ast.Attribute):
+        chain = _attr_chain(target)
+        if chain.startswith('self.'):
+            env[chain] = value
+    elif isinstance(target, (ast.Tuple, ast.List)):
+        seq = value if isinstance(value, (list, tuple)) else None
+        if seq is not None and len(seq) != len(target.elts):
+            seq = None
+        for i, elt in enumerate(target.elts):
+            _bind(elt, seq[i] if seq is not None else _UNKNOWN, env)
+
+
+class _Walker:
+    """Evaluates a construct() body into timeline bars."""
+
+    def __init__(self, methods: dict):
+        self.methods = methods
+        self.cursor = 0.0
+        self.bar_seq = 0
+        self.tracks = {}
+        self.unknown = []       # [{line, end_line, reason}]
+        self.truncated = False
+        self.steps = 0          # charged against _MAX_STEPS
+        self.exhausted = False
+        self.via = []           # helper call stack (method names)
+
+    def _charge(self, node) -> bool:
+        """Spend one step of the per-parse budget on *node*. Nested literal
+        loops multiply, so the walk stops once the budget is gone and the
+        rest of the timeline is reported as an estimate."""
+        if self.exhausted or self.truncated:
+            return False
+        self.steps += 1
+        if self.steps > _MAX_STEPS:
+            self.exhausted = True
+            self._mark_unknown(node, 'too many steps to evaluate')
+            return False
+        return True
+
+    def _mark_unknown(self, node, reason: str) -> None:
+        span = {'line': node.lineno,
+                'end_line': getattr(node, 'end_lineno', node.lineno),
+                'reason': reason}
+        if span not in self.unknown:
+            self.unknown.append(span)
+
+    def _add_bar(self, track: dict, bar: dict) -> None:
+        if self.bar_seq >= _MAX_BARS:
+            self.truncated = True
+            return
+        bar['id'] = f'b{self.bar_seq}'
+        self.bar_seq += 1
+        bar['via'] = '.'.join(self.via)
+        self.tracks.setdefault(track['id'], track)['bars'].append(bar)
+
+    def run(self, stmts: list, env: dict) -> None:
+        for stmt in stmts:
+            if not self._charge(stmt):
+                return
+            self.stmt(stmt, env)
+
+    def stmt(self, stmt, env: dict) -> None:
+        if isinstance(stmt, ast.Expr) and isinstance(stmt.value, ast.Call):
+            self.call(stmt, stmt.value, env)
+        elif isinstance(stmt, ast.Assign):
+            value = _fold(stmt.value, env)
+            for target in stmt.targets:
+                _bind(target, value, env)
+                if isinstance(target, ast.Name) and isinstance(stmt.value, ast.Call):
+                    env['@' + target.id] = stmt.value
+        elif isinstance(stmt, ast.AnnAssign) and stmt.value is not None:
+            _bind(stmt.target, _fold(stmt.value, env), env)
+        elif isinstance(stmt, ast.AugAssign):
+            cur = _fold(stmt.target, env)
+            rhs = _fold(stmt.value, env)
+            op = _BIN_OPS.get(type(stmt.op))
+            value = _UNKNOWN
+            if op and cur is not _UNKNOWN and rhs is not _UNKNOWN:
+                try:
+                    value = op(cur, rhs)
+                except Exception:
+                    value = _UNKNOWN
+            _bind(stmt.target, value, env)
+        elif isinstance(stmt, ast.For):
+            self.loop(stmt, env)
+        elif isinstance(stmt, ast.While):
+            self._mark_unknown(stmt, 'while loop')
+            self.body_once(stmt.body, env)
+        elif isinstance(stmt, ast.If):
+            test = _fold(stmt.test, env)
+            if test is _UNKNOWN:
+                self._mark_unknown(stmt, 'condition')
+                self.run(stmt.body, env)
+            else:
+                self.run(stmt.body if test else stmt.orelse, env)
+        elif isinstance(stmt, (ast.With, ast.AsyncWith)):
+            self.run(stmt.body, env)
+        elif isinstance(stmt, ast.Try):
+            self.run(stmt.body, env)
+            self.run(stmt.finalbody, env)
+        elif isinstance(stmt, ast.Break):
+            raise _Break()
+        elif isinstance(stmt, ast.Continue):
+            raise _Continue()
+        elif isinstance(stmt, ast.Return):
+            raise _Return()
+
+    def body_once(self, body: list, env: dict) -> None:
+        try:
+            self.run(body, env)
+        except (_Break, _Continue):
+            pass
+
+    def loop(self, stmt: ast.For, env: dict) -> None:
+        items = _fold(stmt.iter, env)
+        if items is _UNKNOWN or not hasattr(items, '__iter__'):
+            self._mark_unknown(stmt, 'loop bound')
+            _bind(stmt.target, _UNKNOWN, env)
+            self.body_once(stmt.body, env)
+            return
+        items = list(items)
+        if len(items) > _MAX_UNROLL:
+            self._mark_unknown(stmt, 'loop too long to unroll')
+            items = items[:1]
+        for item in items:
+            if not self._charge(stmt):
+                return
+            _bind(stmt.target, item, env)
+            try:
+                self.run(stmt.body, env)
+            except _Continue:
+                continue
+            except _Break:
+                return
+        self.run(stmt.orelse, env)
+
+    def call(self, stmt, call: ast.Call, env: dict) -> None:
+        attr = _attr_chain(call.func)
+        line = stmt.lineno
+        end_line = getattr(stmt, 'end_lineno', stmt.lineno)
+        if attr.endswith('.play'):
+            obj = _primary_mobject(call)
+            rt, known = _play_duration(call, env)
+            if not known:
+                self._mark_unknown(stmt, 'run_time')
+            self._add_bar({'id': f'mo:{obj}', 'label': obj, 'bars': [],
+                           'kind': 'mobject'}, {
+                'kind': _animation_kind(call),
+                'start': round(self.cursor, 3), 'run_time': round(rt, 3),
+                'line': line, 'call_col': call.col_offset,
+                'end_line': end_line, 'estimated': not known,
+            })
+            self.cursor += rt
+        elif attr.endswith('.wait'):
+            wt, known = _wait_duration(call, env)
+            if not known:
+                self._mark_unknown(stmt, 'wait duration')
+            self._add_bar({'id': 'wait', 'label': '⟨wait⟩', 'bars': [],
+                           'kind': 'wait'}, {
+                'kind': 'Wait',
+                'start': round(self.cursor, 3), 'run_time': round(wt, 3),
+                'line': line, 'end_line': end_line, 'estimated': not known,
+            })
+            self.cursor += wt
+        elif attr == 'narrate' or attr.endswith('.narrate'):
+            self._add_bar({'id': 'narrate', 'label': '⟨narrate⟩', 'bars': [],
+                           'kind': 'narrate'}, {
+                'kind': 'Narrate',
+                'start': round(self.cursor, 3), 'run_time': 0.0,
+                'line': line, 'end_line': end_line, 'estimated': False,
+            })
+        elif attr.startswith('self.') and attr.count('.') == 1:
+            self.inline(stmt, call, attr[5:], env)
+
+    def inline(self, stmt, call: ast.Call, name: str, env: dict) -> None:
+        """Walk a same-class helper in place of ``self.name(...)``."""
+        method = self.methods.get(name)
+        if method is None or name == 'construct':
+            return
+        if len(self.via) >= _MAX_INLINE_DEPTH or name in self.via:
+            self._mark_unknown(stmt, 'recursive helper')
+            return
+        # Fresh local scope: parameters bound from the call, plus the
+        # self.* state shared with the caller.
+        local = {k: v for k, v in env.items() if k.startswith('self.')}
+        params = method.args.args[1:]        # drop ``self``
+        defaults = method.args.defaults
+        offset = len(params) - len(defaults)
+        for i, p in enumerate(params):
+            local[p.arg] = _fold(defaults[i - offset], env) if i >= offset else _UNKNOWN
+        for p, a in zip(params, call.args):
+            local[p.arg] = _UNKNOWN if isinstance(a, ast.Starred) else _fold(a, env)
+        for kw in call.keywords:
+            if kw.arg:
+                local[kw.arg] = _fold(kw.value, env)
+        self.via.append(name)
+        try:
+            self.run(method.body, local)
+        except (_Return, _Break, _Continue):
+            pass
+        finally:
+            self.via.pop()
+        for k, v in local.items():
+            if k.startswith('self.'):
+                env[k] = v
 
 
-def _extract_wait_duration(call: ast.Call) -> float:
-    if call.args and isinstance(call.args[0], ast.Constant) \
-            and isinstance(call.args[0].value, (int, float)):
-        return float(call.args[0].value)
-    return _DEFAULT_WAIT
+def _class_env(cls: ast.ClassDef) -> dict:
+    """Class-level constant attributes, visible as ``self.NAME``."""
+    env = {}
+    for node in cls.body:
+        if isinstance(node, ast.Assign):
+            value = _fold(node.value, env)
+            for target in node.targets:
+                if isinstance(target, ast.Name):
+                    env[target.id] = value
+    return {f'self.{k}': v for k, v in env.items()}
 
 
 def parse(scene_file: str, scene_name: Optional[str] = None) -> dict:
@@ -90,7 +549,10 @@ def parse(scene_file: str, scene_name: Optional[str] = None) -> dict:
             source = f.read()
     except OSError as e:
         return {'status': 'error', 'message': str(e)}
+    return parse_string(source, scene_name)
 
+
+def _parse_source(source: str, scene_name: Optional[str]) -> dict:
     try:
         tree = ast.parse(source)
     except SyntaxError as e:
@@ -109,286 +571,457 @@ def parse(scene_file: str, scene_name: Optional[str] = None) -> dict:
                 break
     if cls is None:
         return {'status': 'error', 'message': 'no Scene class with construct()'}
-    construct = next((m for m in cls.body if isinstance(m, ast.FunctionDef)
-                      and m.name == 'construct'), None)
+    methods = {m.name: m for m in cls.body if isinstance(m, ast.FunctionDef)}
+    construct = methods.get('construct')
     if not construct:
         return {'status': 'error', 'message': 'no construct()'}
 
-    # Walk top-level statements.
-    cursor = 0.0
-    bar_seq = 0
-    tracks = {}  # id -> {label, kind, bars}
-    for stmt in construct.body:
-        if not (isinstance(stmt, ast.Expr) and isinstance(stmt.value, ast.Call)):
-            continue
-        call = stmt.value
-        attr = _attr_chain(call.func)
-        if attr.endswith('.play'):
-            obj = _primary_mobject(call)
-            kind = _animation_kind(call)
-            rt = _extract_run_time(call)
-            bar_id = f'b{bar_seq}'
-            bar_seq += 1
-            track_id = f'mo:{obj}'
-            tracks.setdefault(track_id, {
-                'id': track_id, 'label': obj, 'bars': [], 'kind': 'mobject',
-            })
-            tracks[track_id]['bars'].append({
-                'id': bar_id, 'kind': kind,
-                'start': round(cursor, 3), 'run_time': rt,
-                'line': stmt.lineno,
-                'call_col': call.col_offset,
-                'end_line': getattr(stmt, 'end_lineno', stmt.lineno),
-            })
-            cursor += rt
-        elif attr.endswith('.wait'):
-            wt = _extract_wait_duration(call)
-            bar_id = f'b{bar_seq}'
-            bar_seq += 1
-            tracks.setdefault('wait', {'id': 'wait', 'label': '⟨wait⟩',
-                                        'bars': [], 'kind': 'wait'})
-            tracks['wait']['bars'].append({
-                'id': bar_id, 'kind': 'Wait',
-                'start': round(cursor, 3), 'run_time': wt,
-                'line': stmt.lineno,
-                'end_line': getattr(stmt, 'end_lineno', stmt.lineno),
-            })
-            cursor += wt
-        elif attr == 'narrate' or attr.endswith('.narrate'):
-            bar_id = f'b{bar_seq}'
-            bar_seq += 1
-            tracks.setdefault('narrate', {'id': 'narrate',
-                                           'label': '⟨narrate⟩',
-                                           'bars': [], 'kind': 'narrate'})
-            tracks['narrate']['bars'].append({
-                'id': bar_id, 'kind': 'Narrate',
-                'start': round(cursor, 3), 'run_time': 0.0,
-                'line': stmt.lineno,
-                'end_line': getattr(stmt, 'end_lineno', stmt.lineno),
-            })
+    walker = _Walker(methods)
+    try:
+        walker.run(construct.body, _class_env(cls))
+    except (_Return, _Break, _Continue):
+        pass
 
     return {
         'status': 'ok',
         'model': {
             'scene': cls.name,
-            'total_duration': round(cursor, 3),
-            'tracks': list(tracks.values()),
+            'total_duration': round(walker.cursor, 3),
+            'tracks': list(walker.tracks.values()),
+            # Lines whose timing could not be folded to constants; when
+            # non-empty, total_duration is an estimate.
+            'unknown_spans': walker.unknown,
+            'estimated': (bool(walker.unknown) or walker.truncated
+                          or walker.exhausted),
+            'truncated': walker.truncated,
         },
     }
 
 
-# ── Retime mutation ──────────────────────────────────────────────
+def parse_string(source: str, scene_name: Optional[str] = None) -> dict:
+    """Same as ``parse`` but takes the source code directly instead of a
+    file path. Lets the caller work with an unsaved editor buffer with
+    no disk I/O. Results are memoized by source hash, so re-parsing an
+    unchanged buffer on every keystroke is a dictionary lookup."""
+    key = hashlib.sha1(f'{scene_name or ""}\0{source}'.encode('utf-8')).hexdigest()
+    hit = _PARSE_CACHE.pop(key, None)
+    if hit is None:
+        hit = _parse_source(source, scene_name)
+    _PARSE_CACHE[key] = hit
+    while len(_PARSE_CACHE) > _CACHE_MAX:
+        _PARSE_CACHE.pop(next(iter(_PARSE_CACHE)))
+    return copy.deepcopy(hit)
 
-_RUNTIME_KW = re.compile(r'run_time\s*=\s*([\d]+(?:\.\d+)?)')
-_WAIT_CALL = re.compile(r'self\.wait\s*\(\s*([\d]+(?:\.\d+)?)?\s*\)')
 
+# ── Measured model ───────────────────────────────────────────────
+#
+# For scenes too dynamic to fold statically, ``measure`` runs the scene
+# once inside the manim venv with animations skipped and ``Scene.play`` /
+# ``Scene.wait`` wrapped to record what actually happened. The result is
+# turned into the same {tracks, bars} model as ``parse`` and cached per
+# source hash (memory + ~/.manim_studio/timeline/), so the panel can show
+# exact timings without a render.
 
-def _rewrite_line_run_time(line: str, new_rt: float) -> Optional[str]:
-    """Mutate a `run_time=X` kwarg on this line, preserving decimals.
-    Returns the new line or None if the pattern wasn't found."""
-    m = _RUNTIME_KW.search(line)
-    if not m:
-        return None
-    old = m.group(1)
-    decimals = len(old.split('.')[1]) if '.' in old else 0
-    new_val = f'{new_rt:.{max(decimals, 1)}f}' if decimals else f'{int(round(new_rt))}'
-    return line[:m.start(1)] + new_val + line[m.end(1):]
+_MEASURE_TIMEOUT = 120
+_MEASURED: dict = {}
+_MEASURE_MARKER = '__TIMELINE_MEASURE__'
+
+# Executed by the venv Python. Reads {path, scene, media_dir} on stdin and
+# prints one marker-prefixed JSON line with the recorded calls.
+_MEASURE_SCRIPT = r'''
+import sys, json, os, importlib.util, traceback
+
+data = json.loads(sys.stdin.read())
+path = os.path.abspath(data["path"])
+calls = []
+cursor = [0.0]
+depth = [0]     # Scene.wait plays a Wait internally; record outer calls only
+
+def _out(obj):
+    sys.stdout.write("__TIMELINE_MEASURE__" + json.dumps(obj) + "\n")
+    sys.stdout.flush()
+
+try:
+    from manim import Scene, tempconfig
+except Exception as e:
+    _out({"ok": False, "error": "manim import failed: %s" % e})
+    sys.exit(0)
+
+def _caller():
+    """Innermost frame in the scene file: its line, the method it is in,
+    and the locals used to name target mobjects."""
+    f = sys._getframe(2)
+    while f is not None:
+        if os.path.abspath(f.f_code.co_filename) == path:
+            return f.f_lineno, f.f_code.co_name, f.f_locals
+        f = f.f_back
+    return 0, "", {}
+
+def _name(mob, local_vars):
+    for k, v in local_vars.items():
+        if v is mob and k != "self":
+            return k
+    return type(mob).__name__ if mob is not None else "anonymous"
+
+_orig_play = Scene.play
+_orig_wait = Scene.wait
+
+def play(self, *args, **kwargs):
+    line, func, local_vars = _caller()
+    depth[0] += 1
+    try:
+        _orig_play(self, *args, **kwargs)
+    finally:
+        depth[0] -= 1
+    if depth[0]:
+        return
+    anims = list(getattr(self, "animations", None) or [])
+    rt = float(getattr(self, "duration", 0.0) or 0.0)
+    if not rt and anims:
+        rt = max(float(getattr(a, "run_time", 0.0) or 0.0) for a in anims)
+    target = _name(getattr(anims[0], "mobject", None), local_vars) if anims else "anonymous"
+    calls.append({"kind": "play", "start": cursor[0], "run_time": rt,
+                  "anims": [type(a).__name__ for a in anims],
+                  "target": target, "line": line, "via": func})
+    cursor[0] += rt
+
+def wait(self, duration=1.0, *args, **kwargs):
+    line, func, _ = _caller()
+    depth[0] += 1
+    try:
+        _orig_wait(self, duration, *args, **kwargs)
+    finally:
+        depth[0] -= 1
+    if depth[0]:
+        return
+    rt = float(getattr(self, "duration", duration) or duration)
+    calls.append({"kind": "wait", "start": cursor[0], "run_time": rt,
+                  "anims": ["Wait"], "target": "", "line": line, "via": func,
+                  "conditional": bool(args or kwargs.get("stop_condition"))})
+    cursor[0] += rt
+
+Scene.play = play
+Scene.wait = wait
+
+try:
+    sys.path.insert(0, os.path.dirname(path))
+    spec = importlib.util.spec_from_file_location("_timeline_scene", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    cls = getattr(module, data["scene"])
+    with tempconfig({"dry_run": True, "disable_caching": True,
+                     "media_dir": data["media_dir"], "verbosity": "ERROR",
+                     "progress_bar": "none"}):
+        try:
+            scene = cls(skip_animations=True)
+        except TypeError:
+            scene = cls()
+        scene.render()
+    _out({"ok": True, "calls": calls})
+except Exception as e:
+    _out({"ok": False, "error": "%s: %s" % (type(e).__name__, e),
+          "calls": calls, "trace": traceback.format_exc()[-2000:]})
+'''
 
 
-def _rewrite_line_wait(line: str, new_rt: float) -> Optional[str]:
-    """Mutate `self.wait(...)` on this line."""
-    m = _WAIT_CALL.search(line)
-    if not m:
+def _measure_dir() -> str:
+    d = os.path.join(os.path.expanduser('~'), '.manim_studio', 'timeline')
+    os.makedirs(d, exist_ok=True)
+    return d
+
+
+def _scene_for(source: str, scene_name: Optional[str]) -> Optional[str]:
+    """Pick the scene the same way ``parse`` does."""
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
         return None
-    old = m.group(1)
-    decimals = len(old.split('.')[1]) if old and '.' in old else 0
-    new_val = f'{new_rt:.{max(decimals, 1)}f}' if decimals else f'{new_rt:g}'
-    if old is None:
-        return line[:m.end(0) - 1] + f'{new_val}' + line[m.end(0) - 1:]
-    return line[:m.start(1)] + new_val + line[m.end(1):]
+    classes = [n for n in ast.walk(tree) if isinstance(n, ast.ClassDef)]
+    if scene_name and any(c.name == scene_name for c in classes):
+        return scene_name
+    for c in classes:
+        if any(isinstance(m, ast.FunctionDef) and m.name == 'construct'
+               for m in c.body):
+            return c.name
+    return None
 
 
-def parse_string(source: str, scene_name: Optional[str] = None) -> dict:
-    """Same as ``parse`` but takes the source code directly instead of a
-    file path. Lets the caller work with an unsaved editor buffer with
-    no disk I/O."""
-    import tempfile, os as _os
-    fd, p = tempfile.mkstemp(suffix='.py')
+def _call_spans(source: str) -> dict:
+    """lineno -> (end_lineno, col) of every call statement, so measured
+    bars carry the same edit anchors as parsed ones."""
+    spans = {}
+    for node in ast.walk(ast.parse(source)):
+        if isinstance(node, ast.Expr) and isinstance(node.value, ast.Call):
+            spans[node.lineno] = (getattr(node, 'end_lineno', node.lineno),
+                                  node.value.col_offset)
+    return spans
+
+
+def _measured_model(scene: str, calls: list, source: str) -> dict:
+    spans = _call_spans(source)
+    tracks = {}
+    cursor = 0.0
+    for i, c in enumerate(calls):
+        end_line, col = spans.get(c.get('line', 0), (c.get('line', 0), 0))
+        via = c.get('via', '')
+        bar = {
+            'id': f'b{i}',
+            'start': round(c['start'], 3),
+            'run_time': round(c['run_time'], 3),
+            'line': c.get('line', 0), 'end_line': end_line,
+            'via': '' if via == 'construct' else via,
+            'estimated': bool(c.get('conditional')),
+        }
+        if c['kind'] == 'wait':
+            bar['kind'] = 'Wait'
+            tracks.setdefault('wait', {'id': 'wait', 'label': '⟨wait⟩',
+                                       'bars': [], 'kind': 'wait'})['bars'].append(bar)
+        else:
+            anims = c.get('anims') or ['Play']
+            bar['kind'] = anims[0] if len(anims) == 1 else 'AnimationGroup'
+            bar['animations'] = anims
+            bar['call_col'] = col
+            obj = c.get('target') or 'anonymous'
+            tracks.setdefault(f'mo:{obj}', {'id': f'mo:{obj}', 'label': obj,
+                                            'bars': [], 'kind': 'mobject'})['bars'].append(bar)
+        cursor = max(cursor, c['start'] + c['run_time'])
+    return {
+        'scene': scene,
+        'total_duration': round(cursor, 3),
+        'tracks': list(tracks.values()),
+        'unknown_spans': [],
+        'estimated': any(b['estimated'] for t in tracks.values() for b in t['bars']),
+        'truncated': False,
+        'measured': True,
+    }
+
+
+def measure(source: str, scene_name: Optional[str] = None,
+            python_exe: Optional[str] = None, env: Optional[dict] = None,
+            timeout: float = _MEASURE_TIMEOUT, refresh: bool = False) -> dict:
+    """Run the scene once with animations skipped and return the measured
+    {tracks, bars} model: {status, model?, message?}. ``python_exe`` must
+    be an interpreter with manim installed (the app passes its venv).
+    Cached per source hash unless ``refresh`` is set."""
+    scene = _scene_for(source, scene_name)
+    if scene is None:
+        return {'status': 'error', 'message': 'no Scene class with construct()'}
+    key = hashlib.sha1(f'{scene}\0{source}'.encode('utf-8')).hexdigest()
+    cache_file = os.path.join(_measure_dir(), key + '.json')
+    if not refresh:
+        hit = _MEASURED.get(key)
+        if hit is None:
+            try:
+                with open(cache_file, 'r', encoding='utf-8') as f:
+                    hit = json.load(f)
+            except (OSError, ValueError):
+                hit = None
+        if hit is not None:
+            _MEASURED[key] = hit
+            return {'status': 'ok', 'model': copy.deepcopy(hit), 'cached': True}
+
+    work = tempfile.mkdtemp(prefix='timeline_measure_')
     try:
-        with _os.fdopen(fd, 'w', encoding='utf-8') as f:
+        path = os.path.join(work, 'scene.py')
+        with open(path, 'w', encoding='utf-8') as f:
             f.write(source)
-        return parse(p, scene_name)
+        payload = json.dumps({'path': path, 'scene': scene,
+                              'media_dir': os.path.join(work, 'media')})
+        try:
+            proc = subprocess.run(
+                [python_exe or sys.executable, '-c', _MEASURE_SCRIPT],
+                input=payload, capture_output=True, text=True,
+                encoding='utf-8', errors='replace', timeout=timeout,
+                env=env, cwd=work,
+                creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0,
+            )
+        except subprocess.TimeoutExpired:
+            return {'status': 'error', 'message': f'dry run timed out after {timeout:g}s'}
+        except OSError as e:
+            return {'status': 'error', 'message': str(e)}
     finally:
-        try: _os.unlink(p)
-        except OSError: pass
+        shutil.rmtree(work, ignore_errors=True)
+
+    result = None
+    for line in proc.stdout.splitlines():
+        if line.startswith(_MEASURE_MARKER):
+            try:
+                result = json.loads(line[len(_MEASURE_MARKER):])
+            except ValueError:
+                pass
+    if result is None:
+        tail = (proc.stderr or proc.stdout or '').strip()[-500:]
+        return {'status': 'error', 'message': f'dry run produced no result: {tail}'}
+    if not result.get('ok'):
+        return {'status': 'error', 'message': result.get('error', 'dry run failed')}
+
+    model = _measured_model(scene, result.get('calls') or [], source)
+    _MEASURED[key] = model
+    while len(_MEASURED) > _CACHE_MAX:
+        _MEASURED.pop(next(iter(_MEASURED)))
+    try:
+        with open(cache_file, 'w', encoding='utf-8') as f:
+            json.dump(model, f)
+    except OSError:
+        pass
+    return {'status': 'ok', 'model': copy.deepcopy(model), 'cached': False}
+
+
+# ── Retime / reorder mutation ────────────────────────────────────
+#
+# All edits in a batch go through one source_edit.EditBuffer: the source
+# is parsed once, each edit becomes a splice on an AST node, and the
+# result is joined and syntax-checked once.
+
+def _statement_index(tree) -> dict:
+    """lineno -> (stmt, parent body) for every call statement, so a bar's
+    line leads straight to the node it was built from."""
+    index = {}
+    for node in ast.walk(tree):
+        for field in ('body', 'orelse', 'finalbody'):
+            body = getattr(node, field, None)
+            if not isinstance(body, list):
+                continue
+            for stmt in body:
+                if isinstance(stmt, ast.Expr) and isinstance(stmt.value, ast.Call):
+                    index.setdefault(stmt.lineno, (stmt, body))
+    return index
+
+
+def _names(node, ctx) -> set:
+    return {n.id for n in ast.walk(node)
+            if isinstance(n, ast.Name) and isinstance(n.ctx, ctx)}
+
+
+def _retime(buf, call: ast.Call, is_wait: bool, rt: float, tag) -> Optional[str]:
+    """Record a duration change on ``call``. Returns a rejection reason
+    or None."""
+    if is_wait:
+        node = call.args[0] if call.args else _kwarg(call, 'duration')
+    else:
+        node = _kwarg(call, 'run_time')
+    if node is not None:
+        if not (isinstance(node, ast.Constant) and _number(node.value) is not None):
+            return 'duration is an expression'
+        start, end = buf.span(node)
+        buf.replace((start, end), format_number(buf.text(start, end), rt), tag)
+        return None
+    # No duration yet: add one just before the call's closing paren.
+    _, close = buf.span(call)
+    close -= 1
+    before = buf.text(buf.span(call.func)[1], close).rstrip()
+    new_text = format_number(None, rt) if is_wait else f'run_time={format_number(None, rt)}'
+    if not before.endswith(('(', ',')):
+        new_text = ', ' + new_text
+    buf.insert(close, new_text, tag)
+    return None
 
 
 def apply_edits_to_source(source: str, edits: list) -> dict:
-    """Pure-string variant of ``apply_edits``. Applies retime edits to
-    the given source code, returns ``{status, code, applied, rejected}``
-    with the updated code. No disk I/O. Use this when the caller is
-    already managing the editor buffer."""
+    """Pure-string variant of ``apply_edits``. Applies the edits to the
+    given source code, returns ``{status, code, applied, rejected}`` with
+    the updated code. No disk I/O. Use this when the caller is already
+    managing the editor buffer."""
     parse_res = parse_string(source)
     if parse_res.get('status') != 'ok':
         return parse_res
     model = parse_res['model']
 
     bars = {}
+    line_uses = {}
     for t in model['tracks']:
         for b in t['bars']:
             bars[b['id']] = (b, t)
+            line_uses[b['line']] = line_uses.get(b['line'], 0) + 1
 
-    lines = source.split('\n')
-    applied = 0
+    try:
+        buf = EditBuffer(source)
+    except SyntaxError as e:
+        return {'status': 'error', 'message': f'syntax error: {e}'}
+    stmts = _statement_index(buf.tree)
+
+    # Edits are tracked (and tagged in the buffer) by position, so two
+    # edits to the same bar count as two.
+    accepted = set()
     rejected = []
-    for edit in edits or []:
+    for n, edit in enumerate(edits or []):
         bid = edit.get('id')
         kind = edit.get('kind')
         bar_info = bars.get(bid)
         if not bar_info:
             rejected.append({'id': bid, 'reason': 'bar not found'}); continue
         bar, track = bar_info
+        found = stmts.get(bar['line'])
+        if not found:
+            rejected.append({'id': bid, 'reason': 'call not found'}); continue
+        stmt, body = found
         if kind == 'retime':
             try:
                 rt = float(edit.get('run_time', bar['run_time']))
             except (TypeError, ValueError):
                 rejected.append({'id': bid, 'reason': 'invalid run_time'}); continue
-            line_idx = bar['line'] - 1
-            if line_idx < 0 or line_idx >= len(lines):
-                rejected.append({'id': bid, 'reason': 'line out of range'}); continue
-            if track['kind'] == 'wait':
-                new_line = _rewrite_line_wait(lines[line_idx], rt)
-                if new_line is None:
-                    rejected.append({'id': bid, 'reason': 'pattern not found'}); continue
-                lines[line_idx] = new_line
-                applied += 1
-            else:
-                end = bar.get('end_line', bar['line'])
-                placed = False
-                for i in range(line_idx, min(len(lines), end)):
-                    nl = _rewrite_line_run_time(lines[i], rt)
-                    if nl is not None:
-                        lines[i] = nl
-                        placed = True; break
-                if not placed:
-                    nl = _append_run_time_kwarg(lines, line_idx, end, rt)
-                    if nl is None:
-                        rejected.append({'id': bid, 'reason': 'cannot place run_time'}); continue
-                applied += 1
+            if line_uses[bar['line']] > 1:
+                # One literal drives every iteration/call; editing it would
+                # silently retime all of them.
+                rejected.append({'id': bid, 'reason': 'call runs more than once (loop or helper); '
+                                                      'its duration is shared by every run'}); continue
+            reason = _retime(buf, stmt.value, track['kind'] == 'wait', rt, n)
+            if reason:
+                rejected.append({'id': bid, 'reason': reason}); continue
+            accepted.add(n)
         elif kind == 'reorder':
-            rejected.append({'id': bid, 'reason': 'reorder not supported in v1'})
+            other = bars.get(edit.get('before'))
+            dest = stmts.get(other[0]['line']) if other else None
+            if not dest:
+                rejected.append({'id': bid, 'reason': 'target bar not found'}); continue
+            dest_stmt, dest_body = dest
+            if dest_body is not body:
+                rejected.append({'id': bid, 'reason': 'bars are in different blocks'}); continue
+            if line_uses[bar['line']] > 1 or line_uses[other[0]['line']] > 1:
+                rejected.append({'id': bid, 'reason': 'call runs more than once (loop or helper)'}); continue
+            i, j = body.index(stmt), body.index(dest_stmt)
+            between = body[j:i] if j < i else body[i + 1:j]
+            used = _names(stmt, ast.Load)
+            clash = sorted(used & set().union(*(_names(s, ast.Store) for s in between))) \
+                if between else []
+            if clash:
+                rejected.append({'id': bid, 'reason': f'depends on {", ".join(clash)}'}); continue
+            buf.move(stmt, dest_stmt, n)
+            accepted.add(n)
         else:
             rejected.append({'id': bid, 'reason': f'unknown kind: {kind}'})
 
-    new_source = '\n'.join(lines)
-    try:
-        ast.parse(new_source)
-    except SyntaxError as e:
-        return {'status': 'error', 'message': f'result would break syntax: {e}'}
-    return {'status': 'ok', 'code': new_source,
-            'applied': applied, 'rejected': rejected}
+    res = buf.commit()
+    if res.get('status') != 'ok':
+        return res
+    for c in res['conflicts']:
+        accepted.discard(c['tag'])
+        rejected.append({'id': edits[c['tag']].get('id'), 'reason': c['reason']})
+    return {'status': 'ok', 'code': res['code'],
+            'applied': len(accepted), 'rejected': rejected}
 
 
 def apply_edits(scene_file: str, edits: list) -> dict:
     """Apply a list of edits. Each edit is:
         {id, kind: 'retime', run_time: float}    — updates `run_time=` or wait arg
-        {id, kind: 'reorder', ...}               — v1 rejects (needs dep check)
+        {id, kind: 'reorder', before: bar_id}    — moves the call above another
     ``id`` matches the ``bar.id`` returned by ``parse()``; callers MUST
-    reparse after applying because bar IDs are regenerated each parse."""
-    parse_res = parse(scene_file)
-    if parse_res.get('status') != 'ok':
-        return parse_res
-    model = parse_res['model']
-
-    # Build an id → bar map for O(1) lookup.
-    bars = {}
-    for t in model['tracks']:
-        for b in t['bars']:
-            bars[b['id']] = (b, t)
-
+    reparse after applying because bar IDs are regenerated each parse.
+    Retimes are only accepted for calls that run once (a loop body or
+    helper shares one literal across runs). Reorders are only accepted
+    between calls in the same block that run once, and never across a
+    statement that assigns a name the moved call uses."""
     try:
         with open(scene_file, 'r', encoding='utf-8') as f:
             source = f.read()
     except OSError as e:
         return {'status': 'error', 'message': str(e)}
-    lines = source.split('\n')
-
-    applied = 0
-    rejected = []
-    for edit in edits or []:
-        bid = edit.get('id')
-        kind = edit.get('kind')
-        bar_info = bars.get(bid)
-        if not bar_info:
-            rejected.append({'id': bid, 'reason': 'bar not found'})
-            continue
-        bar, track = bar_info
-        if kind == 'retime':
-            try:
-                rt = float(edit.get('run_time', bar['run_time']))
-            except (TypeError, ValueError):
-                rejected.append({'id': bid, 'reason': 'invalid run_time'})
-                continue
-            line_idx = bar['line'] - 1
-            if line_idx < 0 or line_idx >= len(lines):
-                rejected.append({'id': bid, 'reason': 'line out of range'})
-                continue
-            if track['kind'] == 'wait':
-                new_line = _rewrite_line_wait(lines[line_idx], rt)
-            else:
-                # Multi-line play calls: search forward for run_time= until
-                # the call's end line. If not present, append ", run_time=X".
-                new_line = None
-                end = bar.get('end_line', bar['line'])
-                for i in range(line_idx, min(len(lines), end)):
-                    nl = _rewrite_line_run_time(lines[i], rt)
-                    if nl is not None:
-                        lines[i] = nl
-                        new_line = nl
-                        break
-                if new_line is None:
-                    new_line = _append_run_time_kwarg(lines, line_idx, end, rt)
-                    if new_line is None:
-                        rejected.append({'id': bid, 'reason': 'cannot place run_time'})
-                        continue
-                applied += 1
-                continue
-            if new_line is None:
-                rejected.append({'id': bid, 'reason': 'pattern not found'})
-                continue
-            lines[line_idx] = new_line
-            applied += 1
-        elif kind == 'reorder':
-            rejected.append({'id': bid, 'reason': 'reorder not supported in v1'})
-        else:
-            rejected.append({'id': bid, 'reason': f'unknown kind: {kind}'})
-
-    new_source = '\n'.join(lines)
-    try:
-        ast.parse(new_source)
-    except SyntaxError as e:
-        return {'status': 'error', 'message': f'result would break: {e}'}
+    res = apply_edits_to_source(source, edits)
+    if res.get('status') != 'ok':
+        return res
     try:
         with open(scene_file, 'w', encoding='utf-8') as f:
-            f.write(new_source)
+            f.write(res['code'])
     except OSError as e:
         return {'status': 'error', 'message': str(e)}
-
-    return {'status': 'ok', 'applied': applied, 'rejected': rejected}
-
-
-def _append_run_time_kwarg(lines: list, start: int, end: int,
-                           rt: float) -> Optional[str]:
-    """Append ``, run_time=X`` before the closing paren of a play call
-    spanning lines[start:end]. Returns the modified line or None."""
-    # Locate the final `)` of the call.
-    for i in range(min(end - 1, len(lines) - 1), start - 1, -1):
-        idx = lines[i].rfind(')')
-        if idx >= 0:
-            before = lines[i][:idx].rstrip()
-            # Avoid leaving "foo(, run_time=X)" — check if there's a prior arg.
-            needs_comma = before and not before.endswith('(')
-            sep = ', ' if needs_comma else ''
-            lines[i] = lines[i][:idx] + f'{sep}run_time={rt:g}' + lines[i][idx:]
-            return lines[i]
-    return None
+    return {'status': 'ok', 'applied': res['applied'], 'rejected': res['rejected']}
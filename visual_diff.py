@@ -6,22 +6,73 @@ Hash every frame of every render; compare successive renders; flag drift.
 Layout:
 
     <user_data>/.manim_studio/renders/
+        manifest.jsonl     # append-only index: one JSON event per line
+        manifest.lock      # advisory lock held by manifest writers
         <render_id>/
-            meta.json      # {video_path, created_at, scene_file, status, baseline_id}
-            frames.json    # {"hashes": ["<hex64>", ...], "fps": 30}
-            thumbs/        # low-res preview frames for the A/B scrubber
+            frames.json    # {"hashes": ["<hex64>" | null, ...], "fps": 30, "stride": 1}
+            video.mp4      # kept for baselines and the newest renders
+            thumbs/        # sprite sheets for the A/B scrubber
+                sheet_000.jpg
+                index.json # {frames, cell_w, cell_h, cols, per_sheet, sheets}
+
+The manifest holds every render's metadata (id, scene, status, frame
+count, baseline, timestamps) so listing, pruning and status changes never
+touch the per-render directories. Events are ``put`` (full record),
+``patch`` (partial update), ``del`` and ``baseline``; the log is replayed
+into an in-memory index on first use and rewritten (compacted) once stale
+lines outnumber live records. Legacy ``meta.json`` / ``baseline.txt``
+layouts are migrated into the manifest the first time it is built.
+
+Baselines are kept per *baseline key* — ``baseline_key(scene_file,
+scene_class, quality, fps)`` — so every scene in a project can have its
+own reference render. Records created without a key (the GUI's scratch
+renders) share the global baseline under the empty key.
+
+Sampled hashing (``sample_every`` > 1) hashes only the video's keyframes
+(at least N frames apart, plus the last frame), each decoded by seeking
+straight to it, so the frames in between are never decoded. When a diff
+finds a sample over the threshold, the frames between its neighbouring
+samples are decoded exactly (by seeking) on both sides, so flagged regions
+are still frame-accurate while unchanged stretches are never hashed.
+Frames that could not be refined (the render's video is no longer kept)
+are reported in ``approximate_ranges``. A change that starts and ends
+strictly between two samples can be missed. Without a keyframe index
+(no PyAV or ffprobe) every Nth frame is hashed from a full decode.
 
 Public surface (functions — no class state):
 
-    record_render(render_id, video_path, scene_file) -> dict
+    baseline_key(scene_file, scene_class, quality, fps) -> str
+    record_render(render_id, video_path, scene_file, baseline_key='',
+                  sample_every=1) -> dict
     diff_against_baseline(render_id, baseline_id=None) -> dict
-        returns {drift_per_frame, flagged, flagged_count, mean_drift,
-                 total_frames, threshold, auto_accepted}
+        returns {drift_per_frame, flagged, flagged_count, flagged_ranges,
+                 mean_drift, total_frames, threshold, auto_accepted,
+                 sample_every, refined_ranges, approximate_ranges}
+    get_baseline(key='') -> render_id or None
     list_renders(limit=40) -> list[dict]
-    accept(render_id) -> dict       # promotes render to current baseline
+    accept(render_id) -> dict       # promotes render to its key's baseline
     revert(render_id) -> dict       # marks render as rejected
     block(render_id) -> dict        # marks render as permanently blocked
-    get_frame_thumb(render_id, frame_idx) -> absolute path or None
+    get_thumb_sprites(render_id) -> dict or None   # whole sprite index
+    get_frame_thumb(render_id, frame_idx) -> {sheet, x, y, w, h, frame} or None
+    video_path(render_id) -> str or None   # for frame-exact scrubbing
+    hash_image(path) -> hex or None        # same hash for a still image
+    hash_distance(a_hex, b_hex) -> int     # differing bits, 0-64
+
+Background queue (used by the app so the UI never waits on a decode):
+
+    submit(video_path, scene_file, on_done=...) -> job_id
+        hash + record + diff (+ optional auto-promote) on a small worker
+        pool; on_done(result) fires when the diff is ready.
+    set_busy_probe(fn)   # fn() -> True while an interactive preview runs
+    queue_status() -> dict
+
+Streaming (hash while manim is still rendering):
+
+    SegmentWatcher(media_dir).start()  # hashes partial movie files as
+                                       # manim finishes each one
+    watcher.finish(scene_name) -> {hashes, fps, segments, reused} or None
+    attach_stream(video_path, result)  # submit() then skips the decode
 
 pHash implementation is pure-Python (no imagehash dep) — uses OpenCV if
 available (cv2 is already in the narration pipeline), else falls back to
@@ -30,17 +81,79 @@ PIL. Both are commonly installed with Manim.
 
 from __future__ import annotations
 
+import bisect
+import collections
+import hashlib
 import json
+import re
 import os
 import struct
+import threading
 import time
 import uuid
-from typing import Optional
+from typing import Callable, Optional
 
 
 _DIFF_THRESHOLD = 0.01  # Fraction of 64-bit pHash that must differ to flag.
-_MAX_RENDERS = 40       # Prune oldest render records beyond this count.
+_MAX_RENDERS = 500      # Prune oldest render records beyond this count.
 _THUMB_WIDTH = 320      # Thumbnail width (px) for the A/B scrubber.
+_THUMB_COUNT = 60       # Frames sampled into the sprite sheets per render.
+_SPRITE_COLS = 10       # Thumbnails per sprite-sheet row.
+_SPRITE_PER_SHEET = 60  # Thumbnails per sprite-sheet image.
+_MANIFEST_NAME = 'manifest.jsonl'
+_COMPACT_SLACK = 256    # Stale manifest lines tolerated before compaction.
+_VIDEO_KEEP = 12        # Recent renders (plus baselines) whose video is kept.
+
+# In-memory replay of the manifest. ``records`` is kept in creation order
+# (oldest first) so pruning pops from the front and listing walks the back.
+# ``stamp`` is the (mtime_ns, size) of the manifest after our last write —
+# if another process appends, the mismatch triggers a reload. Writers (the
+# GUI and cli regress/batch/watch may share one history) hold an advisory
+# lock on ``manifest.lock`` and replay foreign appends before writing, so a
+# compaction never drops another process's record. ``videos`` lists the
+# records whose ``video.mp4`` may still exist (``video_kept`` not False), so
+# trimming never stats every record directory.
+_INDEX = {
+    'loaded': False,
+    'records': {},
+    'baselines': {},    # baseline key -> render_id ('' = global)
+    'videos': {},       # render_id -> None, oldest first
+    'lines': 0,
+    'stamp': None,
+}
+_LOCK = threading.RLock()
+_FILE_LOCK = {'fh': None, 'depth': 0}
+
+# Parsed thumbs/index.json per render, most recently used last. The
+# scrubber hits the same two renders over and over, so a handful is plenty.
+_SPRITE_CACHE: dict = {}
+_SPRITE_CACHE_MAX = 16
+
+# Background diff queue. Hashing runs on up to _QUEUE_WORKERS threads (cv2
+# releases the GIL while decoding), but the diff/promote step is applied
+# strictly in submission order so each render compares against the
+# baseline a serial run would have produced.
+_QUEUE_MAX = 8          # Pending jobs kept; the oldest is dropped beyond this.
+_QUEUE_WORKERS = max(1, min(3, (os.cpu_count() or 2) // 2))
+_BUSY_POLL = 0.25       # Seconds a worker sleeps while the app is busy.
+_QUEUE = {
+    'pending': collections.deque(),
+    'running': {},      # job_id -> job
+    'by_path': {},      # abs video path -> job_id (pending or running)
+    'workers': 0,
+    'next_seq': 0,      # next seq number to hand out
+    'turn': 0,          # lowest seq whose diff step has not run yet
+    'finished': set(),  # seqs finished out of order, waiting for 'turn'
+}
+_QUEUE_COND = threading.Condition()
+_BUSY_PROBE: Optional[Callable[[], bool]] = None
+
+# Streaming segment hashes (see SegmentWatcher). Segment hash arrays are
+# cached on disk by the partial movie file's content digest, so unchanged
+# animations are never decoded twice.
+_SEGMENT_CACHE_MAX = 4000   # Cached segment hash files kept (LRU by mtime).
+_SEGMENT_POLL = 0.5         # Seconds between partial-movie directory scans.
+_STREAMED: dict = {}        # abs final video path -> {hashes, fps}
 
 
 def _root() -> str:
@@ -56,27 +169,257 @@ def _record_dir(render_id: str) -> str:
     return d
 
 
-def _current_baseline_path() -> str:
+def _legacy_baseline_path() -> str:
     return os.path.join(_root(), 'baseline.txt')
 
 
+def baseline_key(scene_file: str, scene_class: str = '',
+                 quality: str = '', fps=None) -> str:
+    """Key under which a scene's baseline is stored. The file path is
+    normalised so the same scene reached via different relative paths
+    shares one baseline."""
+    path = os.path.normcase(os.path.abspath(scene_file)) if scene_file else ''
+    return f"{path}::{scene_class or ''}::{quality or ''}::{fps or ''}"
+
+
+def get_baseline(key: str = '') -> Optional[str]:
+    """Return the render id currently serving as baseline for ``key``."""
+    with _LOCK:
+        _ensure_index()
+        return _INDEX['baselines'].get(key or '')
+
+
 def _get_current_baseline() -> Optional[str]:
-    p = _current_baseline_path()
-    if not os.path.isfile(p):
-        return None
+    return get_baseline('')
+
+
+def _set_current_baseline(render_id: str, key: str = '') -> None:
+    with _LOCK:
+        _ensure_index()
+        _append_event({'op': 'baseline', 'render_id': render_id,
+                       'key': key or ''})
+
+
+# ---------- Manifest ----------
+
+def _manifest_path() -> str:
+    return os.path.join(_root(), _MANIFEST_NAME)
+
+
+def _manifest_stamp(path: str):
     try:
-        with open(p, 'r') as f:
-            return f.read().strip() or None
+        st = os.stat(path)
     except OSError:
         return None
+    return (st.st_mtime_ns, st.st_size)
 
 
-def _set_current_baseline(render_id: str) -> None:
+def _lock_manifest() -> None:
+    """Take the cross-process manifest lock (reentrant within this
+    process). Caller must hold ``_LOCK``; pair with _unlock_manifest."""
+    _FILE_LOCK['depth'] += 1
+    if _FILE_LOCK['depth'] > 1:
+        return
     try:
-        with open(_current_baseline_path(), 'w') as f:
-            f.write(render_id)
+        fh = open(os.path.join(_root(), 'manifest.lock'), 'a+b')
     except OSError as e:
-        print(f"[VISUAL DIFF] baseline write failed: {e}")
+        print(f"[VISUAL DIFF] manifest lock unavailable: {e}")
+        return
+    try:
+        if os.name == 'nt':
+            import msvcrt
+            fh.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(fh.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue    # LK_LOCK gives up after ~10 s; keep waiting
+        else:
+            import fcntl
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+    except (OSError, ImportError) as e:
+        print(f"[VISUAL DIFF] manifest lock failed: {e}")
+    _FILE_LOCK['fh'] = fh
+
+
+def _unlock_manifest() -> None:
+    _FILE_LOCK['depth'] -= 1
+    fh = _FILE_LOCK['fh']
+    if _FILE_LOCK['depth'] > 0 or fh is None:
+        return
+    _FILE_LOCK['fh'] = None
+    try:
+        if os.name == 'nt':
+            import msvcrt
+            fh.seek(0)
+            msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+    except (OSError, ImportError):
+        pass
+    finally:
+        fh.close()
+
+
+def _apply_event(ev: dict) -> None:
+    """Fold one manifest event into ``_INDEX``. Unknown ops are ignored so
+    older builds can read manifests written by newer ones."""
+    op = ev.get('op')
+    rid = ev.get('render_id')
+    records = _INDEX['records']
+    videos = _INDEX['videos']
+    if op == 'put' and rid:
+        records.pop(rid, None)
+        records[rid] = dict(ev.get('record') or {}, render_id=rid)
+        videos.pop(rid, None)
+        # Records from before ``video_kept`` existed are checked once.
+        if records[rid].get('video_kept', True):
+            videos[rid] = None
+    elif op == 'patch' and rid in records:
+        records[rid].update(ev.get('fields') or {})
+        if not records[rid].get('video_kept', True):
+            videos.pop(rid, None)
+    elif op == 'del' and rid:
+        records.pop(rid, None)
+        videos.pop(rid, None)
+        baselines = _INDEX['baselines']
+        for key in [k for k, v in baselines.items() if v == rid]:
+            del baselines[key]
+    elif op == 'baseline':
+        key = ev.get('key') or ''
+        if rid:
+            _INDEX['baselines'][key] = rid
+        else:
+            _INDEX['baselines'].pop(key, None)
+
+
+def _load_manifest(path: str) -> None:
+    _INDEX['records'] = {}
+    _INDEX['baselines'] = {}
+    _INDEX['videos'] = {}
+    lines = 0
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                lines += 1
+                try:
+                    _apply_event(json.loads(line))
+                except (json.JSONDecodeError, AttributeError):
+                    # Torn trailing write from a crash — skip it.
+                    continue
+    except OSError as e:
+        print(f"[VISUAL DIFF] manifest read failed: {e}")
+    _INDEX['lines'] = lines
+
+
+def _migrate_legacy() -> None:
+    """Build the index from pre-manifest ``<id>/meta.json`` files. Runs once,
+    when no manifest exists yet."""
+    root = _root()
+    legacy = []
+    try:
+        names = os.listdir(root)
+    except OSError:
+        names = []
+    for name in names:
+        meta_p = os.path.join(root, name, 'meta.json')
+        if not os.path.isfile(meta_p):
+            continue
+        try:
+            with open(meta_p, 'r') as f:
+                meta = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            continue
+        if isinstance(meta, dict):
+            meta.setdefault('render_id', name)
+            legacy.append(meta)
+    legacy.sort(key=lambda m: m.get('created_at', ''))
+    _INDEX['records'] = {m['render_id']: m for m in legacy}
+    _INDEX['videos'] = dict.fromkeys(_INDEX['records'])
+    _INDEX['baselines'] = {}
+    try:
+        with open(_legacy_baseline_path(), 'r') as f:
+            legacy_baseline = f.read().strip()
+        if legacy_baseline:
+            _INDEX['baselines'][''] = legacy_baseline
+    except OSError:
+        pass
+
+
+def _ensure_index() -> None:
+    """Load (or reload, if another process touched it) the manifest. Caller
+    must hold ``_LOCK``."""
+    path = _manifest_path()
+    stamp = _manifest_stamp(path)
+    if _INDEX['loaded'] and stamp == _INDEX['stamp']:
+        return
+    if stamp is None:
+        _lock_manifest()
+        try:
+            stamp = _manifest_stamp(path)
+            if stamp is None:   # not created by another process meanwhile
+                _migrate_legacy()
+                _INDEX['loaded'] = True
+                _compact()
+                return
+        finally:
+            _unlock_manifest()
+    _load_manifest(path)
+    _INDEX['loaded'] = True
+    _INDEX['stamp'] = stamp
+
+
+def _compact() -> None:
+    """Rewrite the manifest as one ``put`` per live record plus one
+    ``baseline`` per key. Atomic via os.replace. Caller must hold ``_LOCK``
+    and the manifest lock, with the index replayed up to the file's end."""
+    path = _manifest_path()
+    tmp = path + '.tmp'
+    events = [{'op': 'put', 'render_id': rid, 'record': rec}
+              for rid, rec in _INDEX['records'].items()]
+    events.extend({'op': 'baseline', 'render_id': rid, 'key': key}
+                  for key, rid in _INDEX['baselines'].items())
+    try:
+        with open(tmp, 'w', encoding='utf-8') as f:
+            for ev in events:
+                f.write(json.dumps(ev, separators=(',', ':')) + '\n')
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"[VISUAL DIFF] manifest compaction failed: {e}")
+        return
+    _INDEX['lines'] = len(events)
+    _INDEX['stamp'] = _manifest_stamp(path)
+
+
+def _append_event(ev: dict) -> None:
+    """Apply an event to the index and append it to the manifest. Caller
+    must hold ``_LOCK`` and have called ``_ensure_index``."""
+    path = _manifest_path()
+    _lock_manifest()
+    try:
+        # Another process may have written since our last read; replay the
+        # file first so neither our stamp nor a compaction hides its events.
+        stamp = _manifest_stamp(path)
+        if stamp is not None and stamp != _INDEX['stamp']:
+            _load_manifest(path)
+        _apply_event(ev)
+        try:
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(ev, separators=(',', ':')) + '\n')
+        except OSError as e:
+            print(f"[VISUAL DIFF] manifest append failed: {e}")
+            return
+        _INDEX['lines'] += 1
+        _INDEX['stamp'] = _manifest_stamp(path)
+        if _INDEX['lines'] > len(_INDEX['records']) + _COMPACT_SLACK:
+            _compact()
+    finally:
+        _unlock_manifest()
 
 
 # ---------- pHash ----------
@@ -94,7 +437,103 @@ def _hash_frame_np(img_gray_small):
     return f'{val:016x}'
 
 
-def _try_hash_via_cv2(video_path: str):
+def hash_image(path: str) -> Optional[str]:
+    """Same 64-bit hash as the video frames, for a still image file (the
+    AI agent's review frames). None if it can't be decoded."""
+    try:
+        import cv2
+        gray = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+        if gray is not None:
+            return _hash_frame_np(cv2.resize(gray, (8, 8), interpolation=cv2.INTER_AREA))
+    except ImportError:
+        pass
+    try:
+        from PIL import Image
+        import numpy as np
+        with Image.open(path) as img:
+            small = img.convert('L').resize((8, 8))
+        return _hash_frame_np(np.asarray(small, dtype=np.float32))
+    except Exception:
+        return None
+
+
+def _wait_while_busy(pause: Optional[Callable[[], bool]]) -> None:
+    """Block while ``pause()`` is true — background hashing yields the CPU
+    to an interactive preview instead of competing with it."""
+    if pause is None:
+        return
+    try:
+        while pause():
+            time.sleep(_BUSY_POLL)
+    except Exception:
+        return
+
+
+def _try_hash_keyframes(video_path: str, pause=None, stride: int = 2,
+                        thumb_count: int = 0):
+    """Sampled pass that decodes keyframes only: each sample is a seek to a
+    keyframe (kept if at least ``stride`` frames after the previous one)
+    plus the last frame, so nothing between samples is decoded. Returns the
+    same shape as _try_hash_via_cv2 with ``stride`` set to the widest gap
+    between samples, or None without cv2 or a keyframe index."""
+    try:
+        import cv2
+        import frame_server
+    except ImportError:
+        return None
+    info = frame_server.video_info(video_path)
+    frame_server.release(video_path)
+    total = int((info or {}).get('frame_count') or 0)
+    if not total or not (info or {}).get('keyframes'):
+        return None
+    samples = [0]
+    for k in info['keyframes']:
+        if samples[-1] + max(1, stride) <= k < total:
+            samples.append(k)
+    if samples[-1] != total - 1:
+        samples.append(total - 1)
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        return None
+    hashes = [None] * total
+    thumb_every = max(1, len(samples) // thumb_count) if thumb_count else 0
+    thumb_frames, thumb_cells = [], []
+    try:
+        for n, idx in enumerate(samples):
+            if n % 30 == 0:
+                _wait_while_busy(pause)
+            cap.set(cv2.CAP_PROP_POS_FRAMES, idx)
+            ret, frame = cap.read()
+            if not ret:
+                continue
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            hashes[idx] = _hash_frame_np(cv2.resize(gray, (8, 8), interpolation=cv2.INTER_AREA))
+            if thumb_every and n % thumb_every == 0:
+                h, w = frame.shape[:2]
+                if w > _THUMB_WIDTH:
+                    frame = cv2.resize(frame, (_THUMB_WIDTH, int(h * _THUMB_WIDTH / w)))
+                thumb_frames.append(idx)
+                thumb_cells.append(frame)
+    finally:
+        cap.release()
+    if thumb_count and len(thumb_cells) > thumb_count:
+        keep = [i * len(thumb_cells) // thumb_count for i in range(thumb_count)]
+        thumb_frames = [thumb_frames[i] for i in keep]
+        thumb_cells = [thumb_cells[i] for i in keep]
+    gap = max((b - a for a, b in zip(samples, samples[1:])), default=1)
+    return {'hashes': hashes, 'fps': info.get('fps') or 30.0, 'stride': max(1, gap),
+            'thumbs': (thumb_frames, thumb_cells)}
+
+
+def _try_hash_via_cv2(video_path: str, pause=None, stride: int = 1,
+                      thumb_count: int = 0, hash_frames: bool = True):
+    """Single decode pass. Hashes every ``stride``-th frame — the others are
+    still decoded but never converted or scaled (the fallback when
+    _try_hash_keyframes has no keyframe index) — and, if ``thumb_count`` is
+    set, collects up to that many evenly spaced thumbnail cells on the way
+    so sprite sheets don't need a second decode. Returns {hashes, fps,
+    stride, thumbs: (frame_indices, cells)}; unhashed frames are None.
+    ``hash_frames=False`` collects thumbnails only."""
     try:
         import cv2
         import numpy as np
@@ -105,20 +544,62 @@ def _try_hash_via_cv2(video_path: str):
         return None
     hashes = []
     fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    stride = max(1, int(stride or 1))
+    thumb_every = 0
+    if thumb_count:
+        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+        # Unknown length (partial/streamed files): start dense and thin
+        # the cells out as they pile up, so memory stays bounded.
+        thumb_every = max(1, total // thumb_count) if total > 0 else 1
+    thumb_frames, thumb_cells = [], []
+    idx = 0
     try:
         while True:
-            ret, frame = cap.read()
-            if not ret:
+            if idx % 30 == 0:
+                _wait_while_busy(pause)
+            if not cap.grab():
                 break
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            small = cv2.resize(gray, (8, 8), interpolation=cv2.INTER_AREA)
-            hashes.append(_hash_frame_np(small))
+            want_hash = hash_frames and (idx % stride == 0)
+            want_thumb = bool(thumb_every) and (idx % thumb_every == 0)
+            if want_hash or want_thumb:
+                ret, frame = cap.retrieve()
+                if not ret:
+                    break
+                if want_hash:
+                    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                    small = cv2.resize(gray, (8, 8), interpolation=cv2.INTER_AREA)
+                    hashes.append(_hash_frame_np(small))
+                else:
+                    hashes.append(None)
+                if want_thumb:
+                    h, w = frame.shape[:2]
+                    if w > _THUMB_WIDTH:
+                        frame = cv2.resize(frame, (_THUMB_WIDTH, int(h * _THUMB_WIDTH / w)))
+                    thumb_frames.append(idx)
+                    thumb_cells.append(frame)
+                    if len(thumb_cells) >= 2 * thumb_count:
+                        thumb_frames = thumb_frames[::2]
+                        thumb_cells = thumb_cells[::2]
+                        thumb_every *= 2
+            else:
+                hashes.append(None)
+            idx += 1
     finally:
         cap.release()
-    return {'hashes': hashes, 'fps': fps}
-
-
-def _try_hash_via_pil(video_path: str):
+    # Always hash the last frame so trailing changes can't hide between
+    # the final sample and the end of the video.
+    if hash_frames and hashes and hashes[-1] is None:
+        extra = _hash_ranges(video_path, [(len(hashes) - 1, len(hashes) - 1)], pause)
+        hashes[-1] = extra.get(len(hashes) - 1)
+    if thumb_count and len(thumb_cells) > thumb_count:
+        keep = [i * len(thumb_cells) // thumb_count for i in range(thumb_count)]
+        thumb_frames = [thumb_frames[i] for i in keep]
+        thumb_cells = [thumb_cells[i] for i in keep]
+    return {'hashes': hashes, 'fps': fps, 'stride': stride,
+            'thumbs': (thumb_frames, thumb_cells)}
+
+
+def _try_hash_via_pil(video_path: str, pause=None, stride: int = 1):
     """Fallback: decode via imageio-ffmpeg if cv2 is missing. Slow but works."""
     try:
         import imageio.v3 as iio
@@ -126,47 +607,183 @@ def _try_hash_via_pil(video_path: str):
         import numpy as np
     except ImportError:
         return None
+    stride = max(1, int(stride or 1))
     try:
         hashes = []
         meta = iio.immeta(video_path, exclude_applied=False)
         fps = meta.get('fps', 30.0) if isinstance(meta, dict) else 30.0
+        last = None
         for frame in iio.imiter(video_path):
+            if len(hashes) % 30 == 0:
+                _wait_while_busy(pause)
+            last = frame
+            if len(hashes) % stride:
+                hashes.append(None)
+                continue
             img = Image.fromarray(frame).convert('L').resize((8, 8))
             arr = np.asarray(img, dtype=np.float32)
             hashes.append(_hash_frame_np(arr))
-        return {'hashes': hashes, 'fps': fps}
+        if hashes and hashes[-1] is None and last is not None:
+            img = Image.fromarray(last).convert('L').resize((8, 8))
+            hashes[-1] = _hash_frame_np(np.asarray(img, dtype=np.float32))
+        return {'hashes': hashes, 'fps': fps, 'stride': stride}
     except Exception as e:
         print(f"[VISUAL DIFF] PIL fallback failed: {e}")
         return None
 
 
-def _extract_thumbs_cv2(video_path: str, out_dir: str, every_n: int = 1) -> int:
+def _hash_ranges(video_path: str, ranges: list, pause=None) -> dict:
+    """Exact hashes for the inclusive frame ranges ``[(start, end), ...]``
+    (sorted, non-overlapping). Seeks to each range instead of decoding the
+    whole video. Returns {frame_index: hex}."""
+    out = {}
+    if not ranges:
+        return out
     try:
         import cv2
     except ImportError:
+        cv2 = None
+    if cv2 is not None:
+        cap = cv2.VideoCapture(video_path)
+        if cap.isOpened():
+            try:
+                for start, end in ranges:
+                    _wait_while_busy(pause)
+                    cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+                    for idx in range(start, end + 1):
+                        ret, frame = cap.read()
+                        if not ret:
+                            break
+                        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                        small = cv2.resize(gray, (8, 8), interpolation=cv2.INTER_AREA)
+                        out[idx] = _hash_frame_np(small)
+            finally:
+                cap.release()
+            return out
+    try:
+        import imageio.v3 as iio
+        from PIL import Image
+        import numpy as np
+    except ImportError:
+        return out
+    wanted = set()
+    for start, end in ranges:
+        wanted.update(range(start, end + 1))
+    last_wanted = max(wanted)
+    try:
+        for idx, frame in enumerate(iio.imiter(video_path)):
+            if idx > last_wanted:
+                break
+            if idx in wanted:
+                img = Image.fromarray(frame).convert('L').resize((8, 8))
+                out[idx] = _hash_frame_np(np.asarray(img, dtype=np.float32))
+    except Exception as e:
+        print(f"[VISUAL DIFF] range hashing failed: {e}")
+    return out
+
+
+def _write_thumb_sprites(frames: list, cells: list, out_dir: str) -> int:
+    """Tile thumbnail cells collected during the hash pass into sprite
+    sheets plus an ``index.json`` describing the grid. Returns the number
+    of thumbnails written."""
+    if not cells:
         return 0
-    cap = cv2.VideoCapture(video_path)
-    if not cap.isOpened():
+    try:
+        import cv2
+        import numpy as np
+    except ImportError:
         return 0
-    count = 0
-    idx = 0
+
+    cell_h, cell_w = cells[0].shape[:2]
+    sheets = []
+    for s_i, start in enumerate(range(0, len(cells), _SPRITE_PER_SHEET)):
+        chunk = cells[start:start + _SPRITE_PER_SHEET]
+        rows = (len(chunk) + _SPRITE_COLS - 1) // _SPRITE_COLS
+        cols = min(len(chunk), _SPRITE_COLS)
+        sheet = np.zeros((rows * cell_h, cols * cell_w, 3), dtype=np.uint8)
+        for i, cell in enumerate(chunk):
+            r, c = divmod(i, _SPRITE_COLS)
+            ch, cw = cell.shape[:2]
+            sheet[r * cell_h:r * cell_h + min(ch, cell_h),
+                  c * cell_w:c * cell_w + min(cw, cell_w)] = cell[:cell_h, :cell_w]
+        name = f'sheet_{s_i:03d}.jpg'
+        cv2.imwrite(os.path.join(out_dir, name), sheet,
+                    [cv2.IMWRITE_JPEG_QUALITY, 70])
+        sheets.append(name)
+
+    index = {
+        'frames': list(frames),
+        'cell_w': int(cell_w),
+        'cell_h': int(cell_h),
+        'cols': _SPRITE_COLS,
+        'per_sheet': _SPRITE_PER_SHEET,
+        'sheets': sheets,
+    }
+    with open(os.path.join(out_dir, 'index.json'), 'w') as f:
+        json.dump(index, f)
+    return len(frames)
+
+
+def _legacy_thumb_index(thumb_dir: str) -> Optional[dict]:
+    """Index the one-JPEG-per-thumb layout written by older builds."""
     try:
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
-            if idx % every_n == 0:
-                h, w = frame.shape[:2]
-                if w > _THUMB_WIDTH:
-                    new_h = int(h * _THUMB_WIDTH / w)
-                    frame = cv2.resize(frame, (_THUMB_WIDTH, new_h))
-                out_path = os.path.join(out_dir, f'{idx:05d}.jpg')
-                cv2.imwrite(out_path, frame, [cv2.IMWRITE_JPEG_QUALITY, 70])
-                count += 1
-            idx += 1
-    finally:
-        cap.release()
-    return count
+        files = sorted(f for f in os.listdir(thumb_dir) if f.endswith('.jpg'))
+    except OSError:
+        return None
+    frames, names = [], []
+    for f in files:
+        try:
+            frames.append(int(f.split('.')[0]))
+        except ValueError:
+            continue
+        names.append(f)
+    if not frames:
+        return None
+    return {'frames': frames, 'files': names}
+
+
+def _build_missing_sprites(render_id: str) -> Optional[dict]:
+    """Renders recorded from streamed segment hashes skip the decode pass,
+    so their sprite sheets are built here the first time they are asked
+    for. Returns the new index, or None if the video is gone."""
+    video = video_path(render_id)
+    if not video:
+        return None
+    scan = _try_hash_via_cv2(video, thumb_count=_THUMB_COUNT, hash_frames=False)
+    if not scan:
+        return None
+    frames, cells = scan['thumbs']
+    thumb_dir = os.path.join(_record_dir(render_id), 'thumbs')
+    if not _write_thumb_sprites(frames, cells, thumb_dir):
+        return None
+    try:
+        with open(os.path.join(thumb_dir, 'index.json'), 'r') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def _load_thumb_index(render_id: str) -> Optional[dict]:
+    with _LOCK:
+        index = _SPRITE_CACHE.pop(render_id, None)
+        if index is not None:
+            _SPRITE_CACHE[render_id] = index
+            return index
+    thumb_dir = os.path.join(_root(), render_id, 'thumbs')
+    index = None
+    try:
+        with open(os.path.join(thumb_dir, 'index.json'), 'r') as f:
+            index = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        index = _legacy_thumb_index(thumb_dir) or _build_missing_sprites(render_id)
+    if not index or not index.get('frames'):
+        return None
+    index['dir'] = thumb_dir
+    with _LOCK:
+        _SPRITE_CACHE[render_id] = index
+        while len(_SPRITE_CACHE) > _SPRITE_CACHE_MAX:
+            _SPRITE_CACHE.pop(next(iter(_SPRITE_CACHE)))
+    return index
 
 
 # ---------- Hamming diff ----------
@@ -182,50 +799,76 @@ def _drift_ratio(a_hex: str, b_hex: str) -> float:
     return _hamming(a_hex, b_hex) / 64.0
 
 
+def hash_distance(a_hex: str, b_hex: str) -> int:
+    """Differing bits (0-64) between two frame hashes."""
+    return _hamming(a_hex, b_hex)
+
+
 # ---------- Public API ----------
 
 def record_render(render_id: str, video_path: str,
-                  scene_file: str = '') -> dict:
+                  scene_file: str = '', pause=None,
+                  baseline_key: str = '', sample_every: int = 1,
+                  precomputed: Optional[dict] = None) -> dict:
     """Hash all frames of a completed render and persist metadata. Returns
     {ok, frames, path}. Safe to call in a background thread after a render
-    finishes."""
+    finishes; ``pause`` is polled during decoding (see _wait_while_busy).
+    ``baseline_key`` selects which baseline the render is diffed against
+    and promoted to (see baseline_key()). With ``sample_every`` > 1 only
+    keyframes at least N frames apart (plus the last frame) are hashed;
+    diff_against_baseline fills in exact hashes wherever the samples show
+    drift. ``precomputed`` is a
+    {hashes, fps} result from a SegmentWatcher — it is used as-is (no
+    decode) when its frame count matches the video's."""
     if not render_id:
         render_id = uuid.uuid4().hex[:12]
     d = _record_dir(render_id)
 
-    hash_result = _try_hash_via_cv2(video_path) or _try_hash_via_pil(video_path)
+    hash_result = None
+    if precomputed and _frame_count_matches(video_path, len(precomputed.get('hashes') or [])):
+        hash_result = {'hashes': list(precomputed['hashes']),
+                       'fps': precomputed.get('fps', 30.0), 'stride': 1}
+    if not hash_result and sample_every > 1:
+        hash_result = _try_hash_keyframes(video_path, pause, stride=sample_every,
+                                          thumb_count=_THUMB_COUNT)
+    hash_result = (hash_result
+                   or _try_hash_via_cv2(video_path, pause, stride=sample_every,
+                                        thumb_count=_THUMB_COUNT)
+                   or _try_hash_via_pil(video_path, pause, stride=sample_every))
     if not hash_result:
         return {'ok': False, 'error': 'No frame decoder available (install opencv-python or imageio)'}
+    thumb_frames, thumb_cells = hash_result.pop('thumbs', ([], []))
 
-    try:
-        with open(os.path.join(d, 'frames.json'), 'w') as f:
-            json.dump(hash_result, f)
-    except OSError as e:
-        return {'ok': False, 'error': f'frames.json write failed: {e}'}
-
-    meta = {
-        'render_id': render_id,
-        'video_path': os.path.abspath(video_path),
-        'scene_file': scene_file or '',
-        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
-        'status': 'pending',
-        'frame_count': len(hash_result['hashes']),
-    }
-    try:
-        with open(os.path.join(d, 'meta.json'), 'w') as f:
-            json.dump(meta, f, indent=2)
-    except OSError as e:
-        print(f"[VISUAL DIFF] meta write failed: {e}")
+    if not _save_frames(render_id, hash_result):
+        return {'ok': False, 'error': 'frames.json write failed'}
 
-    # Extract thumbnails lazily, sampling up to 60 frames to keep disk low.
+    # Pack the thumbnails sampled during the hash pass into sprite sheets.
     try:
-        total = len(hash_result['hashes'])
-        step = max(1, total // 60)
-        _extract_thumbs_cv2(video_path, os.path.join(d, 'thumbs'), every_n=step)
+        _write_thumb_sprites(thumb_frames, thumb_cells, os.path.join(d, 'thumbs'))
     except Exception as e:
         print(f"[VISUAL DIFF] thumb extraction failed: {e}")
 
-    _prune_old_records()
+    # The app clears its render folder before every render, so keep our
+    # own copy for the frame server and for later refinement decodes.
+    kept = os.path.join(d, 'video.mp4')
+    _retain_video(video_path, kept)
+
+    with _LOCK:
+        _ensure_index()
+        meta = {
+            'render_id': render_id,
+            'video_path': os.path.abspath(video_path),
+            'scene_file': scene_file or '',
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'status': 'pending',
+            'frame_count': len(hash_result['hashes']),
+            'baseline_key': baseline_key or '',
+            'baseline_id': _INDEX['baselines'].get(baseline_key or ''),
+            'video_kept': os.path.isfile(kept),
+        }
+        _append_event({'op': 'put', 'render_id': render_id, 'record': meta})
+        _prune_old_records()
+        _trim_videos()
     return {'ok': True, 'render_id': render_id, 'frames': len(hash_result['hashes'])}
 
 
@@ -233,16 +876,19 @@ def diff_against_baseline(render_id: str,
                           baseline_id: Optional[str] = None,
                           threshold: float = _DIFF_THRESHOLD) -> dict:
     """Compare this render's pHashes against the baseline. Returns drift
-    array, list of flagged frame indices, and auto-promote decision."""
+    array, list of flagged frame indices, and auto-promote decision. When
+    ``baseline_id`` is None the render's own baseline key is used."""
     if baseline_id is None:
-        baseline_id = _get_current_baseline()
+        with _LOCK:
+            _ensure_index()
+            key = (_INDEX['records'].get(render_id) or {}).get('baseline_key', '')
+            baseline_id = _INDEX['baselines'].get(key)
 
     cur_path = os.path.join(_root(), render_id, 'frames.json')
     if not os.path.isfile(cur_path):
         return {'ok': False, 'error': 'render frames missing'}
     try:
-        with open(cur_path, 'r') as f:
-            cur = json.load(f)
+        cur = _load_frames(render_id)
     except (OSError, json.JSONDecodeError) as e:
         return {'ok': False, 'error': f'frames read failed: {e}'}
 
@@ -256,6 +902,7 @@ def diff_against_baseline(render_id: str,
             'drift_per_frame': [0.0] * len(cur_hashes),
             'flagged': [],
             'flagged_count': 0,
+            'flagged_ranges': [],
             'mean_drift': 0.0,
             'total_frames': len(cur_hashes),
             'threshold': threshold,
@@ -271,6 +918,7 @@ def diff_against_baseline(render_id: str,
             'drift_per_frame': [0.0] * len(cur_hashes),
             'flagged': [],
             'flagged_count': 0,
+            'flagged_ranges': [],
             'mean_drift': 0.0,
             'total_frames': len(cur_hashes),
             'threshold': threshold,
@@ -278,22 +926,83 @@ def diff_against_baseline(render_id: str,
             'reason': 'baseline_missing',
         }
     try:
-        with open(base_path, 'r') as f:
-            base = json.load(f)
+        base = _load_frames(baseline_id)
     except (OSError, json.JSONDecodeError):
         return {'ok': False, 'error': 'baseline read failed'}
 
     base_hashes = base.get('hashes', [])
     n = max(len(cur_hashes), len(base_hashes))
-    drift = []
-    flagged = []
-    for i in range(n):
+    cur_stride = int(cur.get('stride') or 1)
+    base_stride = int(base.get('stride') or 1)
+    stride = max(cur_stride, base_stride)
+    approximate = set()
+
+    # Keyframe samples of two renders need not line up: hash each side at
+    # the samples only the other (sampled) side has.
+    common = min(len(cur_hashes), len(base_hashes))
+    for rid, frames, mine, theirs, sampled in (
+            (render_id, cur, cur_hashes, base_hashes, base_stride > 1),
+            (baseline_id, base, base_hashes, cur_hashes, cur_stride > 1)):
+        if sampled:
+            need = [i for i in range(common) if mine[i] is None and theirs[i] is not None]
+            approximate.update(_refine_hashes(rid, frames, flagged_ranges(need)))
+    cur_hashes = cur.get('hashes', [])
+    base_hashes = base.get('hashes', [])
+
+    def _pair(i):
+        # Frames past the end of the shorter render compare against an
+        # all-zero hash (i.e. count as changed), as before.
         a = cur_hashes[i] if i < len(cur_hashes) else '0' * 16
         b = base_hashes[i] if i < len(base_hashes) else '0' * 16
-        d = _drift_ratio(a, b)
-        drift.append(round(d, 4))
-        if d > threshold:
-            flagged.append(i)
+        return a, b
+
+    drift = [None] * n
+    for i in range(n):
+        a, b = _pair(i)
+        if a is not None and b is not None:
+            drift[i] = _drift_ratio(a, b)
+
+    # Sampled hashes: densify around every drifting frame so the flagged
+    # regions are exact, leaving unchanged stretches undecoded. Repeats
+    # until no drifting frame has an unhashed neighbour within one stride,
+    # so a change is traced to its true extent in a single diff.
+    attempted = set()
+    if stride > 1:
+        frontier = [i for i in range(n)
+                    if drift[i] is not None and drift[i] > threshold]
+        while frontier:
+            want = set()
+            for i in frontier:
+                want.update(j for j in range(max(0, i - stride + 1),
+                                             min(n, i + stride))
+                            if drift[j] is None and j not in attempted)
+            if not want:
+                break
+            attempted |= want
+            ranges = flagged_ranges(sorted(want))
+            approximate.update(_refine_hashes(render_id, cur, ranges))
+            approximate.update(_refine_hashes(baseline_id, base, ranges))
+            cur_hashes = cur.get('hashes', [])
+            base_hashes = base.get('hashes', [])
+            frontier = []
+            for j in sorted(want):
+                a, b = _pair(j)
+                if a is not None and b is not None:
+                    drift[j] = _drift_ratio(a, b)
+                    if drift[j] > threshold:
+                        frontier.append(j)
+    refined = flagged_ranges(sorted(attempted - approximate))
+
+    flagged = [i for i in range(n) if drift[i] is not None and drift[i] > threshold]
+    # Frames that were never hashed sit inside unchanged stretches; carry
+    # the nearest preceding measurement across them for the strip view.
+    last = 0.0
+    for i in range(n):
+        if drift[i] is None:
+            drift[i] = last
+        else:
+            last = drift[i]
+        drift[i] = round(drift[i], 4)
 
     mean_drift = round(sum(drift) / n, 4) if n else 0.0
     auto_accepted = (mean_drift <= threshold) and (not flagged)
@@ -304,58 +1013,102 @@ def diff_against_baseline(render_id: str,
         'drift_per_frame': drift,
         'flagged': flagged,
         'flagged_count': len(flagged),
+        'flagged_ranges': flagged_ranges(flagged),
         'mean_drift': mean_drift,
         'total_frames': n,
         'threshold': threshold,
         'auto_accepted': auto_accepted,
+        'sample_every': stride,
+        'refined_ranges': refined,
+        # Frames left on carried-forward samples because the exact decode
+        # was not possible (video no longer kept).
+        'approximate_ranges': flagged_ranges(sorted(approximate)),
     }
 
 
-def list_renders(limit: int = 40) -> list:
-    """Return recent renders newest-first with their current status."""
-    root = _root()
-    entries = []
+def _load_frames(render_id: str) -> dict:
+    with open(os.path.join(_root(), render_id, 'frames.json'), 'r') as f:
+        return json.load(f)
+
+
+def _save_frames(render_id: str, frames: dict) -> bool:
     try:
-        for name in os.listdir(root):
-            d = os.path.join(root, name)
-            meta_p = os.path.join(d, 'meta.json')
-            if not os.path.isfile(meta_p):
-                continue
-            try:
-                with open(meta_p, 'r') as f:
-                    entries.append(json.load(f))
-            except (OSError, json.JSONDecodeError):
-                continue
-    except OSError:
+        with open(os.path.join(_record_dir(render_id), 'frames.json'), 'w') as f:
+            json.dump(frames, f)
+        return True
+    except OSError as e:
+        print(f"[VISUAL DIFF] frames.json write failed: {e}")
+        return False
+
+
+def _refine_hashes(render_id: str, frames: dict, ranges: list) -> list:
+    """Decode just ``ranges`` of a sampled render and write the exact
+    hashes back into ``frames`` (and frames.json, so the work is reused by
+    later diffs). Returns the frames that are still unhashed, e.g. because
+    the render's video is no longer kept."""
+    hashes = frames.get('hashes', [])
+    missing = [j for a, b in ranges for j in range(a, b + 1)
+               if j < len(hashes) and hashes[j] is None]
+    if not missing:
         return []
-    entries.sort(key=lambda m: m.get('created_at', ''), reverse=True)
-    current_baseline = _get_current_baseline()
-    for e in entries:
-        e['is_baseline'] = (e.get('render_id') == current_baseline)
-    return entries[:limit]
+    video = video_path(render_id)
+    exact = _hash_ranges(video, flagged_ranges(missing)) if video else {}
+    if exact:
+        for j, h in exact.items():
+            if j < len(hashes):
+                hashes[j] = h
+        _save_frames(render_id, frames)
+    return [j for j in missing if hashes[j] is None]
+
+
+def flagged_ranges(flagged: list) -> list:
+    """Collapse sorted flagged frame indices into inclusive [start, end]
+    ranges, e.g. [3, 4, 5, 9] -> [[3, 5], [9, 9]]."""
+    ranges = []
+    for i in flagged:
+        if ranges and i == ranges[-1][1] + 1:
+            ranges[-1][1] = i
+        else:
+            ranges.append([i, i])
+    return ranges
+
+
+def list_renders(limit: int = 40) -> list:
+    """Return recent renders newest-first with their current status."""
+    with _LOCK:
+        _ensure_index()
+        baseline_ids = set(_INDEX['baselines'].values())
+        entries = []
+        for rec in reversed(_INDEX['records'].values()):
+            if len(entries) >= limit:
+                break
+            e = dict(rec)
+            e['is_baseline'] = (e.get('render_id') in baseline_ids)
+            entries.append(e)
+    return entries
 
 
 def _set_status(render_id: str, status: str) -> dict:
-    meta_p = os.path.join(_root(), render_id, 'meta.json')
-    if not os.path.isfile(meta_p):
-        return {'ok': False, 'error': 'render not found'}
-    try:
-        with open(meta_p, 'r') as f:
-            meta = json.load(f)
-        meta['status'] = status
-        meta['updated_at'] = time.strftime('%Y-%m-%dT%H:%M:%S')
-        with open(meta_p, 'w') as f:
-            json.dump(meta, f, indent=2)
-        return {'ok': True, 'status': status}
-    except (OSError, json.JSONDecodeError) as e:
-        return {'ok': False, 'error': str(e)}
+    with _LOCK:
+        _ensure_index()
+        if render_id not in _INDEX['records']:
+            return {'ok': False, 'error': 'render not found'}
+        _append_event({'op': 'patch', 'render_id': render_id, 'fields': {
+            'status': status,
+            'updated_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        }})
+    return {'ok': True, 'status': status}
 
 
 def accept(render_id: str) -> dict:
-    """Mark render as accepted and promote it to the current baseline."""
-    res = _set_status(render_id, 'accepted')
-    if res.get('ok'):
-        _set_current_baseline(render_id)
+    """Mark render as accepted and promote it to the baseline for its
+    baseline key."""
+    with _LOCK:
+        res = _set_status(render_id, 'accepted')
+        if res.get('ok'):
+            key = _INDEX['records'][render_id].get('baseline_key', '')
+            _set_current_baseline(render_id, key)
+            _trim_videos()
     return res
 
 
@@ -367,61 +1120,511 @@ def block(render_id: str) -> dict:
     return _set_status(render_id, 'blocked')
 
 
-def get_frame_thumb(render_id: str, frame_idx: int) -> Optional[str]:
-    """Return absolute path to the nearest cached thumb for this frame index."""
-    d = os.path.join(_root(), render_id, 'thumbs')
-    if not os.path.isdir(d):
+def get_thumb_sprites(render_id: str) -> Optional[dict]:
+    """Return the sprite index for a render with absolute sheet paths, so
+    the UI can fetch the sheets once and scrub without further calls.
+    None for renders without sprite sheets."""
+    index = _load_thumb_index(render_id)
+    if not index or 'sheets' not in index:
         return None
-    try:
-        files = sorted(os.listdir(d))
-    except OSError:
+    return {
+        'frames': list(index['frames']),
+        'cell_w': index['cell_w'],
+        'cell_h': index['cell_h'],
+        'cols': index['cols'],
+        'per_sheet': index['per_sheet'],
+        'sheets': [os.path.join(index['dir'], n) for n in index['sheets']],
+    }
+
+
+def get_frame_thumb(render_id: str, frame_idx: int) -> Optional[dict]:
+    """Locate the nearest cached thumb for this frame index. Returns
+    {sheet, x, y, w, h, frame} — the sheet path and the cell rectangle in
+    it. For legacy one-file-per-thumb renders the rectangle is the whole
+    image (w/h of None)."""
+    index = _load_thumb_index(render_id)
+    if not index:
         return None
-    # Pick the file with the closest frame index encoded in its name.
-    best = None
-    best_delta = 10 ** 9
-    for f in files:
-        if not f.endswith('.jpg'):
-            continue
-        try:
-            idx = int(f.split('.')[0])
-        except ValueError:
-            continue
-        delta = abs(idx - frame_idx)
-        if delta < best_delta:
-            best_delta = delta
-            best = os.path.join(d, f)
-    return best
+    frames = index['frames']
+    pos = bisect.bisect_left(frames, frame_idx)
+    if pos == len(frames) or (pos > 0 and
+                              frame_idx - frames[pos - 1] <= frames[pos] - frame_idx):
+        pos -= 1
+    if 'files' in index:
+        return {'sheet': os.path.join(index['dir'], index['files'][pos]),
+                'x': 0, 'y': 0, 'w': None, 'h': None, 'frame': frames[pos]}
+    sheet_i, cell = divmod(pos, index['per_sheet'])
+    row, col = divmod(cell, index['cols'])
+    return {
+        'sheet': os.path.join(index['dir'], index['sheets'][sheet_i]),
+        'x': col * index['cell_w'],
+        'y': row * index['cell_h'],
+        'w': index['cell_w'],
+        'h': index['cell_h'],
+        'frame': frames[pos],
+    }
 
 
 def _prune_old_records() -> None:
-    """Keep only the most recent MAX_RENDERS records on disk."""
+    """Keep only the most recent _MAX_RENDERS records. Records are held
+    oldest-first, so this only ever looks at the front of the index.
+    Caller must hold ``_LOCK``."""
+    records = _INDEX['records']
+    baselines = set(_INDEX['baselines'].values())
     root = _root()
+    while len(records) > _MAX_RENDERS:
+        victim = next((rid for rid in records if rid not in baselines), None)
+        if victim is None:
+            break
+        _append_event({'op': 'del', 'render_id': victim})
+        _SPRITE_CACHE.pop(victim, None)
+        _release_video(os.path.join(root, victim, 'video.mp4'))
+        _rmtree(os.path.join(root, victim))
+
+
+def _retain_video(src: str, dst: str) -> None:
+    """Hard-link (or copy) a render's video into its record directory."""
+    import shutil
     try:
-        items = []
-        for name in os.listdir(root):
-            d = os.path.join(root, name)
-            if not os.path.isdir(d):
-                continue
-            meta_p = os.path.join(d, 'meta.json')
-            if not os.path.isfile(meta_p):
-                continue
+        if os.path.abspath(src) == os.path.abspath(dst) or not os.path.isfile(src):
+            return
+        try:
+            os.link(src, dst)
+        except OSError:
+            shutil.copy2(src, dst)
+    except OSError as e:
+        print(f"[VISUAL DIFF] could not keep video copy: {e}")
+
+
+def _trim_videos() -> None:
+    """Delete kept videos of renders that are neither a baseline nor among
+    the newest _VIDEO_KEEP, walking only the index's kept-video list and
+    recording each drop. Caller must hold ``_LOCK``."""
+    baselines = set(_INDEX['baselines'].values())
+    recent = [rid for rid in _INDEX['videos'] if rid not in baselines]
+    root = _root()
+    for rid in recent[:-_VIDEO_KEEP]:
+        path = os.path.join(root, rid, 'video.mp4')
+        if os.path.isfile(path):
+            _release_video(path)
             try:
-                items.append((os.path.getmtime(meta_p), name))
+                os.remove(path)
             except OSError:
-                continue
-        items.sort(reverse=True)
-        baseline = _get_current_baseline()
-        for _, name in items[_MAX_RENDERS:]:
-            if name == baseline:
-                continue
-            try:
-                _rmtree(os.path.join(root, name))
-            except Exception:
-                pass
-    except OSError:
+                continue    # still open elsewhere; retry on the next trim
+        _append_event({'op': 'patch', 'render_id': rid,
+                       'fields': {'video_kept': False}})
+
+
+def _release_video(path: str) -> None:
+    """Close the frame server's decoder on ``path`` before it is deleted
+    (an open handle blocks deletion on Windows)."""
+    try:
+        import frame_server
+        frame_server.release(path)
+    except ImportError:
         pass
 
 
+def video_path(render_id: str) -> Optional[str]:
+    """Path of a decodable video for this render — the kept copy if there
+    is one, else the original output if it still exists."""
+    kept = os.path.join(_root(), render_id, 'video.mp4')
+    if os.path.isfile(kept):
+        return kept
+    with _LOCK:
+        _ensure_index()
+        original = (_INDEX['records'].get(render_id) or {}).get('video_path')
+    if original and os.path.isfile(original):
+        return original
+    return None
+
+
 def _rmtree(path: str) -> None:
     import shutil
     shutil.rmtree(path, ignore_errors=True)
+
+
+# ---------- Background queue ----------
+
+def set_busy_probe(fn: Optional[Callable[[], bool]]) -> None:
+    """Register a callable that returns True while the app is doing
+    latency-sensitive work (e.g. an interactive preview). Queue workers
+    don't start jobs, and running jobs pause decoding, while it is True."""
+    global _BUSY_PROBE
+    _BUSY_PROBE = fn
+
+
+def _is_busy() -> bool:
+    probe = _BUSY_PROBE
+    if probe is None:
+        return False
+    try:
+        return bool(probe())
+    except Exception:
+        return False
+
+
+def submit(video_path: str, scene_file: str = '',
+           baseline_id: Optional[str] = None,
+           baseline_key: str = '',
+           sample_every: int = 1,
+           threshold: float = _DIFF_THRESHOLD,
+           autopromote: bool = True,
+           on_done: Optional[Callable[[dict], None]] = None) -> str:
+    """Queue a finished render for hashing and diffing. Returns a job id
+    immediately. Submitting a video that is already queued or being hashed
+    returns the existing job id. ``on_done`` receives
+    {ok, job_id, render_id, diff, promoted} (or {ok: False, error})."""
+    key = os.path.abspath(video_path)
+    with _QUEUE_COND:
+        existing = _QUEUE['by_path'].get(key)
+        if existing:
+            return existing
+        job = {
+            'job_id': uuid.uuid4().hex[:12],
+            'seq': _QUEUE['next_seq'],
+            'video_path': video_path,
+            'key': key,
+            'scene_file': scene_file or '',
+            'baseline_id': baseline_id,
+            'baseline_key': baseline_key or '',
+            'sample_every': sample_every,
+            'threshold': threshold,
+            'autopromote': autopromote,
+            'on_done': on_done,
+        }
+        _QUEUE['next_seq'] += 1
+        _QUEUE['pending'].append(job)
+        _QUEUE['by_path'][key] = job['job_id']
+        dropped = None
+        if len(_QUEUE['pending']) > _QUEUE_MAX:
+            dropped = _QUEUE['pending'].popleft()
+            _QUEUE['by_path'].pop(dropped['key'], None)
+            _finish_turn(dropped['seq'])
+        if _QUEUE['workers'] < _QUEUE_WORKERS:
+            _QUEUE['workers'] += 1
+            threading.Thread(target=_queue_worker, daemon=True,
+                             name='visual-diff-worker').start()
+        _QUEUE_COND.notify_all()
+    if dropped is not None:
+        _deliver(dropped, {'ok': False, 'error': 'dropped: diff queue full'})
+    return job['job_id']
+
+
+def queue_status() -> dict:
+    with _QUEUE_COND:
+        return {
+            'pending': [j['job_id'] for j in _QUEUE['pending']],
+            'running': list(_QUEUE['running']),
+            'workers': _QUEUE['workers'],
+            'busy': _is_busy(),
+        }
+
+
+def _finish_turn(seq: int) -> None:
+    """Mark ``seq``'s diff step done and advance the turn past any
+    consecutive finished seqs. Caller must hold ``_QUEUE_COND``."""
+    _QUEUE['finished'].add(seq)
+    while _QUEUE['turn'] in _QUEUE['finished']:
+        _QUEUE['finished'].discard(_QUEUE['turn'])
+        _QUEUE['turn'] += 1
+    _QUEUE_COND.notify_all()
+
+
+def _deliver(job: dict, result: dict) -> None:
+    cb = job.get('on_done')
+    if cb is None:
+        return
+    result.setdefault('job_id', job['job_id'])
+    try:
+        cb(result)
+    except Exception as e:
+        print(f"[VISUAL DIFF] on_done callback failed: {e}")
+
+
+def _queue_worker() -> None:
+    while True:
+        with _QUEUE_COND:
+            while not _QUEUE['pending'] or _is_busy():
+                if not _QUEUE['pending']:
+                    # Idle workers exit; submit() spawns new ones on demand.
+                    if not _QUEUE_COND.wait(timeout=30) and not _QUEUE['pending']:
+                        _QUEUE['workers'] -= 1
+                        return
+                else:
+                    _QUEUE_COND.wait(timeout=_BUSY_POLL)
+            job = _QUEUE['pending'].popleft()
+            _QUEUE['running'][job['job_id']] = job
+        result = None
+        try:
+            result = _run_job(job)
+        except Exception as e:
+            result = {'ok': False, 'error': str(e)}
+        finally:
+            with _QUEUE_COND:
+                _QUEUE['running'].pop(job['job_id'], None)
+                _QUEUE['by_path'].pop(job['key'], None)
+                if _QUEUE['turn'] <= job['seq']:
+                    _finish_turn(job['seq'])
+        _deliver(job, result)
+
+
+def _run_job(job: dict) -> dict:
+    """Hash in parallel with other jobs, then wait for this job's turn to
+    diff (and maybe promote) so baselines advance in submission order."""
+    with _LOCK:
+        streamed = _STREAMED.pop(job['key'], None)
+    rec = record_render(uuid.uuid4().hex[:12], job['video_path'],
+                        job['scene_file'], pause=_is_busy,
+                        baseline_key=job['baseline_key'],
+                        sample_every=job['sample_every'],
+                        precomputed=streamed)
+    with _QUEUE_COND:
+        while _QUEUE['turn'] < job['seq']:
+            _QUEUE_COND.wait()
+    # Only the job holding the turn gets here, so no lock is needed until
+    # the turn is handed on.
+    try:
+        if not rec.get('ok'):
+            return {'ok': False, 'error': rec.get('error')}
+        render_id = rec['render_id']
+        diff = diff_against_baseline(render_id, baseline_id=job['baseline_id'],
+                                     threshold=job['threshold'])
+        promoted = False
+        if diff.get('ok') and diff.get('auto_accepted') and job['autopromote']:
+            accept(render_id)
+            promoted = True
+        diff['promoted'] = promoted
+        return {'ok': True, 'render_id': render_id, 'diff': diff,
+                'promoted': promoted}
+    finally:
+        with _QUEUE_COND:
+            _finish_turn(job['seq'])
+
+
+# ---------- Streaming segment hashes ----------
+
+def _segment_dir() -> str:
+    d = os.path.join(_root(), 'segments')
+    os.makedirs(d, exist_ok=True)
+    return d
+
+
+def _file_digest(path: str) -> Optional[str]:
+    h = hashlib.sha1()
+    try:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                h.update(chunk)
+    except OSError:
+        return None
+    return h.hexdigest()
+
+
+def _frame_count_matches(video_path: str, n: int) -> bool:
+    """Cheap container-metadata check that ``n`` hashes cover the video.
+    Without cv2 there is nothing to check against, so trust the caller."""
+    if n <= 0:
+        return False
+    try:
+        import cv2
+    except ImportError:
+        return True
+    cap = cv2.VideoCapture(video_path)
+    try:
+        if not cap.isOpened():
+            return False
+        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+    finally:
+        cap.release()
+    return total <= 0 or abs(total - n) <= 1
+
+
+def hash_segment(path: str, pause=None) -> Optional[dict]:
+    """Hash every frame of one partial movie file, consulting the
+    content-addressed segment cache first. Returns {hashes, fps, cached}."""
+    digest = _file_digest(path)
+    if not digest:
+        return None
+    cache_p = os.path.join(_segment_dir(), f'{digest}.json')
+    try:
+        with open(cache_p, 'r') as f:
+            cached = json.load(f)
+        try:
+            os.utime(cache_p)  # refresh LRU position
+        except OSError:
+            pass
+        return {'hashes': cached['hashes'], 'fps': cached.get('fps', 30.0),
+                'cached': True}
+    except (OSError, json.JSONDecodeError, KeyError):
+        pass
+    res = _try_hash_via_cv2(path, pause) or _try_hash_via_pil(path, pause)
+    if not res:
+        return None
+    try:
+        with open(cache_p + '.tmp', 'w') as f:
+            json.dump({'hashes': res['hashes'], 'fps': res['fps']}, f)
+        os.replace(cache_p + '.tmp', cache_p)
+    except OSError as e:
+        print(f"[VISUAL DIFF] segment cache write failed: {e}")
+    return {'hashes': res['hashes'], 'fps': res['fps'], 'cached': False}
+
+
+def _prune_segment_cache() -> None:
+    d = _segment_dir()
+    try:
+        entries = [os.path.join(d, n) for n in os.listdir(d) if n.endswith('.json')]
+    except OSError:
+        return
+    if len(entries) <= _SEGMENT_CACHE_MAX:
+        return
+    entries.sort(key=lambda p: os.path.getmtime(p) if os.path.exists(p) else 0)
+    for p in entries[:len(entries) - _SEGMENT_CACHE_MAX]:
+        try:
+            os.remove(p)
+        except OSError:
+            pass
+
+
+_LIST_LINE_RE = re.compile(r"^file\s+'(?:file:)?(.*)'\s*$")
+
+
+def _partial_order(scene_dir: str) -> list:
+    """Partial movie files of one scene in playback order — from manim's
+    partial_movie_file_list.txt when present, else by modification time."""
+    list_p = os.path.join(scene_dir, 'partial_movie_file_list.txt')
+    ordered = []
+    try:
+        with open(list_p, 'r', encoding='utf-8') as f:
+            for line in f:
+                m = _LIST_LINE_RE.match(line.strip())
+                if m:
+                    p = m.group(1)
+                    if not os.path.isabs(p):
+                        p = os.path.join(scene_dir, p)
+                    ordered.append(os.path.normpath(p))
+    except OSError:
+        pass
+    if ordered:
+        return ordered
+    try:
+        files = [os.path.join(scene_dir, n) for n in os.listdir(scene_dir)
+                 if n.endswith('.mp4')]
+    except OSError:
+        return []
+    files.sort(key=lambda p: os.path.getmtime(p) if os.path.exists(p) else 0)
+    return files
+
+
+class SegmentWatcher:
+    """Hash manim's partial movie files while the render is still running.
+
+    Manim writes one partial file per animation under
+    ``<media_dir>/videos/**/partial_movie_files/<Scene>/`` and only starts
+    the next once the previous is closed, so every file except the newest
+    in a directory is complete and can be hashed immediately. At the end,
+    ``finish()`` hashes whatever is left and concatenates the per-segment
+    arrays in playback order — the final MP4 never has to be decoded."""
+
+    def __init__(self, media_dir: str, pause=None):
+        self.media_dir = media_dir
+        self.pause = pause
+        self._done = {}        # partial path -> hash result
+        self._scan_lock = threading.Lock()   # one _scan at a time
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> 'SegmentWatcher':
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        name='visual-diff-segments')
+        self._thread.start()
+        return self
+
+    def _scene_dirs(self) -> list:
+        out = []
+        for root, dirs, _files in os.walk(self.media_dir):
+            if os.path.basename(root) == 'partial_movie_files':
+                out.extend(os.path.join(root, d) for d in dirs)
+                dirs[:] = []
+        return out
+
+    def _scan(self, final: bool = False) -> None:
+        with self._scan_lock:
+            self._scan_locked(final)
+
+    def _scan_locked(self, final: bool) -> None:
+        for scene_dir in self._scene_dirs():
+            try:
+                files = [os.path.join(scene_dir, n) for n in os.listdir(scene_dir)
+                         if n.endswith('.mp4')]
+            except OSError:
+                continue
+            files.sort(key=lambda p: os.path.getmtime(p) if os.path.exists(p) else 0)
+            ready = files if final else files[:-1]
+            for p in ready:
+                if self._stop.is_set() and not final:
+                    return
+                key = os.path.normpath(p)
+                if key in self._done:
+                    continue
+                res = hash_segment(p, self.pause)
+                if res:
+                    self._done[key] = res
+
+    def _run(self) -> None:
+        while not self._stop.wait(_SEGMENT_POLL):
+            try:
+                self._scan()
+            except Exception as e:
+                print(f"[VISUAL DIFF] segment scan failed: {e}")
+
+    def cancel(self) -> None:
+        self._stop.set()
+
+    def finish(self, scene_name: Optional[str] = None,
+               timeout: float = 30.0) -> Optional[dict]:
+        """Stop watching, hash any remaining segments and return the
+        concatenated {hashes, fps, stride, segments, reused}, or None if no
+        partial files were found. Must run before manim's media folder is
+        cleaned up."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        # If the join timed out the watcher may still be mid-scan; the scan
+        # lock makes the final pass wait for it rather than race on _done.
+        try:
+            self._scan(final=True)
+        except Exception as e:
+            print(f"[VISUAL DIFF] segment scan failed: {e}")
+            return None
+        dirs = self._scene_dirs()
+        if scene_name:
+            dirs = [d for d in dirs if os.path.basename(d) == scene_name] or dirs
+        if not dirs:
+            return None
+        scene_dir = max(dirs, key=lambda d: os.path.getmtime(d))
+        hashes, fps, reused, count = [], 30.0, 0, 0
+        for p in _partial_order(scene_dir):
+            res = self._done.get(os.path.normpath(p)) or hash_segment(p)
+            if not res:
+                return None
+            hashes.extend(res['hashes'])
+            fps = res.get('fps', fps)
+            reused += 1 if res.get('cached') else 0
+            count += 1
+        _prune_segment_cache()
+        if not hashes:
+            return None
+        return {'hashes': hashes, 'fps': fps, 'stride': 1,
+                'segments': count, 'reused': reused}
+
+
+def attach_stream(video_path: str, result: Optional[dict]) -> None:
+    """Hand a SegmentWatcher result to the queue: the next submit() for
+    ``video_path`` records it without decoding the video."""
+    if not result or not result.get('hashes'):
+        return
+    with _LOCK:
+        _STREAMED[os.path.abspath(video_path)] = result
+        while len(_STREAMED) > _QUEUE_MAX:
+            _STREAMED.pop(next(iter(_STREAMED)))
@@ -110,6 +110,24 @@
         return html;
     }
 
+    /** Render only `text` (new lines) and append it to `container`, so a
+     *  long stream costs one pass per line rather than one per poll. */
+    function appendEnhancedOutput(container, text) {
+        const tmp = document.createElement('div');
+        tmp.innerHTML = renderEnhancedOutput(text);
+        // A code block split across two polls continues the previous one
+        // (unless a blank line, which ends a block, came in between).
+        const first = tmp.firstElementChild;
+        const last = container.lastElementChild;
+        if (first && last && text.split('\n')[0].trim()
+                && first.classList.contains('aip-code-block')
+                && last.classList.contains('aip-code-block')) {
+            while (first.firstChild) last.appendChild(first.firstChild);
+            first.remove();
+        }
+        container.append(...tmp.childNodes);
+    }
+
     // ═══════════════════════════════════════════════════════════════════
     //  PANEL MODE (existing sidebar in index.html)
     // ═══════════════════════════════════════════════════════════════════
@@ -899,12 +917,25 @@
                     streamOutput.appendChild(responseContainer);
                 }
 
+                // Claude returns only the panel lines added since `panelCursor`;
+                // they are rendered and appended, and the container is only
+                // rebuilt when the server starts over (reset).
+                let panelCursor = 0;
+
                 pollTimer = setInterval(async () => {
                     try {
-                        const poll = await pywebview.api[pollFn]();
+                        const poll = currentProvider === 'claude'
+                            ? await pywebview.api[pollFn](panelCursor)
+                            : await pywebview.api[pollFn]();
                         if (responseContainer) {
                             const clean = poll.filtered_output || '';
-                            if (clean) responseContainer.innerHTML = renderEnhancedOutput(clean);
+                            if (currentProvider === 'claude') {
+                                if (poll.reset || poll.cursor < panelCursor) responseContainer.innerHTML = '';
+                                panelCursor = poll.cursor ?? panelCursor;
+                                if (clean) appendEnhancedOutput(responseContainer, clean);
+                            } else if (clean) {
+                                responseContainer.innerHTML = renderEnhancedOutput(clean);
+                            }
                             requestAnimationFrame(() => {
                                 streamOutput.scrollTop = streamOutput.scrollHeight;
                             });
@@ -1029,6 +1060,7 @@
 
         let agentPollTimer = null;
         let lastAgentActionId = 0;
+        let lastAgentShotsKey = '';
         let agentActive = false;
 
         const STEP_ICONS = {
@@ -1095,6 +1127,14 @@
                     });
                 }
 
+                // Frames the agent captured itself from the rendered file
+                const fileShots = (st.screenshots || []).filter(s => s.url);
+                const shotsKey = fileShots.map(s => s.url).join('|');
+                if (fileShots.length && shotsKey !== lastAgentShotsKey) {
+                    lastAgentShotsKey = shotsKey;
+                    renderScreenshotThumbs(fileShots.map(s => ({ time: s.time, dataUrl: s.url })));
+                }
+
                 // Execute actions from agent backend
                 const act = st.action;
                 if (act && act._id && act._id !== lastAgentActionId) {
@@ -1706,10 +1746,14 @@
                 // Poll for output
                 const pollFn = currentProvider === 'claude' ? 'ai_edit_claude_poll' : 'ai_edit_poll';
                 let lastLen = 0;  // used for Codex (cumulative); Claude uses incremental drain
+                let panelCursor = 0;  // Claude: skip panel text the terminal doesn't show
 
                 pollTimer = setInterval(async () => {
                     try {
-                        const poll = await pywebview.api[pollFn]();
+                        const poll = currentProvider === 'claude'
+                            ? await pywebview.api[pollFn](panelCursor)
+                            : await pywebview.api[pollFn]();
+                        if (currentProvider === 'claude') panelCursor = poll.cursor ?? panelCursor;
                         // Write output to terminal
                         if (poll.output && term) {
                             if (currentProvider === 'claude') {
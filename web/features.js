@@ -275,25 +275,103 @@
             updateFrame();
         });
 
+        // Sprite sheets per render_id → {index, images} (null = no sheets,
+        // fall back to per-frame visual_diff_thumb). Fetched once per
+        // render; scrubbing after that is pure canvas cropping.
+        const sprites = new Map();
+        async function loadSprites(rid) {
+            if (sprites.has(rid)) return sprites.get(rid);
+            let entry = null;
+            try {
+                const res = await window.pywebview.api.visual_diff_sprites(rid);
+                if (res?.status === 'ok') {
+                    entry = {
+                        index: res,
+                        images: (res.sheets || []).map(u => { const im = new Image(); im.src = u; return im; }),
+                    };
+                }
+            } catch (e) {}
+            sprites.set(rid, entry);
+            return entry;
+        }
+        function nearestThumb(frames, f) {
+            let lo = 0, hi = frames.length;
+            while (lo < hi) {
+                const mid = (lo + hi) >> 1;
+                if (frames[mid] < f) lo = mid + 1; else hi = mid;
+            }
+            if (lo === frames.length || (lo > 0 && f - frames[lo - 1] <= frames[lo] - f)) lo -= 1;
+            return lo;
+        }
+        async function drawCell(canvas, img, x, y, w, h) {
+            if (!img.complete) { try { await img.decode(); } catch (e) { return; } }
+            w = w || img.naturalWidth;
+            h = h || img.naturalHeight;
+            canvas.width = w;
+            canvas.height = h;
+            canvas.getContext('2d').drawImage(img, x, y, w, h, 0, 0, w, h);
+        }
+        async function paintThumb(canvas, rid, frame) {
+            if (!canvas) return;
+            const sp = await loadSprites(rid);
+            if (sp && sp.index.frames?.length) {
+                const ix = sp.index;
+                const pos = nearestThumb(ix.frames, frame);
+                const cell = pos % ix.per_sheet;
+                const img = sp.images[Math.floor(pos / ix.per_sheet)];
+                if (img) {
+                    await drawCell(canvas, img,
+                        (cell % ix.cols) * ix.cell_w,
+                        Math.floor(cell / ix.cols) * ix.cell_h,
+                        ix.cell_w, ix.cell_h);
+                }
+                return;
+            }
+            try {
+                const res = await window.pywebview.api.visual_diff_thumb(rid, frame);
+                if (!res?.url) return;
+                const img = new Image();
+                img.src = res.url;
+                await drawCell(canvas, img, res.x || 0, res.y || 0, res.w, res.h);
+            } catch (e) {}
+        }
+
+        // Exact frames come from the backend frame server. The sprite thumb
+        // is painted first so scrubbing never stalls; the decoded frame
+        // replaces it when it arrives unless a newer request has been made
+        // for the same canvas in the meantime.
+        const exactSeq = new WeakMap();
+        async function paintExact(canvas, rid, frame, seq) {
+            try {
+                const res = await window.pywebview.api.visual_diff_frame(rid, frame, 640);
+                if (res?.status !== 'ok' || exactSeq.get(canvas) !== seq) return;
+                const img = new Image();
+                img.src = res.url;
+                try { await img.decode(); } catch (e) { return; }
+                if (exactSeq.get(canvas) !== seq) return;
+                await drawCell(canvas, img, 0, 0, img.naturalWidth, img.naturalHeight);
+            } catch (e) {}
+        }
+        async function paintFrame(canvas, rid, frame) {
+            if (!canvas) return;
+            const seq = (exactSeq.get(canvas) || 0) + 1;
+            exactSeq.set(canvas, seq);
+            await paintThumb(canvas, rid, frame);
+            if (exactSeq.get(canvas) !== seq) return;
+            await paintExact(canvas, rid, frame, seq);
+        }
+
         async function updateFrame() {
             if (!state.current) return;
             if (frameLbl) frameLbl.textContent = `${state.frame} / ${state.diff?.total_frames || 0}`;
             renderStrip();
-            // Fetch thumbs
-            try {
-                const curRes = await window.pywebview.api.visual_diff_thumb(
-                    state.current.render_id, state.frame);
-                if (curImg && curRes?.url) curImg.src = curRes.url;
-            } catch (e) {}
+            const jobs = [paintFrame(curImg, state.current.render_id, state.frame)];
             if (state.diff?.baseline_id) {
-                try {
-                    const baseRes = await window.pywebview.api.visual_diff_thumb(
-                        state.diff.baseline_id, state.frame);
-                    if (baseImg && baseRes?.url) baseImg.src = baseRes.url;
-                } catch (e) {}
+                jobs.push(paintFrame(baseImg, state.diff.baseline_id, state.frame));
             } else if (baseImg) {
-                baseImg.removeAttribute('src');
+                baseImg.width = 0;
             }
+            await Promise.all(jobs);
         }
 
         async function action(kind) {
@@ -361,14 +439,26 @@
             }
         }
 
-        // Invoked from renderCompleted: hash frames, diff, maybe open review.
+        // Invoked from renderCompleted: queue the render for hashing. The
+        // backend diffs it off the critical path and calls
+        // _visualDiffResult when done.
         window._visualDiffAfterRender = async function (outputPath) {
             const flags = await flagsReady;
             if (!flags.visual_diff) return;
             if (!await waitApi()) return;
             try {
-                const res = await window.pywebview.api.visual_diff_record(outputPath);
-                if (!res || res.status !== 'ok') return;
+                await window.pywebview.api.visual_diff_record(outputPath);
+            } catch (e) { console.warn('[F-03] record error', e); }
+        };
+
+        // Pushed from the backend diff queue once a render has been hashed
+        // and compared against its baseline.
+        window._visualDiffResult = async function (res) {
+            if (!res || res.status !== 'ok') {
+                if (res?.message) console.warn('[F-03] diff failed', res.message);
+                return;
+            }
+            try {
                 await loadList();
                 const meta = state.renders.find(r => r.render_id === res.render_id);
                 state.current = meta || null;
@@ -380,7 +470,7 @@
                 } else if (d.flagged_count > 0) {
                     toastOr(`Visual drift: ${d.flagged_count} frames flagged — click the compare icon to review`, 'warning');
                 }
-            } catch (e) { console.warn('[F-03] record error', e); }
+            } catch (e) { console.warn('[F-03] result error', e); }
         };
 
         // Show the button once we know we have history at all
@@ -554,9 +644,29 @@
         const body  = document.getElementById('inspectorBody');
         const srcEl = document.getElementById('inspectorSrc');
         const closeBtn = document.getElementById('inspectorClose');
+        const live = document.getElementById('inspectorLive');
+        const liveImg = document.getElementById('inspectorLiveImg');
+        const liveMeta = document.getElementById('inspectorLiveMeta');
         if (!panel) return;
 
         let currentObject = null;
+        let liveSeq = 0;
+
+        // Newest live frame pushed by the backend (inspector_live_preview).
+        // Older seqs can still arrive after a newer request was queued;
+        // they are ignored so the image never steps backwards.
+        window._inspectorLiveFrame = (frame) => {
+            if (!live || !frame || frame.seq < liveSeq) return;
+            liveSeq = frame.seq;
+            live.classList.remove('stale');
+            if (frame.status !== 'ok') {
+                if (liveMeta) liveMeta.textContent = frame.message || 'frame failed';
+                return;
+            }
+            if (liveImg) liveImg.src = frame.url;
+            if (liveMeta) liveMeta.textContent = `${frame.ms} ms`;
+            live.hidden = false;
+        };
 
         closeBtn?.addEventListener('click', () => { panel.hidden = true; });
 
@@ -578,6 +688,14 @@
             panel.hidden = false;
         }, true);
 
+        function editorCode() {
+            try {
+                if (typeof getEditorValue === 'function') return getEditorValue();
+                if (typeof editor !== 'undefined' && editor?.getValue) return editor.getValue();
+            } catch (e) {}
+            return '';
+        }
+
         async function loadObject(objectPath) {
             if (!await waitApi()) return;
             let code = '';
@@ -595,6 +713,7 @@
                     return;
                 }
                 currentObject = res;
+                if (live) live.hidden = true;
                 if (title) title.textContent = `${res.kind || 'mobject'} — ${objectPath}${res.scratch ? ' (scratch)' : ''}`;
                 if (bound) bound.classList.add('active');
                 renderKwargs(res.kwargs || []);
@@ -658,6 +777,13 @@
                 : e.target.value;
             const valEl = row.querySelector('.val');
             if (valEl) valEl.textContent = String(val);
+            if (!await waitApi()) return;
+            try {
+                const res = await window.pywebview.api.inspector_live_preview(
+                    currentObject.object_path, name, val,
+                    parseInt(e.target.dataset.decimals, 10) || 0, editorCode() || null);
+                if (res?.status === 'queued') live?.classList.add('stale');
+            } catch (_) {}
         });
         body?.addEventListener('change', async (e) => {
             if (!currentObject) return;
@@ -696,7 +822,7 @@
 
     // (F-01 Timeline removed by user request 2026-05-05.)
     // The Python backend (timeline.py) and ManimAPI methods
-    // (timeline_parse, timeline_apply_edits) remain available for
+    // (timeline_parse, timeline_measure, timeline_apply_edits) remain available for
     // future re-introduction.
 
     // (F-12 Render Farm IIFE removed by user request 2026-05-06.
@@ -1,6 +1,7 @@
 // narration.js — Auto-narration on render/preview (Kokoro TTS)
-// When code contains narrate("...") calls, TTS is generated and merged
-// automatically after render/preview completes.  No panel needed.
+// When code contains narrate("...") calls, TTS starts alongside the
+// render/preview and is merged (one -c:v copy pass) once both are done.
+// No panel needed.
 // Dependencies: editor, pywebview, toast(), appendConsole()
 (function initAutoNarration() {
     'use strict';
@@ -48,28 +49,56 @@
         }
     }
 
+    function narrationVoice() {
+        try { return localStorage.getItem('narration_voice') || 'af_heart'; } catch(e) { return 'af_heart'; }
+    }
+    function narrationSpeed() {
+        try { return parseFloat(localStorage.getItem('narration_speed')) || 1.0; } catch(e) { return 1.0; }
+    }
+
+    /**
+     * Called when a render / preview starts: TTS runs while manim renders,
+     * so by renderCompleted the audio is usually ready and only the merge
+     * remains. _autoNarrate reuses this generation for unchanged code.
+     */
+    window._autoNarratePrestart = async function (code) {
+        if (!pywebview?.api?.narration_prestart) return;
+        NARRATE_RE.lastIndex = 0;
+        if (!code || !NARRATE_RE.test(code)) return;
+        try {
+            const res = await pywebview.api.narration_prestart(code, narrationVoice(), narrationSpeed());
+            if (res.status === 'started') console.log('[NARRATION] TTS started alongside render');
+        } catch (e) {
+            console.log('[NARRATION] prestart error:', e);
+        }
+    };
+
     /**
      * Auto-narrate: called by renderCompleted / previewCompleted.
      * 1. Check if code has narrate() calls
-     * 2. Generate TTS audio (poll until done)
+     * 2. Generate TTS audio, or join the generation started with the
+     *    render (poll until done)
      * 3. Merge audio with the rendered video
      * 4. Reload preview with narrated video + subtitles
      */
     window._autoNarrate = async function (videoPath) {
         if (!codeHasNarrate()) return;
-        if (!pywebview?.api?.generate_narration) return;
+        if (!pywebview?.api?.narration_prestart) return;
 
         const code = editor.getModel().getValue();
-        const voice = (() => { try { return localStorage.getItem('narration_voice') || 'af_heart'; } catch(e) { return 'af_heart'; } })();
-        const speed = (() => { try { return parseFloat(localStorage.getItem('narration_speed')) || 1.0; } catch(e) { return 1.0; } })();
+        const voice = narrationVoice();
+        const speed = narrationSpeed();
 
         console.log('[NARRATION] Auto-narrate starting...');
-        if (typeof appendConsole === 'function') appendConsole('Generating narration...', 'info');
-        if (typeof toast === 'function') toast('Generating narration...', 'info');
 
-        // 1. Start generation
+        // 1. Start generation (reused when already started with the render)
         try {
-            const res = await pywebview.api.generate_narration(code, voice, speed);
+            const res = await pywebview.api.narration_prestart(code, voice, speed);
+            if (res.status === 'skipped') return;
+            if (res.status === 'started') {
+                if (typeof appendConsole === 'function') appendConsole('Generating narration...', 'info');
+                if (typeof toast === 'function') toast('Generating narration...', 'info');
+            }
             if (res.status === 'error') {
                 console.warn('[NARRATION]', res.message);
                 if (typeof toast === 'function') toast('Narration: ' + res.message, 'warning');
@@ -80,23 +109,24 @@
             return;
         }
 
-        // 2. Poll until done
+        // 2. Poll until done (immediately when TTS finished during the render)
         const poll = () => new Promise((resolve) => {
-            const timer = setInterval(async () => {
+            const check = async () => {
                 try {
                     const p = await pywebview.api.narration_poll();
-                    if (p.message && typeof appendConsole === 'function') {
-                        appendConsole('Narration: ' + p.message, 'info');
-                    }
                     if (p.done) {
-                        clearInterval(timer);
                         resolve(p);
+                        return;
                     }
+                    if (p.message && typeof appendConsole === 'function') {
+                        appendConsole('Narration: ' + p.message, 'info');
+                    }
+                    setTimeout(check, 800);
                 } catch (e) {
-                    clearInterval(timer);
                     resolve({ status: 'error', message: String(e) });
                 }
-            }, 800);
+            };
+            check();
         });
 
         const result = await poll();
@@ -127,6 +157,7 @@
                     }
                     window._lastRenderedVideo = merge.output_path;
                     attachSubtitles(vid);
+                    showWaveform(merge.output_path);
                 }
             } else {
                 if (typeof toast === 'function') toast('Merge: ' + (merge.message || 'failed'), 'error');
@@ -137,5 +168,122 @@
         }
     };
 
+    // ── Narration waveform strip over the narrated preview ──
+    // Peaks come from the backend pyramid (get_narration_waveform) in slices
+    // sized to the canvas; zoom and scroll re-request a slice instead of
+    // decoding audio in the page.
+    const wave = { canvas: null, src: '', start: 0, end: 0, duration: 0, data: null, seq: 0 };
+
+    function waveCanvas() {
+        if (wave.canvas) return wave.canvas;
+        const host = document.querySelector('#previewContainer .preview-media-container');
+        const vid = document.getElementById('previewVideo');
+        if (!host || !vid) return null;
+        const c = document.createElement('canvas');
+        c.id = 'narrationWaveform';
+        c.title = 'Narration — wheel: zoom, Shift+wheel: scroll, click: seek';
+        c.style.cssText = 'position:absolute;left:10px;top:10px;width:calc(100% - 20px);'
+            + 'height:36px;z-index:11;background:rgba(0,0,0,0.45);border-radius:4px;'
+            + 'cursor:pointer;display:none;';
+        host.appendChild(c);
+        c.addEventListener('wheel', onWaveWheel, { passive: false });
+        c.addEventListener('click', (e) => {
+            const r = c.getBoundingClientRect();
+            vid.currentTime = wave.start + (wave.end - wave.start) * (e.clientX - r.left) / r.width;
+        });
+        vid.addEventListener('timeupdate', () => { if (c.style.display !== 'none') drawWaveform(); });
+        // A different video replaced the narrated one: hide the strip.
+        // (showPreview copies videos to temp_assets, so compare source paths.)
+        vid.addEventListener('loadstart', () => {
+            if (typeof currentPreviewPath !== 'undefined' && currentPreviewPath !== wave.src)
+                hideWaveform();
+        });
+        wave.canvas = c;
+        return c;
+    }
+
+    function showWaveform(videoPath) {
+        const c = waveCanvas();
+        if (!c || !window.pywebview?.api?.get_narration_waveform) return;
+        wave.src = videoPath || '';
+        wave.start = 0;
+        wave.end = 0;
+        wave.data = null;
+        c.style.display = 'block';
+        c.width = Math.max(1, c.clientWidth);
+        c.height = Math.max(1, c.clientHeight);
+        loadWaveform();
+    }
+
+    function hideWaveform() {
+        if (!wave.canvas) return;
+        wave.canvas.style.display = 'none';
+        wave.src = '';
+        wave.data = null;
+        wave.seq++;
+    }
+
+    async function loadWaveform() {
+        const c = wave.canvas;
+        const seq = ++wave.seq;
+        try {
+            const res = await pywebview.api.get_narration_waveform(
+                null, wave.start, wave.end || null, c.width);
+            if (seq !== wave.seq || res.status !== 'success') return;
+            if (!wave.end) wave.end = res.duration;
+            wave.duration = res.duration;
+            wave.data = res;
+            drawWaveform();
+        } catch (e) {
+            console.error('[NARRATION] waveform error:', e);
+        }
+    }
+
+    function drawWaveform() {
+        const c = wave.canvas, res = wave.data;
+        if (!c || !res) return;
+        const ctx = c.getContext('2d');
+        const w = c.width, h = c.height, mid = h / 2;
+        const span = (wave.end - wave.start) || 1;
+        const n = res.peaks.length / 2;
+        ctx.clearRect(0, 0, w, h);
+        ctx.fillStyle = 'rgba(167, 139, 250, 0.9)';
+        for (let x = 0; x < w; x++) {
+            const t0 = wave.start + span * x / w, t1 = wave.start + span * (x + 1) / w;
+            const i0 = Math.max(0, Math.floor((t0 - res.start) / res.bucket_seconds));
+            const i1 = Math.min(n, Math.max(i0 + 1, Math.ceil((t1 - res.start) / res.bucket_seconds)));
+            let lo = 0, hi = 0;
+            for (let i = i0; i < i1; i++) {
+                lo = Math.min(lo, res.peaks[2 * i]);
+                hi = Math.max(hi, res.peaks[2 * i + 1]);
+            }
+            ctx.fillRect(x, mid - hi / 32768 * mid, 1, Math.max(1, (hi - lo) / 32768 * mid));
+        }
+        const vid = document.getElementById('previewVideo');
+        if (vid && vid.currentTime >= wave.start && vid.currentTime <= wave.end) {
+            ctx.fillStyle = '#fff';
+            ctx.fillRect(Math.round((vid.currentTime - wave.start) / span * w), 0, 1, h);
+        }
+    }
+
+    function onWaveWheel(e) {
+        if (!wave.data) return;
+        e.preventDefault();
+        const span = wave.end - wave.start;
+        let start, newSpan = span;
+        if (e.shiftKey) {
+            start = wave.start + span * 0.1 * Math.sign(e.deltaY || e.deltaX);
+        } else {
+            const r = wave.canvas.getBoundingClientRect();
+            const at = wave.start + span * (e.clientX - r.left) / r.width;
+            newSpan = Math.min(wave.duration, Math.max(0.05, span * (e.deltaY > 0 ? 1.25 : 0.8)));
+            start = at - (at - wave.start) * newSpan / span;
+        }
+        wave.start = Math.max(0, Math.min(wave.duration - newSpan, start));
+        wave.end = wave.start + newSpan;
+        drawWaveform();
+        loadWaveform();
+    }
+
     console.log('[NARRATION] Auto-narration loaded');
 })();
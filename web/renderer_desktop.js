@@ -1119,6 +1119,9 @@ async function renderAnimation() {
     // (F-12 Render Farm routing removed by user request 2026-05-06.
     // All renders go straight through the standard single-process path.)
 
+    // Narration TTS runs concurrently with the render (no-op without narrate()).
+    if (typeof window._autoNarratePrestart === 'function') window._autoNarratePrestart(code);
+
     try {
         let res = await pywebview.api.render_animation(code, quality, fps, gpuEnabled, format, null, null, null);
 
@@ -1310,6 +1313,9 @@ async function quickPreview() {
 
     // Just run the command in terminal - no UI messages
     updateAppState({ render: 'previewing' });
+    // Narration TTS runs concurrently with the preview (no-op without narrate()).
+    if (typeof window._autoNarratePrestart === 'function') window._autoNarratePrestart(code);
+
     try {
         let res = await pywebview.api.quick_preview(code, quality, fps, gpuEnabled, 'mp4', null);
 